@@ -0,0 +1,121 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARKS = {}  # name -> function(config) -> list of Metric
+
+
+class Metric:
+    def __init__(self, name: str, value: float, unit: str, higher_is_better: bool):
+        self.name = name
+        self.value = value
+        self.unit = unit
+        self.higher_is_better = higher_is_better
+
+    def to_dict(self) -> dict:
+        return {"value": self.value, "unit": self.unit, "higher_is_better": self.higher_is_better}
+
+
+def benchmark(name: str):
+    """ Register a benchmark. The function receives the parsed command line config and returns a list of Metric. """
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.seconds = time.perf_counter() - self.start
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, metrics: list, machine: str = None):
+    """ Write the metrics as baseline. Metrics of benchmarks that were not run are kept from the old baseline. """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = {
+        "machine": machine,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "metrics": {**load_baseline(path).get("metrics", {}), **{m.name: m.to_dict() for m in metrics}},
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def find_regressions(metrics: list, baseline: dict, tolerance: float) -> list:
+    """
+    Compare against the baseline. A metric regresses if it is worse than the baseline by more than tolerance,
+    relative to the baseline value. Metrics missing in the baseline are skipped.
+    :return: list of (name, baseline value, current value, relative change)
+    """
+    regressions = []
+    baseline_metrics = baseline.get("metrics", {})
+    for m in metrics:
+        base = baseline_metrics.get(m.name)
+        if base is None or base["value"] == 0:
+            continue
+        change = (m.value - base["value"]) / abs(base["value"])
+        worse = -change if m.higher_is_better else change
+        if worse > tolerance:
+            regressions.append((m.name, base["value"], m.value, change))
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class EmulatorProcess:
+    """
+    Runs the emulator in its own process, so that it neither competes with the client for the GIL nor
+    shows up in the memory measurements of the client.
+    """
+
+    def __init__(self, grpc: bool = False, extra_args: list = None):
+        self.port = _free_port()
+        self.grpc_port = _free_port() if grpc else None
+        self.extra_args = extra_args or []
+        self.process = None
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        cmd = [sys.executable, "-m", "py_audio2face.emulator", "--port", str(self.port)]
+        cmd += ["--grpc-port", str(self.grpc_port)] if self.grpc_port else ["--no-grpc"]
+        env = {**os.environ, "PYTHONPATH": REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+        self.process = subprocess.Popen(cmd + self.extra_args, env=env, stdout=subprocess.DEVNULL)
+
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                if requests.get(f"{self.api_url}/status", timeout=1).json() == "OK":
+                    return self
+            except requests.RequestException:
+                time.sleep(0.05)
+        self.process.kill()
+        raise RuntimeError("emulator did not start")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.process.terminate()
+        self.process.wait(timeout=10)
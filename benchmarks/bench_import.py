@@ -0,0 +1,33 @@
+"""
+Import time of py_audio2face and construction time of a client in a fresh interpreter, as in a short lived worker
+process. Best of several runs to reduce noise.
+"""
+import os
+import subprocess
+import sys
+
+from _common import REPO_ROOT, Metric, benchmark
+
+_SNIPPET = "import time; t = time.perf_counter(); import py_audio2face; print(time.perf_counter() - t)"
+_CONSTRUCT_SNIPPET = (
+    "import time; t = time.perf_counter(); from py_audio2face import Audio2Face; Audio2Face(); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _measure(snippet: str, repeat: int) -> float:
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", snippet], env=env, capture_output=True, text=True, check=True)
+        runs.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(runs)
+
+
+@benchmark("import")
+def bench_import(config) -> list:
+    return [
+        Metric("import.seconds", _measure(_SNIPPET, config.import_repeat), "s", higher_is_better=False),
+        Metric("import.construct_seconds", _measure(_CONSTRUCT_SNIPPET, config.import_repeat), "s",
+               higher_is_better=False),
+    ]
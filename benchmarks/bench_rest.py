@@ -0,0 +1,94 @@
+"""
+Client overhead of the offline (REST) path, measured against the emulator without added latency.
+The emulator runs in a separate process, so the numbers are the cost of the client plus the loopback round trips.
+"""
+import contextlib
+import os
+import tempfile
+import tracemalloc
+
+from _common import EmulatorProcess, Metric, Timer, benchmark
+
+from py_audio2face import Audio2Face
+from py_audio2face.emulator import LatencyProfile, write_test_wav
+from py_audio2face.pool import Audio2FacePool
+
+
+def _make_clips(folder: str, count: int, seconds: float = 0.05) -> list:
+    # all clips share the same content, only the file is copied, which keeps the setup fast for 100k files
+    template = write_test_wav(os.path.join(folder, "clip_0.wav"), seconds=seconds)
+    with open(template, "rb") as f:
+        data = f.read()
+    clips = [template]
+    for i in range(1, count):
+        path = os.path.join(folder, f"clip_{i}.wav")
+        with open(path, "wb") as f:
+            f.write(data)
+        clips.append(path)
+    return clips
+
+
+@benchmark("single")
+def bench_single(config) -> list:
+    with tempfile.TemporaryDirectory() as tmp_dir, EmulatorProcess() as emulator:
+        clips = _make_clips(os.path.join(tmp_dir, "audio"), config.single_clips)
+        a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=tmp_dir)
+        a2f.init_a2f()
+
+        with Timer() as t:
+            for clip in clips:
+                a2f.audio2face_single(clip, os.path.join(tmp_dir, "out", os.path.basename(clip)), fps=30,
+                                      emotion_auto_detect=False)
+        a2f.close()
+
+    return [Metric("single.overhead_ms_per_clip", t.seconds / len(clips) * 1000, "ms", higher_is_better=False)]
+
+
+@benchmark("folder")
+def bench_folder(config) -> list:
+    metrics = []
+    for size in config.folder_sizes:
+        for batch in (False, True):
+            with tempfile.TemporaryDirectory() as tmp_dir, EmulatorProcess() as emulator:
+                input_folder = os.path.join(tmp_dir, "audio")
+                _make_clips(input_folder, size)
+                a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=tmp_dir)
+                a2f.init_a2f()
+
+                tracemalloc.start()
+                with Timer() as t:
+                    a2f.audio2face_folder(input_folder, os.path.join(tmp_dir, "out"), fps=30, batch=batch)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                a2f.close()
+
+            name = f"folder.{size}.batch" if batch else f"folder.{size}"
+            metrics.append(Metric(f"{name}.files_per_sec", size / t.seconds, "files/s", higher_is_better=True))
+            metrics.append(Metric(f"{name}.memory_peak_mb", peak / 2 ** 20, "MB", higher_is_better=False))
+    return metrics
+
+
+@benchmark("pool")
+def bench_pool(config) -> list:
+    """ Folder throughput over N emulated servers, each export takes pool_export_latency seconds on the server. """
+    metrics = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_folder = os.path.join(tmp_dir, "audio")
+        _make_clips(input_folder, config.pool_clips)
+        profile = os.path.join(tmp_dir, "latency.json")
+        LatencyProfile(routes={"A2F/Exporter/ExportBlendshapes": config.pool_export_latency}).save(profile)
+
+        for size in config.pool_sizes:
+            with contextlib.ExitStack() as stack:
+                emulators = [
+                    stack.enter_context(EmulatorProcess(extra_args=["--latency", profile])) for _ in range(size)
+                ]
+                pool = Audio2FacePool(api_urls=[e.api_url for e in emulators], a2f_install_path=tmp_dir)
+                with Timer() as t:
+                    pool.audio2face_folder(input_folder, os.path.join(tmp_dir, f"out_{size}"), fps=30)
+                pool.close()
+
+            metrics.append(Metric(
+                f"pool.{size}.files_per_sec", config.pool_clips / t.seconds, "files/s", higher_is_better=True
+            ))
+    return metrics
@@ -0,0 +1,205 @@
+"""
+Sustained throughput of stream_audio against the emulator for different chunk sizes and dtypes.
+The emulator does not play back in real time, so the numbers are the upper bound the client can push.
+"""
+import os
+import tempfile
+import tracemalloc
+
+from _common import EmulatorProcess, Metric, Timer, benchmark
+
+from py_audio2face import Audio2Face
+from py_audio2face.emulator import write_test_wav
+
+SAMPLERATE = 16000
+
+
+@benchmark("streaming")
+def bench_streaming(config) -> list:
+    import numpy as np
+
+    metrics = []
+    with EmulatorProcess(grpc=True) as emulator:
+        a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+        a2f.init_a2f(streaming=True)
+
+        for dtype in config.stream_dtypes:
+            for chunk_size in config.stream_chunk_sizes:
+                num_chunks = max(1, int(config.stream_seconds * SAMPLERATE / chunk_size))
+                chunk = np.zeros(chunk_size, dtype=dtype)
+
+                with Timer() as t:
+                    a2f.stream_audio(
+                        (chunk for _ in range(num_chunks)), samplerate=SAMPLERATE, grpc_port=emulator.grpc_port
+                    )
+
+                sent_bytes = num_chunks * chunk_size * 4  # always sent as float32
+                name = f"streaming.{dtype}.{chunk_size}"
+                metrics.append(Metric(f"{name}.bytes_per_sec", sent_bytes / t.seconds, "B/s", higher_is_better=True))
+                metrics.append(Metric(f"{name}.chunks_per_sec", num_chunks / t.seconds, "chunks/s", higher_is_better=True))
+        a2f.close()
+    return metrics
+
+
+@benchmark("preprocess")
+def bench_preprocess(config) -> list:
+    """ Audio seconds per second through A2FAudioPreprocessor, for TTS output and for already conforming input. """
+    import numpy as np
+    from py_audio2face import A2FAudioPreprocessor
+
+    rng = np.random.default_rng(0)
+    cases = {
+        # 24 kHz int16 stereo in bursts of 10 - 500 ms, resampled and rechunked to 100 ms at 16 kHz
+        "int16_stereo_24k": (24000, 2, np.int16, 16000, 1600),
+        # mono float32 at the target rate in chunks of the target size: passed through
+        "float32_mono_16k": (16000, 1, np.float32, None, None),
+    }
+    metrics = []
+    for name, (samplerate, channels, dtype, target_samplerate, chunk_size) in cases.items():
+        if dtype == np.float32:
+            chunks = [np.zeros(1600, dtype=np.float32)] * int(config.stream_seconds * 10)
+        else:
+            lengths = rng.integers(samplerate // 100, samplerate // 2, size=int(config.stream_seconds * 4))
+            chunks = [np.zeros((n, channels), dtype=dtype) for n in lengths]
+        seconds = sum(len(c) for c in chunks) / samplerate
+
+        preprocessor = A2FAudioPreprocessor(
+            samplerate, target_samplerate=target_samplerate, channels=channels, chunk_size=chunk_size
+        )
+        with Timer() as t:
+            for _ in preprocessor.stream(chunks):
+                pass
+        metrics.append(Metric(f"preprocess.{name}.realtime_factor", seconds / t.seconds, "x", higher_is_better=True))
+    return metrics
+
+
+@benchmark("stream_startup")
+def bench_stream_startup(config) -> list:
+    """ Latency of short streams, which is dominated by the channel setup unless the channel is reused. """
+    import statistics
+    import numpy as np
+
+    metrics = []
+    with EmulatorProcess(grpc=True) as emulator:
+        a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+        a2f.init_a2f(streaming=True)
+        chunk = np.zeros(1600, dtype=np.float32)
+
+        for name, reuse in (("fresh_channel", False), ("pooled_channel", True)):
+            seconds = []
+            for _ in range(20):
+                if not reuse:
+                    a2f.grpc_channels.close()
+                with Timer() as t:
+                    a2f.stream_audio((chunk for _ in range(2)), samplerate=SAMPLERATE, grpc_port=emulator.grpc_port)
+                seconds.append(t.seconds)
+            metrics.append(Metric(f"stream_startup.{name}.median_seconds", statistics.median(seconds), "s", higher_is_better=False))
+        a2f.close()
+    return metrics
+
+
+@benchmark("push_audio")
+def bench_push_audio(config) -> list:
+    """ Latency of push_audio per clip length, on the unary PushAudio path and forced onto PushAudioStream. """
+    import statistics
+    import numpy as np
+
+    metrics = []
+    with EmulatorProcess(grpc=True) as emulator:
+        a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+        a2f.init_a2f(streaming=True)
+
+        for clip_seconds in (0.3, 3.0):
+            clip = np.zeros(int(clip_seconds * SAMPLERATE), dtype=np.float32)
+            for name, max_unary_bytes in (("unary", clip.nbytes), ("stream", 0)):
+                seconds = []
+                for _ in range(20):
+                    with Timer() as t:
+                        a2f.push_audio(clip, SAMPLERATE, grpc_port=emulator.grpc_port, max_unary_bytes=max_unary_bytes)
+                    seconds.append(t.seconds)
+                metrics.append(Metric(
+                    f"push_audio.{clip_seconds}s.{name}.median_seconds", statistics.median(seconds), "s",
+                    higher_is_better=False
+                ))
+        a2f.close()
+    return metrics
+
+
+@benchmark("stream_file")
+def bench_stream_file(config) -> list:
+    """ stream_file of a long int16 wav: audio seconds per second and the memory peak, which should stay flat. """
+    metrics = []
+    with EmulatorProcess(grpc=True) as emulator, tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_test_wav(os.path.join(tmp_dir, "long.wav"), seconds=config.stream_seconds * 10)
+        a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+        a2f.init_a2f(streaming=True)
+        # the first stream imports grpc and numpy, which would dominate the memory peak
+        a2f.stream_file(write_test_wav(os.path.join(tmp_dir, "warmup.wav"), seconds=0.1), grpc_port=emulator.grpc_port)
+
+        tracemalloc.start()
+        with Timer() as t:
+            a2f.stream_file(path, grpc_port=emulator.grpc_port)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        a2f.close()
+
+    seconds = config.stream_seconds * 10
+    metrics.append(Metric("stream_file.realtime_factor", seconds / t.seconds, "x", higher_is_better=True))
+    metrics.append(Metric("stream_file.memory_peak_mb", peak / 2 ** 20, "MB", higher_is_better=False))
+    return metrics
+
+
+@benchmark("framing")
+def bench_framing(config) -> list:
+    """
+    Encoding of 20 ms chunks: protobuf request objects, as the generated stub sends them, against A2FChunkFramer.
+    And the client CPU time of 20 concurrent streams, which is dominated by the framing.
+    """
+    import asyncio
+    import time
+    import numpy as np
+    from py_audio2face import AsyncAudio2Face
+    from py_audio2face.modules._audio_processing import to_float32
+    from py_audio2face.modules._framing import A2FChunkFramer
+    from py_audio2face.modules.clients.grpc_stub import audio2face_pb2
+
+    metrics = []
+    num_chunks = int(config.stream_seconds * 50)
+    for dtype in (np.float32, np.int16):
+        chunk = np.zeros(320, dtype=dtype)
+        with Timer() as t:
+            for _ in range(num_chunks):
+                audio2face_pb2.PushAudioStreamRequest(audio_data=to_float32(chunk).tobytes()).SerializeToString()
+        metrics.append(Metric(
+            f"framing.{np.dtype(dtype).name}.protobuf.chunks_per_sec", num_chunks / t.seconds, "chunks/s",
+            higher_is_better=True
+        ))
+        framer = A2FChunkFramer()
+        with Timer() as t:
+            for _ in range(num_chunks):
+                framer.frame(chunk)
+        metrics.append(Metric(
+            f"framing.{np.dtype(dtype).name}.framer.chunks_per_sec", num_chunks / t.seconds, "chunks/s",
+            higher_is_better=True
+        ))
+
+    async def stream(chunks: int):
+        for _ in range(chunks):
+            yield np.zeros(320, dtype=np.int16)
+
+    async def stream_many(emulator, players: list, chunks: int):
+        async with AsyncAudio2Face(api_url=emulator.api_url, a2f_install_path=".") as a2f:
+            await a2f.init_a2f(streaming=True)
+            cpu = time.process_time()
+            await a2f.stream_many({p: stream(chunks) for p in players}, SAMPLERATE, grpc_port=emulator.grpc_port)
+            return time.process_time() - cpu
+
+    players = [f"/World/avatar_{i}/audio2face/PlayerStreaming" for i in range(20)]
+    with EmulatorProcess(grpc=True, extra_args=["--extra-players", *players]) as emulator:
+        cpu_seconds = asyncio.run(stream_many(emulator, players, num_chunks))
+    audio_seconds = 20 * num_chunks * 320 / SAMPLERATE
+    metrics.append(Metric(
+        "framing.stream_many_20.cpu_seconds_per_audio_second", cpu_seconds / audio_seconds, "s/s",
+        higher_is_better=False
+    ))
+    return metrics
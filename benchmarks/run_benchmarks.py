@@ -0,0 +1,84 @@
+"""
+Benchmark suite for the client side performance of py_audio2face.
+All benchmarks run against the local emulator (py_audio2face.emulator), so no GPU or Audio2Face install is needed.
+
+    # record a baseline on this machine
+    python benchmarks/run_benchmarks.py --update-baseline
+    # later: compare against it, exits with code 1 if a metric regressed more than the tolerance
+    python benchmarks/run_benchmarks.py --tolerance 0.2
+
+Baselines are machine specific json files in benchmarks/baselines/.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from _common import BENCHMARKS, find_regressions, load_baseline, save_baseline  # noqa: E402
+import bench_import  # noqa: E402,F401
+import bench_rest  # noqa: E402,F401
+import bench_streaming  # noqa: E402,F401
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument(
+        "--baseline", default=os.path.join(BENCHMARK_DIR, "baselines", f"{platform.node() or 'local'}.json"),
+        help="Baseline json file. Defaults to one file per machine."
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression, 0.25 = 25%%")
+    parser.add_argument("--output", help="Also write the results to this json file")
+    parser.add_argument("--single-clips", type=int, default=200, help="Clips for the audio2face_single benchmark")
+    parser.add_argument("--folder-sizes", type=int, nargs="+", default=[1000], help="e.g. 1000 10000 100000")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4], help="Servers in the pool")
+    parser.add_argument("--pool-clips", type=int, default=200)
+    parser.add_argument("--pool-export-latency", type=float, default=0.05, help="Seconds per emulated export")
+    parser.add_argument("--stream-seconds", type=float, default=30.0, help="Seconds of audio per stream")
+    parser.add_argument("--stream-chunk-sizes", type=int, nargs="+", default=[160, 1600, 16000])
+    parser.add_argument("--stream-dtypes", nargs="+", default=["float32", "int16", "float64"])
+    parser.add_argument("--import-repeat", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    config = parse_args(argv)
+
+    results = []
+    for name in config.only or sorted(BENCHMARKS):
+        print(f"running {name}")
+        metrics = BENCHMARKS[name](config)
+        for m in metrics:
+            print(f"  {m.name:<50} {m.value:>14.4f} {m.unit}")
+        results.extend(metrics)
+
+    if config.output:
+        with open(config.output, "w") as f:
+            json.dump({m.name: m.to_dict() for m in results}, f, indent=2, sort_keys=True)
+
+    if config.update_baseline:
+        save_baseline(config.baseline, results, machine=platform.node())
+        print(f"baseline written to {config.baseline}")
+        return 0
+
+    baseline = load_baseline(config.baseline)
+    if not baseline:
+        print(f"no baseline at {config.baseline}. Run with --update-baseline to create one.")
+        return 0
+
+    regressions = find_regressions(results, baseline, config.tolerance)
+    for name, base, current, change in regressions:
+        print(f"REGRESSION {name}: {base:.4f} -> {current:.4f} ({change:+.1%})")
+    if regressions:
+        return 1
+    print(f"no regressions beyond {config.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
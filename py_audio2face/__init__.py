@@ -1 +1,35 @@
 from py_audio2face.audio2face import Audio2Face
+from py_audio2face.pool import Audio2FacePool
+from py_audio2face.autoscaling import AutoscalingAudio2FacePool
+from py_audio2face.supervisor import A2FSupervisor
+from py_audio2face.modules.clients._transport import A2FHttpTransport
+from py_audio2face.modules._metrics import A2FMetrics
+from py_audio2face.modules.clients._launcher import A2FLauncher
+from py_audio2face.modules._cache import A2FAnimationCache
+from py_audio2face.modules.clients._grpc_channels import A2FGrpcChannelPool
+from py_audio2face.modules._streaming import A2FStreamResult
+from py_audio2face.modules._pacing import A2FStreamPacer
+from py_audio2face.modules._stream_export import A2FStreamExporter
+from py_audio2face.modules._stream_stats import A2FStreamStats
+
+# the asyncio client pulls in aiohttp and the audio preprocessing numpy. They are imported on first access,
+# so that users who don't need them don't pay for it.
+_LAZY_IMPORTS = {
+    "AsyncAudio2Face": "py_audio2face.async_audio2face",
+    "A2FAsyncHttpTransport": "py_audio2face.modules.clients._async_transport",
+    "A2FAudioPreprocessor": "py_audio2face.modules._audio_processing",
+    "A2FWavReader": "py_audio2face.modules._wav",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
@@ -0,0 +1,206 @@
+"""
+Asyncio-native version of the Audio2Face client.
+All methods of Audio2Face are available as awaitables. REST calls run on aiohttp and streaming runs on grpc.aio,
+so one event loop can drive many servers and streams concurrently without a thread per request.
+"""
+
+import asyncio
+from urllib.parse import urlparse
+
+from py_audio2face.modules.clients._async_http_client import _A2F_ASYNC_HTTP_CLIENT
+from py_audio2face.modules.clients._async_transport import A2FAsyncHttpTransport, async_http_installed
+from py_audio2face.modules.clients._launcher import A2FLauncher
+from py_audio2face.modules.clients._grpc_channels import A2FGrpcChannelPool
+from py_audio2face.modules._metrics import A2FMetrics
+from py_audio2face.modules._state import A2FServerState, _A2FServerStateMixin, track_key
+from py_audio2face.modules._manifest import A2FManifest
+from py_audio2face.modules._cache import A2FAnimationCache
+from py_audio2face.modules._export import _cache_key, _cached_export, _prepare_output_path
+from py_audio2face.modules._general import _A2FGeneralAsync
+from py_audio2face.modules._player import _A2FPlayerAsync
+from py_audio2face.modules._audio2emotion import _A2F_Audio2EmotionAsync
+from py_audio2face.modules._export import _A2FExportAsync
+from py_audio2face.modules._batch import _A2FBatchExportAsync, _plan_folder
+from py_audio2face.modules._streaming import _A2F_streamingAsync
+
+from py_audio2face import utils
+
+
+class AsyncAudio2Face(
+    _A2F_ASYNC_HTTP_CLIENT,
+    _A2FServerStateMixin,
+    _A2FGeneralAsync,
+    _A2FExportAsync,
+    _A2FBatchExportAsync,
+    _A2FPlayerAsync,
+    _A2F_Audio2EmotionAsync,
+    _A2F_streamingAsync
+):
+    def __init__(
+            self,
+            api_url="http://localhost:8011",
+            a2f_install_path: str = None,
+            output_dir: str = None,
+            transport: A2FAsyncHttpTransport = None,
+            metrics: A2FMetrics = None,
+            launcher: A2FLauncher = None,
+            cache: A2FAnimationCache = None,
+            combined_scene: bool = False,
+            grpc_channels: A2FGrpcChannelPool = None,
+            grpc_host: str = None
+    ):
+        """
+        api_url (str): The API endpoint for Audio2Face.
+        a2f_install_path (str): Path to the Audio2Face installation directory. If its tried to get it from defualt dir
+        output_dir (str): Optional output directory for generated animations.
+        transport (A2FAsyncHttpTransport): Non-blocking HTTP transport used for the REST calls.
+        metrics (A2FMetrics): Registry that records latency and errors of every call. Share one to aggregate clients.
+        launcher (A2FLauncher): Starts the headless server and detects when it is ready.
+        cache (A2FAnimationCache): Store of exported animations, shared with other clients and processes.
+        combined_scene (bool): Load one scene with the offline and the streaming instances. See Audio2Face
+        grpc_channels (A2FGrpcChannelPool): Open gRPC channels of the streaming calls. See Audio2Face
+        grpc_host (str): Host of the gRPC server of the streaming player. Defaults to the host of api_url.
+        """
+        if not async_http_installed:
+            raise ImportError(
+                "aiohttp is not installed. "
+                "Please install it via 'pip install py_audio2face[async]'"
+            )
+
+        self.api_url = api_url
+        self.transport = transport if transport is not None else A2FAsyncHttpTransport()
+        self.metrics = metrics if metrics is not None else A2FMetrics()
+        # the default installation is searched on first use, not on construction
+        self._a2f_install_path = a2f_install_path
+        self.output_dir = output_dir
+        self.combined_scene = combined_scene
+        # closed with the client only if the client created it
+        self._owns_grpc_channels = grpc_channels is None
+        self.grpc_channels = grpc_channels if grpc_channels is not None else A2FGrpcChannelPool()
+        if self.grpc_channels.metrics is None:
+            self.grpc_channels.metrics = self.metrics
+        # the streaming player runs on the machine of the REST api unless told otherwise
+        self.grpc_host = grpc_host or urlparse(api_url).hostname or "localhost"
+        self.last_stream_stats = None  # A2FStreamStats of the last call to the streaming player
+        # starts the headless server. Pass a launcher with a command to start it e.g. in a container
+        self.launcher = launcher if launcher is not None else A2FLauncher(a2f_install_path)
+        self.process_audio2face = None  # process object for audio2face from subprocess
+        # exported animations by audio content and settings. Hits skip the server completely.
+        self.cache = cache
+        if cache is not None and cache.metrics is None:
+            cache.metrics = self.metrics
+
+        # mirror of the last applied server state (scene, root path, track, A2E settings, emotion).
+        # loaded_scene is checked in init_a2f for not loading the same scene again
+        self.server_state = A2FServerState()
+        self._init_lock = None  # serializes init_a2f of concurrent tasks. Created lazily inside the event loop
+
+        # audio2emotion
+        self.a2e_settings = self.get_default_a2e_settings()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def a2f_install_path(self) -> str:
+        """ The installation given to the constructor, or the newest one in the default location. """
+        if self._a2f_install_path is None or not self._a2f_install_path.endswith("/"):
+            self._a2f_install_path = utils.resolve_audio2face_install_path(self._a2f_install_path)
+        return self._a2f_install_path
+
+    async def init_a2f(self, streaming: bool = False):
+        """
+        Starts the audio2face headless server if a2f not running.
+        Sends the arkit_resolved mark_usd_file / streaming file to the audio2face server to initialize the scene.
+        :return: the status of the server, "OK" if it runs. The scene is not loaded otherwise.
+        """
+        mark_usd_file = utils.get_mark_usd_file_path(streaming, combined=self.combined_scene)
+        if self.loaded_scene == mark_usd_file:
+            return "OK"
+
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+
+        async with self._init_lock:
+            if self.loaded_scene == mark_usd_file:
+                return "OK"
+            status = await self.start_headless_server()
+            if status == "OK":
+                await self.load_scene(mark_usd_file)
+            return status
+
+    async def audio2face_single(
+            self,
+            audio_file_path: str,
+            output_path: str,
+            fps: int = 60,
+            emotion_auto_detect: bool = True
+    ) -> str:
+        """
+        Generate the face animation from a single audio file. See Audio2Face.audio2face_single
+        return: the path of the output file
+        """
+        cache_key = _cache_key(self, fps, "usd", emotion_auto_detect, audio_file_path)
+        if cache_key is not None:
+            output_path = _prepare_output_path(output_path)
+            if _cached_export(self, cache_key, output_path, "usd"):
+                return output_path
+
+        await self.init_a2f()
+
+        await self.set_root_path(audio_file_path)
+        await self.set_track(audio_file_path)
+
+        output_path, ok = await self._export(
+            output_path=output_path, fps=fps, emotion_auto_detect=emotion_auto_detect,
+            cache_key=cache_key, check_cache=False
+        )
+        return output_path
+
+    async def audio2face_folder(
+            self,
+            input_folder: str,
+            output_folder: str,
+            fps: int = 60,
+            emotion: bool = False,
+            resume: bool = True,
+            batch: bool = False,
+            overrides: dict = None
+    ) -> list:
+        """
+        Generate the face animations from all audio files in a folder. See Audio2Face.audio2face_folder
+        The files are processed one after another, because the server holds a single track at a time.
+        :return: a list of the paths of the output files
+        """
+        await self.init_a2f()
+
+        audio_files = utils.get_files_in_dir(input_folder, [".wav", ".mp3"])
+        manifest = A2FManifest(output_folder) if resume else None
+        outputs, todo = _plan_folder(self, audio_files, output_folder, fps, emotion, manifest, overrides or {})
+
+        if batch and not emotion:
+            exported = await self._export_folder_batch(todo, fps, manifest)
+            outputs.update(exported)
+            todo = [job for job in todo if job[0] not in exported]
+
+        if todo:
+            await self.set_root_path(input_folder)
+
+        for af, outfile_name, file_fps, file_emotion, settings in todo:
+            await self.set_track(af)
+            if self.server_state.track != track_key(af):
+                print(f"SetTrack {af} failed, skipping it")
+                of, ok = outfile_name, False
+            else:
+                of, ok = await self._export(output_path=outfile_name, fps=file_fps, emotion_auto_detect=file_emotion)
+            if manifest is not None:
+                manifest.record(af, settings, of, "done" if ok else "failed")
+            outputs[af] = of
+
+        if manifest is not None:
+            manifest.compact()
+
+        return [outputs[af] for af in audio_files]
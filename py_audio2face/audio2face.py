@@ -6,14 +6,22 @@ The script includes methods to
 - Export the generated animations to the unreal engine 5 scene
 """
 
-import os
-import tqdm
+from urllib.parse import urlparse
 
 from py_audio2face.modules.clients._http_client import _A2F_HTTP_CLIENT
+from py_audio2face.modules.clients._transport import A2FHttpTransport
+from py_audio2face.modules.clients._launcher import A2FLauncher
+from py_audio2face.modules.clients._grpc_channels import A2FGrpcChannelPool
+from py_audio2face.modules._metrics import A2FMetrics
+from py_audio2face.modules._state import A2FServerState, _A2FServerStateMixin, track_key
+from py_audio2face.modules._manifest import A2FManifest
+from py_audio2face.modules._cache import A2FAnimationCache
+from py_audio2face.modules._export import _cache_key, _cached_export, _prepare_output_path
 from py_audio2face.modules._general import _A2FGeneral
 from py_audio2face.modules._player import _A2FPlayer
 from py_audio2face.modules._audio2emotion import _A2F_Audio2Emotion
 from py_audio2face.modules._export import _A2FExport
+from py_audio2face.modules._batch import _A2FBatchExport, _plan_folder
 from py_audio2face.modules._streaming import _A2F_streaming
 
 from py_audio2face import utils
@@ -21,8 +29,10 @@ from py_audio2face import utils
 
 class Audio2Face(
     _A2F_HTTP_CLIENT,
+    _A2FServerStateMixin,
     _A2FGeneral,
     _A2FExport,
+    _A2FBatchExport,
     _A2FPlayer,
     _A2F_Audio2Emotion,
     _A2F_streaming
@@ -31,44 +41,91 @@ class Audio2Face(
             self,
             api_url="http://localhost:8011",
             a2f_install_path: str = None,
-            output_dir: str = None
+            output_dir: str = None,
+            transport: A2FHttpTransport = None,
+            metrics: A2FMetrics = None,
+            launcher: A2FLauncher = None,
+            cache: A2FAnimationCache = None,
+            combined_scene: bool = False,
+            grpc_channels: A2FGrpcChannelPool = None,
+            grpc_host: str = None
     ):
         """
         api_url (str): The API endpoint for Audio2Face.
         a2f_install_path (str): Path to the Audio2Face installation directory. If its tried to get it from defualt dir
         output_dir (str): Optional output directory for generated animations.
+        transport (A2FHttpTransport): HTTP transport used for the REST calls. Configure it to change pool size,
+            timeouts and retries. If None a pooled keep-alive transport with default settings is created.
+        metrics (A2FMetrics): Registry that records latency and errors of every REST route and gRPC call.
+            Pass the same object to several clients to aggregate them. Export with metrics.to_prometheus() / to_json()
+        launcher (A2FLauncher): Starts the headless server and detects when it is ready. If None the headless script
+            of the installation is started (.bat on windows, .sh on linux) and its output goes to a rotating log.
+        cache (A2FAnimationCache): Store of exported animations. Clips that were exported before with the same audio
+            content and settings are copied from it without a request to the server.
+        combined_scene (bool): Load one scene that holds the offline and the streaming instances. Switching between
+            offline exports and streaming then doesn't reload the scene. Calls are routed to the instances of the mode.
+        grpc_channels (A2FGrpcChannelPool): Keeps the gRPC channels of the streaming calls open, so that a stream
+            doesn't wait for a connection. Configure keepalive and message size on it. Can be shared by clients.
+            For a remote player set TLS credentials, compression and min_chunk_seconds on it.
+        grpc_host (str): Host of the gRPC server of the streaming player. Defaults to the host of api_url.
         """
         self.api_url = api_url
-        if a2f_install_path is None:
-            a2f_install_path = utils.get_audio2face_install_path()
-            if a2f_install_path is None:
-                raise FileNotFoundError(
-                    "Audio2Face installation path is not provided and not found in the registry. "
-                    "Install Audio2Face and provide the installation path manually."
-                )
-        if a2f_install_path[-1] != "/":
-            a2f_install_path += "/"
-
-        self.a2f_install_path = a2f_install_path
+        self.transport = transport if transport is not None else A2FHttpTransport()
+        self.metrics = metrics if metrics is not None else A2FMetrics()
+        # the default installation is searched on first use, not on construction
+        self._a2f_install_path = a2f_install_path
         self.output_dir = output_dir
+        self.combined_scene = combined_scene
+        # closed with the client only if the client created it
+        self._owns_grpc_channels = grpc_channels is None
+        self.grpc_channels = grpc_channels if grpc_channels is not None else A2FGrpcChannelPool()
+        if self.grpc_channels.metrics is None:
+            self.grpc_channels.metrics = self.metrics
+        # the streaming player runs on the machine of the REST api unless told otherwise
+        self.grpc_host = grpc_host or urlparse(api_url).hostname or "localhost"
+        self.last_stream_stats = None  # A2FStreamStats of the last call to the streaming player
+        # starts the headless server. Pass a launcher with a command to start it e.g. in a container
+        self.launcher = launcher if launcher is not None else A2FLauncher(a2f_install_path)
         self.process_audio2face = None  # process object for audio2face from subprocess
+        # exported animations by audio content and settings. Hits skip the server completely.
+        self.cache = cache
+        if cache is not None and cache.metrics is None:
+            cache.metrics = self.metrics
 
-        self.loaded_scene = None  # the current loaded scene. Checked in init_a2f for not loading the same scene again
+        # mirror of the last applied server state (scene, root path, track, A2E settings, emotion).
+        # loaded_scene is checked in init_a2f for not loading the same scene again
+        self.server_state = A2FServerState()
 
         # audio2emotion
         self.a2e_settings = self.get_default_a2e_settings()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def a2f_install_path(self) -> str:
+        """ The installation given to the constructor, or the newest one in the default location. """
+        if self._a2f_install_path is None or not self._a2f_install_path.endswith("/"):
+            self._a2f_install_path = utils.resolve_audio2face_install_path(self._a2f_install_path)
+        return self._a2f_install_path
+
     def init_a2f(self, streaming: bool = False):
         """
         Starts the audio2face headless server if a2f not running.
         Sends the arkit_resolved mark_usd_file / streaming file to the audio2face server to initialize the scene.
+        :return: the status of the server, "OK" if it runs. The scene is not loaded otherwise.
         """
-        mark_usd_file = utils.get_mark_usd_file_path(streaming)
+        mark_usd_file = utils.get_mark_usd_file_path(streaming, combined=self.combined_scene)
         if self.loaded_scene == mark_usd_file:
-            return
+            return "OK"
 
-        self.start_headless_server()
-        self.load_scene(mark_usd_file)
+        status = self.start_headless_server()
+        if status == "OK":
+            self.load_scene(mark_usd_file)
+        return status
 
     def audio2face_single(
             self,
@@ -86,40 +143,81 @@ class Audio2Face(
             default settings, use the set_emotion method.
         return: the path of the output file
         """
+        cache_key = _cache_key(self, fps, "usd", emotion_auto_detect, audio_file_path)
+        if cache_key is not None:
+            output_path = _prepare_output_path(output_path)
+            if _cached_export(self, cache_key, output_path, "usd"):
+                return output_path
+
         self.init_a2f()
 
         self.set_root_path(audio_file_path)
         self.set_track(audio_file_path)
 
-        return self.export(output_path=output_path, fps=fps, emotion_auto_detect=emotion_auto_detect)
+        output_path, ok = self._export(
+            output_path=output_path, fps=fps, emotion_auto_detect=emotion_auto_detect,
+            cache_key=cache_key, check_cache=False
+        )
+        return output_path
 
-    def audio2face_folder(self, input_folder: str, output_folder: str, fps: int = 60, emotion: bool = False) -> list:
+    def audio2face_folder(
+            self,
+            input_folder: str,
+            output_folder: str,
+            fps: int = 60,
+            emotion: bool = False,
+            resume: bool = True,
+            batch: bool = False,
+            overrides: dict = None
+    ) -> list:
         """
         Generate the face animations from all audio files in a folder.
         input_folder (str): Path to the folder containing the audio files.
         output_folder (str): Path to the output folder for the animations.
         fps (int): Frames per second of the output animations.
         emotion_auto_detect (bool): Whether to generate emotion_auto_detect keys from the audio files.
+        resume (bool): Keep a manifest in the output folder and skip files that were already converted with the same
+            content and settings. Only new, changed and failed files are processed.
+        batch (bool): Export the files with one call of the batch exporter of the server instead of a SetTrack and
+            ExportBlendshapes per file. Files with emotion keys or overrides, and files the batch export missed,
+            are exported one by one.
+        overrides (dict): Settings of single files by file name, e.g. {"intro.wav": {"fps": 30, "emotion": True}}
         :return: a list of the paths of the output files
         """
         self.init_a2f()
 
-        self.set_root_path(input_folder)
-
         audio_files = utils.get_files_in_dir(input_folder, [".wav", ".mp3"])
+        manifest = A2FManifest(output_folder) if resume else None
+        outputs, todo = _plan_folder(self, audio_files, output_folder, fps, emotion, manifest, overrides or {})
+        skipped = len(outputs)
 
-        # iterate and convert files
-        audio_files_tqdm = tqdm.tqdm(audio_files)
-        output_files = []
-        for af in audio_files_tqdm:
-            audio_files_tqdm.set_description(f"Processing {af}")
-            self.set_track(af)
-
-            # outfile name will be base file name of af_a2f_animation
-            outfile_name, ext = os.path.basename(af).rsplit(".", 1)
-            outfile_name = f"{output_folder}/{outfile_name}_a2f_animation"
+        if batch and not emotion:
+            exported = self._export_folder_batch(todo, fps, manifest)
+            outputs.update(exported)
+            todo = [job for job in todo if job[0] not in exported]
 
-            of = self.export(output_path=outfile_name, fps=fps, emotion_auto_detect=emotion)
-            output_files.append(of)
+        if todo:
+            self.set_root_path(input_folder)
 
-        return output_files
\ No newline at end of file
+        # iterate and convert files
+        import tqdm  # only needed for the progress bar
+        todo_tqdm = tqdm.tqdm(todo)
+        for af, outfile_name, file_fps, file_emotion, settings in todo_tqdm:
+            todo_tqdm.set_description(f"Processing {af}")
+            self.set_track(af)
+            if self.server_state.track != track_key(af):
+                # exporting now would export the previous track
+                print(f"SetTrack {af} failed, skipping it")
+                of, ok = outfile_name, False
+            else:
+                of, ok = self._export(output_path=outfile_name, fps=file_fps, emotion_auto_detect=file_emotion)
+            if manifest is not None:
+                manifest.record(af, settings, of, "done" if ok else "failed")
+            outputs[af] = of
+
+        if manifest is not None:
+            manifest.compact()
+            if skipped:
+                print(f"skipped {skipped} of {len(audio_files)} files that are up to date")
+
+        return [outputs[af] for af in audio_files]
@@ -0,0 +1,197 @@
+"""
+Audio2FacePool that starts and stops headless servers depending on the load.
+A minimum of servers is kept warm, with the scene already loaded, so that a burst of clips doesn't wait for a cold
+start. Extra servers are started when the queue gets long or clips wait too long, and retired when they were idle
+for a while, so that idle GPUs are given back.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.modules._metrics import A2FMetrics
+from py_audio2face.pool import Audio2FacePool
+
+
+def warm_up(client: Audio2Face, streaming: bool = False) -> bool:
+    """ Starts the server of the client and loads the default scene. :return: False if the server didn't start """
+    return client.init_a2f(streaming=streaming) == "OK"
+
+
+def _shutdown_client(client: Audio2Face):
+    if client.process_audio2face is not None:
+        client.shutdown_a2f()
+    client.close()
+
+
+class AutoscalingAudio2FacePool(Audio2FacePool):
+    def __init__(
+            self,
+            client_factory: Callable[[int, A2FMetrics], Audio2Face],
+            min_servers: int = 1,
+            max_servers: int = 4,
+            scale_up_queue_depth: int = 4,
+            scale_up_wait: float = 10.0,
+            idle_cooldown: float = 300.0,
+            check_interval: float = 1.0,
+            streaming: bool = False,
+            metrics: A2FMetrics = None,
+            **pool_kwargs
+    ):
+        """
+        :param client_factory: creates the client of the n-th server, e.g. with a launcher for port 8011 + n.
+            Indices of retired servers are reused, so a factory can map them to a fixed set of ports or GPUs.
+            It gets the metrics of the pool as second argument. Pass them to the client, all servers report to them.
+        :param min_servers: servers that are kept warm, also when idle.
+        :param max_servers: upper limit of servers.
+        :param scale_up_queue_depth: start a server when more clips than this are queued per server.
+        :param scale_up_wait: start a server when a queued clip waits longer than this many seconds.
+        :param idle_cooldown: seconds without a clip after which a server above min_servers is retired.
+        :param check_interval: seconds between two scaling decisions.
+        :param streaming: warm up with the streaming scene instead of the default scene.
+        :param pool_kwargs: max_failures, max_attempts, eviction_cooldown of Audio2FacePool.
+        """
+        if not 1 <= min_servers <= max_servers:
+            raise ValueError("Needs 1 <= min_servers <= max_servers")
+
+        self.client_factory = client_factory
+        self.min_servers = min_servers
+        self.max_servers = max_servers
+        self.scale_up_queue_depth = scale_up_queue_depth
+        self.scale_up_wait = scale_up_wait
+        self.idle_cooldown = idle_cooldown
+        self.check_interval = check_interval
+        self.streaming = streaming
+
+        self.decisions = deque(maxlen=1000)  # (timestamp, action, reason, servers after the decision)
+        self._used_indices = set()  # indices passed to the factory of running or starting servers
+        self._client_index = {}  # client -> index
+        self._starting = 0  # servers that are warming up
+
+        metrics = metrics if metrics is not None else A2FMetrics()
+        # the minimum is started in parallel, a cold start takes tens of seconds
+        self._used_indices.update(range(min_servers))
+        with ThreadPoolExecutor(max_workers=min_servers) as executor:
+            clients = list(executor.map(lambda i: self._start_client(i, metrics), range(min_servers)))
+        if None in clients:
+            for client in clients:
+                if client is not None:
+                    _shutdown_client(client)
+            raise RuntimeError(f"Could not start {clients.count(None)} of {min_servers} audio2face servers")
+        self._client_index.update((client, index) for index, client in enumerate(clients))
+
+        super().__init__(clients=clients, metrics=metrics, **pool_kwargs)
+        self._log_decision("start", f"min_servers={min_servers}")
+
+        self._scaler = threading.Thread(target=self._run_scaler, name="a2f-autoscaler", daemon=True)
+        self._scaler.start()
+
+    def _start_client(self, index: int, metrics: A2FMetrics):
+        client = self.client_factory(index, metrics)
+        start = time.perf_counter()
+        if not warm_up(client, streaming=self.streaming):
+            print(f"autoscaler: server {index} ({client.api_url}) did not start")
+            metrics.inc("autoscale_failed_starts")
+            return None
+        metrics.observe("autoscale/warm_up", time.perf_counter() - start)
+        return client
+
+    def _reserve_index(self) -> int:
+        index = min(i for i in range(len(self._used_indices) + 1) if i not in self._used_indices)
+        self._used_indices.add(index)
+        return index
+
+    def _log_decision(self, action: str, reason: str):
+        servers = len(self._workers)
+        self.decisions.append((time.time(), action, reason, servers))
+        print(f"autoscaler: {action} ({reason}), servers {servers}, starting {self._starting}")
+        self.metrics.set_gauge("autoscale_servers", servers)
+        self.metrics.set_gauge("autoscale_starting_servers", self._starting)
+
+    # decisions
+
+    def _scale_up_reason(self):
+        """ Why a server should be started, None if not. Caller holds the lock. """
+        if len(self._workers) + self._starting >= self.max_servers:
+            return None
+        servers = len(self._healthy_workers()) + self._starting
+        depth = self.queue_depth
+        if depth > self.scale_up_queue_depth * max(servers, 1):
+            return f"queue depth {depth} > {self.scale_up_queue_depth} per server"
+        wait = self.oldest_wait
+        # a server that is warming up will take the waiting clips, don't start another one for them
+        if self._starting == 0 and wait > self.scale_up_wait:
+            return f"clip waiting {wait:.1f}s > {self.scale_up_wait}s"
+        return None
+
+    def _idle_worker(self):
+        """ A server above min_servers that was idle for idle_cooldown. Caller holds the lock. """
+        if len(self._workers) <= self.min_servers or self.queue_depth > 0:
+            return None
+        now = time.monotonic()
+        idle = [w for w in self._workers if w.load == 0 and now - w.last_active >= self.idle_cooldown]
+        # retire the least recently used one first
+        return min(idle, key=lambda w: w.last_active, default=None)
+
+    def _run_scaler(self):
+        while True:
+            with self._cond:
+                self._cond.wait(self.check_interval)
+                if self._closed:
+                    return
+                reason = self._scale_up_reason()
+                if reason is not None:
+                    self._starting += 1
+                    index = self._reserve_index()
+                    self.metrics.inc("autoscale_scale_ups")
+                    self._log_decision("scale up", reason)
+                    idle = None
+                else:
+                    idle = self._idle_worker()
+                    if idle is not None:
+                        self._retire_worker(idle)
+                        self.metrics.inc("autoscale_scale_downs")
+                        self._log_decision("scale down", f"{idle.client.api_url} idle for {self.idle_cooldown}s")
+
+            if reason is not None:
+                # warms up in the background, the queue keeps being served meanwhile
+                threading.Thread(target=self._add_server, args=(index,), daemon=True).start()
+            elif idle is not None:
+                self._stop_client(idle.client)
+
+    def _add_server(self, index: int):
+        client = self._start_client(index, self.metrics)
+        with self._cond:
+            self._starting -= 1
+            if client is None:
+                self._used_indices.discard(index)
+                self._log_decision("start failed", f"server {index}")
+                return
+            self._client_index[client] = index
+            closed = self._closed
+        if closed:
+            self._stop_client(client)
+            return
+
+        self._add_worker(client)
+        with self._cond:
+            self._log_decision("server ready", client.api_url)
+
+    def _stop_client(self, client: Audio2Face):
+        with self._cond:
+            self._used_indices.discard(self._client_index.pop(client, None))
+        _shutdown_client(client)
+
+    def close(self, wait: bool = True, cancel_pending: bool = False, shutdown_servers: bool = True):
+        """
+        :param shutdown_servers: stop the headless servers that were started by the pool.
+        """
+        super().close(wait=wait, cancel_pending=cancel_pending)
+        if wait:
+            self._scaler.join()
+        if shutdown_servers:
+            for client in self.clients:
+                self._stop_client(client)
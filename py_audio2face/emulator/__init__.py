@@ -0,0 +1,10 @@
+"""
+Local stand-in for the Audio2Face headless server for offline testing and benchmarking.
+    with A2FEmulator(grpc_port=0) as emulator:
+        a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+        a2f.audio2face_single("voice.wav", "out/voice_animation", fps=30)
+"""
+from py_audio2face.emulator._emulator import A2FEmulator
+from py_audio2face.emulator._latency import LatencyProfile
+from py_audio2face.emulator._rest import EmulatorState
+from py_audio2face.emulator._audio import write_test_wav
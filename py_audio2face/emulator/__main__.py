@@ -0,0 +1,44 @@
+"""
+Run the emulator from the command line:
+    python -m py_audio2face.emulator --port 8011 --grpc-port 50051 --latency recorded_profile.json
+"""
+import argparse
+import time
+
+from py_audio2face.emulator import A2FEmulator, LatencyProfile
+from py_audio2face.settings import DEFAULT_AUDIO_STREAM_GRPC_PORT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Audio2Face headless server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--grpc-port", type=int, default=DEFAULT_AUDIO_STREAM_GRPC_PORT)
+    parser.add_argument("--no-grpc", action="store_true", help="Serve only the REST api")
+    parser.add_argument("--latency", help="Path to a LatencyProfile json file")
+    parser.add_argument("--realtime", action="store_true", help="Blocking streams take as long as the audio")
+    parser.add_argument("--extra-players", nargs="+", default=[], help="More streaming players, e.g. per avatar")
+    args = parser.parse_args()
+
+    latency = LatencyProfile.load(args.latency) if args.latency else None
+    emulator = A2FEmulator(
+        host=args.host,
+        port=args.port,
+        grpc_port=None if args.no_grpc else args.grpc_port,
+        latency=latency,
+        realtime_streaming=args.realtime,
+        extra_players=args.extra_players
+    )
+    with emulator:
+        print(f"audio2face emulator running on {emulator.api_url}, grpc port {emulator.grpc_port}")
+        # same line as the kit log of the real server, so that A2FLauncher detects readiness
+        print("app ready", flush=True)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
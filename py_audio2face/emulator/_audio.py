@@ -0,0 +1,18 @@
+import math
+import os
+from array import array
+import wave
+
+
+def write_test_wav(path: str, seconds: float = 0.5, samplerate: int = 16000, frequency: float = 220.0):
+    """ Write a mono 16 bit sine wav. Used by the tests and benchmarks to create input files. """
+    samples = array("h", (
+        int(8000 * math.sin(2 * math.pi * frequency * i / samplerate)) for i in range(int(seconds * samplerate))
+    ))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(samplerate)
+        w.writeframes(samples.tobytes())
+    return path
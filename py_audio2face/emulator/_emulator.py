@@ -0,0 +1,78 @@
+import threading
+
+from py_audio2face.emulator._latency import LatencyProfile
+from py_audio2face.emulator._rest import EmulatorState, make_rest_server
+
+
+class A2FEmulator:
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            grpc_port: int = None,
+            latency: LatencyProfile = None,
+            realtime_streaming: bool = False,
+            extra_players: list = None,
+            grpc_credentials=None
+    ):
+        """
+        Local stand-in for the Audio2Face headless server. Serves the REST routes used by py_audio2face and,
+        if grpc is installed and grpc_port is given, the PushAudio / PushAudioStream api of the streaming player.
+        Exports are written as plausible json / usda files, so pipelines can be tested without a GPU.
+        :param host: Interface to bind.
+        :param port: REST port. 0 picks a free port, read it from emulator.port after start().
+        :param grpc_port: gRPC port. None disables the gRPC server, 0 picks a free port.
+        :param latency: Per route latency profile. Defaults to no added latency.
+        :param realtime_streaming: If True, streams with block_until_playback_is_finished take as long as the audio.
+        :param extra_players: Prim paths of more streaming players, like in a scene with several avatars.
+        :param grpc_credentials: grpc.ServerCredentials of the gRPC port, e.g. to test TLS. None serves insecure.
+        """
+        self.host = host
+        self.port = port
+        self.grpc_port = grpc_port
+        self.latency = latency if latency is not None else LatencyProfile()
+        self.realtime_streaming = realtime_streaming
+        self.grpc_credentials = grpc_credentials
+        self.state = EmulatorState()
+        self.state.extra_players = list(extra_players or [])
+
+        self._rest_server = None
+        self._rest_thread = None
+        self._grpc_server = None
+
+    @property
+    def api_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._rest_server = make_rest_server(self.host, self.port, self.state, self.latency)
+        self.port = self._rest_server.server_address[1]
+        self._rest_thread = threading.Thread(
+            target=self._rest_server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._rest_thread.start()
+
+        if self.grpc_port is not None:
+            from py_audio2face.emulator._grpc import EmulatorServicer, make_grpc_server
+            servicer = EmulatorServicer(self.state, self.latency, realtime=self.realtime_streaming)
+            self._grpc_server, self.grpc_port = make_grpc_server(
+                self.host, self.grpc_port, servicer, credentials=self.grpc_credentials
+            )
+            self._grpc_server.start()
+
+        return self
+
+    def stop(self):
+        if self._rest_server is not None:
+            self._rest_server.shutdown()
+            self._rest_server.server_close()
+            self._rest_server = None
+        if self._grpc_server is not None:
+            self._grpc_server.stop(grace=None)
+            self._grpc_server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
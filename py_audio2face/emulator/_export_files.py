@@ -0,0 +1,110 @@
+"""
+Writes plausible blendshape animation files for the emulated exporter.
+The json layout follows the Audio2Face blendshape json export. The jaw follows the loudness of the audio,
+so the files have the size and shape of real exports without needing a GPU.
+"""
+import json
+import math
+import os
+import wave
+from array import array
+
+ARKIT_BLENDSHAPES = [
+    "eyeBlinkLeft", "eyeLookDownLeft", "eyeLookInLeft", "eyeLookOutLeft", "eyeLookUpLeft", "eyeSquintLeft",
+    "eyeWideLeft", "eyeBlinkRight", "eyeLookDownRight", "eyeLookInRight", "eyeLookOutRight", "eyeLookUpRight",
+    "eyeSquintRight", "eyeWideRight", "jawForward", "jawLeft", "jawRight", "jawOpen", "mouthClose",
+    "mouthFunnel", "mouthPucker", "mouthLeft", "mouthRight", "mouthSmileLeft", "mouthSmileRight",
+    "mouthFrownLeft", "mouthFrownRight", "mouthDimpleLeft", "mouthDimpleRight", "mouthStretchLeft",
+    "mouthStretchRight", "mouthRollLower", "mouthRollUpper", "mouthShrugLower", "mouthShrugUpper",
+    "mouthPressLeft", "mouthPressRight", "mouthLowerDownLeft", "mouthLowerDownRight", "mouthUpperUpLeft",
+    "mouthUpperUpRight", "browDownLeft", "browDownRight", "browInnerUp", "browOuterUpLeft", "browOuterUpRight",
+    "cheekPuff", "cheekSquintLeft", "cheekSquintRight", "noseSneerLeft", "noseSneerRight", "tongueOut"
+]
+_JAW_OPEN = ARKIT_BLENDSHAPES.index("jawOpen")
+_MOUTH_FUNNEL = ARKIT_BLENDSHAPES.index("mouthFunnel")
+
+
+def audio_duration(audio_path: str) -> float:
+    """ Duration of a wav file in seconds. Other formats are estimated from the file size. """
+    try:
+        with wave.open(audio_path, "rb") as w:
+            return w.getnframes() / float(w.getframerate())
+    except (wave.Error, EOFError):
+        # rough estimate for compressed audio with 128 kbit/s
+        return os.path.getsize(audio_path) / 16000.0
+
+
+def _loudness_per_frame(audio_path: str, num_frames: int) -> list:
+    try:
+        with wave.open(audio_path, "rb") as w:
+            if w.getsampwidth() != 2 or w.getnframes() == 0:
+                return [0.0] * num_frames
+            samples = array("h", w.readframes(w.getnframes()))
+    except (wave.Error, EOFError):
+        return [0.0] * num_frames
+
+    per_frame = max(1, len(samples) // max(1, num_frames))
+    loudness = []
+    for i in range(num_frames):
+        window = samples[i * per_frame:(i + 1) * per_frame:16]  # subsample, a rough envelope is enough
+        if len(window) == 0:
+            loudness.append(0.0)
+            continue
+        rms = math.sqrt(sum(s * s for s in window) / len(window)) / 32768.0
+        loudness.append(min(1.0, rms * 4))
+    return loudness
+
+
+def blendshape_weights(audio_path: str, fps: int) -> list:
+    duration = audio_duration(audio_path)
+    num_frames = max(1, int(math.ceil(duration * fps)))
+    weights = []
+    for frame, loudness in enumerate(_loudness_per_frame(audio_path, num_frames)):
+        row = [0.0] * len(ARKIT_BLENDSHAPES)
+        row[_JAW_OPEN] = round(loudness, 4)
+        row[_MOUTH_FUNNEL] = round(loudness * 0.3, 4)
+        weights.append(row)
+    return weights
+
+
+def write_export_file(file_path: str, audio_path: str, fps: int, format: str = "usd"):
+    write_weights_file(file_path, blendshape_weights(audio_path, fps), fps, format, track_path=audio_path)
+
+
+def write_weights_file(file_path: str, weights: list, fps: int, format: str = "usd", track_path: str = ""):
+    """ Writes rows of blendshape weights like the exporter does """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+    if format == "json":
+        content = json.dumps({
+            "exportFps": fps,
+            "trackPath": track_path,
+            "numPoses": len(ARKIT_BLENDSHAPES),
+            "numFrames": len(weights),
+            "facsNames": ARKIT_BLENDSHAPES,
+            "weightMat": weights
+        })
+    else:
+        names = ", ".join(f'"{n}"' for n in ARKIT_BLENDSHAPES)
+        samples = ",\n".join(f"            {i}: {row}" for i, row in enumerate(weights))
+        content = (
+            "#usda 1.0\n"
+            "(\n"
+            f"    endTimeCode = {len(weights) - 1}\n"
+            f"    framesPerSecond = {fps}\n"
+            "    startTimeCode = 0\n"
+            f"    timeCodesPerSecond = {fps}\n"
+            ")\n\n"
+            'def SkelAnimation "a2f_animation"\n'
+            "{\n"
+            f"    uniform token[] blendShapes = [{names}]\n"
+            "    float[] blendShapeWeights.timeSamples = {\n"
+            f"{samples}\n"
+            "    }\n"
+            "}\n"
+        )
+
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, file_path)
@@ -0,0 +1,109 @@
+import time
+
+import grpc
+
+from py_audio2face.modules.clients.grpc_stub import audio2face_pb2, audio2face_pb2_grpc
+
+_FLOAT32_BYTES = 4
+
+
+class EmulatorServicer(audio2face_pb2_grpc.Audio2FaceServicer):
+    """
+    Implementation of PushAudio and PushAudioStream that consumes the audio like the streaming player.
+    :param state: EmulatorState that records the received streams.
+    :param latency: LatencyProfile, sampled once per call for the routes "PushAudio" and "PushAudioStream".
+    :param realtime: If True, calls with block_until_playback_is_finished wait for the duration of the audio.
+    """
+
+    def __init__(self, state, latency, realtime: bool = False):
+        self.state = state
+        self.latency = latency
+        self.realtime = realtime
+
+    def _unknown_instance(self, instance_name: str):
+        """ Error message if the loaded scene has no such player. Without a scene every instance is accepted. """
+        instances = self.state.player_instances()
+        if self.state.scene is not None and instance_name not in instances:
+            return f"{instance_name} is not a player of the scene. Players: {instances}"
+        return None
+
+    def _finish(self, route: str, instance_name: str, samplerate: int, num_bytes: int, num_chunks: int,
+                block: bool, started: float):
+        duration = num_bytes / _FLOAT32_BYTES / samplerate if samplerate > 0 else 0.0
+        with self.state.lock:
+            self.state.requests[route] += 1
+            self.state.streams.append({
+                "route": route,
+                "instance_name": instance_name,
+                "samplerate": samplerate,
+                "bytes": num_bytes,
+                "chunks": num_chunks,
+                "audio_seconds": duration,
+            })
+
+        self.latency.wait(route)
+        if self.realtime and block:
+            remaining = duration - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def PushAudio(self, request, context):
+        started = time.perf_counter()
+        if not request.instance_name or request.samplerate <= 0:
+            return audio2face_pb2.PushAudioResponse(success=False, message="instance_name and samplerate required")
+        message = self._unknown_instance(request.instance_name)
+        if message is not None:
+            return audio2face_pb2.PushAudioResponse(success=False, message=message)
+
+        with self.state.lock:
+            self.state.streamed_seconds = len(request.audio_data) / _FLOAT32_BYTES / request.samplerate
+        self._finish(
+            "PushAudio", request.instance_name, request.samplerate, len(request.audio_data), 1,
+            request.block_until_playback_is_finished, started
+        )
+        return audio2face_pb2.PushAudioResponse(success=True, message="")
+
+    def PushAudioStream(self, request_iterator, context):
+        started = time.perf_counter()
+        first = next(request_iterator, None)
+        if first is None or not first.HasField("start_marker"):
+            return audio2face_pb2.PushAudioStreamResponse(
+                success=False, message="First message must contain start data"
+            )
+
+        start_marker = first.start_marker
+        message = self._unknown_instance(start_marker.instance_name)
+        if message is not None:
+            return audio2face_pb2.PushAudioStreamResponse(success=False, message=message)
+        num_bytes = num_chunks = 0
+        samplerate = max(1, start_marker.samplerate)
+        with self.state.lock:
+            self.state.streamed_seconds = 0.0
+        for request in request_iterator:
+            if request.HasField("start_marker"):
+                return audio2face_pb2.PushAudioStreamResponse(
+                    success=False, message="Start marker must be sent only once"
+                )
+            num_bytes += len(request.audio_data)
+            num_chunks += 1
+            with self.state.lock:
+                self.state.streamed_seconds += len(request.audio_data) / _FLOAT32_BYTES / samplerate
+
+        self._finish(
+            "PushAudioStream", start_marker.instance_name, start_marker.samplerate, num_bytes, num_chunks,
+            start_marker.block_until_playback_is_finished, started
+        )
+        return audio2face_pb2.PushAudioStreamResponse(success=True, message="")
+
+
+def make_grpc_server(host: str, port: int, servicer: EmulatorServicer, max_workers: int = 16, credentials=None):
+    """ Returns the server and the bound port. Port 0 picks a free port. credentials secure the port. """
+    from concurrent import futures
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    audio2face_pb2_grpc.add_Audio2FaceServicer_to_server(servicer, server)
+    if credentials is not None:
+        bound_port = server.add_secure_port(f"{host}:{port}", credentials)
+    else:
+        bound_port = server.add_insecure_port(f"{host}:{port}")
+    return server, bound_port
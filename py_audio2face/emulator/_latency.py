@@ -0,0 +1,58 @@
+import json
+import random
+import time
+
+
+class LatencyProfile:
+    """
+    Per-route latency of the emulated server.
+    A route spec is one of
+        - a number: constant latency in seconds
+        - a dict {"mean": s, "jitter": s}: uniformly distributed in [mean - jitter, mean + jitter]
+        - a list of seconds: recorded latencies that are replayed in random order
+    Routes without spec use the default spec. gRPC calls use the routes "PushAudio" and "PushAudioStream".
+    """
+
+    def __init__(self, routes: dict = None, default=0.0, seed: int = None):
+        self.routes = dict(routes or {})
+        self.default = default
+        self._random = random.Random(seed)
+
+    def sample(self, route: str) -> float:
+        spec = self.routes.get(route, self.default)
+        if isinstance(spec, (int, float)):
+            return float(spec)
+        if isinstance(spec, dict):
+            mean, jitter = spec.get("mean", 0.0), spec.get("jitter", 0.0)
+            return max(0.0, self._random.uniform(mean - jitter, mean + jitter))
+        if isinstance(spec, (list, tuple)) and len(spec) > 0:
+            return float(self._random.choice(spec))
+        return 0.0
+
+    def wait(self, route: str):
+        seconds = self.sample(route)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    @classmethod
+    def from_metrics(cls, metrics, default=0.0, seed: int = None):
+        """
+        Replay the latencies that an A2FMetrics registry recorded against a real server.
+        Run a workload with the real server, then build the profile from a2f.metrics.
+        """
+        with metrics._lock:
+            routes = {route: list(series.samples) for route, series in metrics.latencies.items() if series.samples}
+        return cls(routes=routes, default=default, seed=seed)
+
+    def to_dict(self) -> dict:
+        return {"default": self.default, "routes": self.routes}
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, seed: int = None):
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(routes=data.get("routes"), default=data.get("default", 0.0), seed=seed)
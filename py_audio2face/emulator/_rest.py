@@ -0,0 +1,246 @@
+import json
+import math
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from py_audio2face.settings import (
+    DEFAULT_A2E_INSTANCE, DEFAULT_PLAYER_INSTANCE, DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, COMBINED_SCENE_FILE_NAME,
+    COMBINED_SCENE_STREAMING_ROOT
+)
+from py_audio2face.utils import get_export_file_path, get_files_in_dir, get_scene_instance
+from py_audio2face.emulator._export_files import ARKIT_BLENDSHAPES, write_export_file, write_weights_file
+
+EMOTION_NAMES = [
+    "amazement", "anger", "cheekiness", "disgust", "fear", "grief", "joy", "outofbreath", "pain", "sadness"
+]
+
+
+def _ok(result=None, message="Succeeded"):
+    return 200, {"status": "OK", "result": result, "message": message}
+
+
+def _error(message):
+    return 200, {"status": "ERROR", "message": message}
+
+
+class EmulatorState:
+    """ What the emulated server holds. Inspect it in tests to check what the client did. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.scene = None
+        self.root_path = None
+        self.track = None
+        self.frame = 0
+        self.a2e_settings = {}
+        self.emotion = [0.0] * len(EMOTION_NAMES)
+        self.auto_generate_emotion = False
+        self.exported_files = []
+        self.requests = Counter()  # requests per route, including grpc calls
+        self.streams = []  # one dict per received audio push
+        self.extra_players = []  # players of more avatars, in every loaded scene
+        self.streamed_seconds = 0.0  # audio of the current or last stream, grows with every received chunk
+
+    def player_instances(self) -> list:
+        if self.scene is None:
+            return []
+        if os.path.basename(self.scene) == COMBINED_SCENE_FILE_NAME:
+            return [
+                DEFAULT_PLAYER_INSTANCE,
+                get_scene_instance(DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, streaming=True, combined=True)
+            ] + self.extra_players
+        if "streaming" in os.path.basename(self.scene):
+            return [DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE] + self.extra_players
+        return [DEFAULT_PLAYER_INSTANCE] + self.extra_players
+
+    def is_streaming_solver(self, solver_node: str) -> bool:
+        """ If the solver animates the streamed audio instead of the track of the regular player """
+        if self.scene is None:
+            return False
+        if os.path.basename(self.scene) == COMBINED_SCENE_FILE_NAME:
+            return (solver_node or "").startswith(COMBINED_SCENE_STREAMING_ROOT + "/")
+        return "streaming" in os.path.basename(self.scene)
+
+    def fullface_instances(self) -> list:
+        if self.scene is None:
+            return []
+        if os.path.basename(self.scene) == COMBINED_SCENE_FILE_NAME:
+            return [DEFAULT_A2E_INSTANCE, get_scene_instance(DEFAULT_A2E_INSTANCE, streaming=True, combined=True)]
+        return [DEFAULT_A2E_INSTANCE]
+
+
+class _RestRoutes:
+    """ Implementation of the REST routes used by py_audio2face. Each method returns (http status, json body). """
+
+    def __init__(self, state: EmulatorState):
+        self.state = state
+
+    def status(self, payload):
+        return 200, "OK"
+
+    def get_instances(self, payload):
+        return _ok({
+            "fullface_instances": self.state.fullface_instances(),
+            "regular_instances": [],
+            "player_instances": self.state.player_instances()
+        })
+
+    def usd_load(self, payload):
+        file_name = payload.get("file_name", "")
+        if not os.path.isfile(file_name):
+            return _error(f"USD file {file_name} doesn't exist")
+        self.state.scene = file_name
+        self.state.root_path = self.state.track = None
+        return _ok()
+
+    def set_root_path(self, payload):
+        dir_path = payload.get("dir_path", "")
+        if not os.path.isdir(dir_path):
+            return _error(f"Directory {dir_path} doesn't exist")
+        self.state.root_path = dir_path
+        self.state.track = None
+        return _ok()
+
+    def set_track(self, payload):
+        if self.state.root_path is None:
+            return _error("Root path is not set")
+        track = os.path.join(self.state.root_path, payload.get("file_name", ""))
+        if not os.path.isfile(track):
+            return _error(f"Track {track} doesn't exist")
+        self.state.track = track
+        return _ok()
+
+    def set_frame(self, payload):
+        self.state.frame = payload.get("frame", 0)
+        return _ok()
+
+    def a2e_set_settings(self, payload):
+        self.state.a2e_settings.update(payload)
+        return _ok()
+
+    def a2e_set_emotion(self, payload):
+        self.state.emotion = list(payload.get("emotion", self.state.emotion))
+        return _ok()
+
+    def a2e_enable_auto_generate(self, payload):
+        self.state.auto_generate_emotion = bool(payload.get("enable", True))
+        return _ok()
+
+    def a2e_generate_keys(self, payload):
+        if self.state.track is None:
+            return _error("No track is set")
+        return _ok()
+
+    def a2e_get_emotion_names(self, payload):
+        return _ok(EMOTION_NAMES)
+
+    def a2e_get_emotion(self, payload):
+        return _ok(self.state.emotion)
+
+    def export_blendshapes(self, payload):
+        fps = payload.get("fps", 60)
+        format = payload.get("format", "usd")
+        export_directory = payload.get("export_directory", "")
+        if payload.get("batch"):
+            return self._export_batch(export_directory, fps, format)
+        if self.state.is_streaming_solver(payload.get("solver_node")):
+            return self._export_streamed(export_directory, payload.get("file_name", ""), fps, format)
+        if self.state.track is None:
+            return _error("No track is set")
+
+        file_path = get_export_file_path(os.path.join(export_directory, payload.get("file_name", "")), format)
+        write_export_file(file_path, self.state.track, fps=fps, format=format)
+        self.state.exported_files.append(file_path)
+        return _ok([file_path])
+
+    def _export_streamed(self, export_directory: str, file_name: str, fps: int, format: str):
+        # the frames of the streamed audio from the current frame on. The emulator keeps no samples, the face rests.
+        # the tolerance absorbs the rounding errors of the summed chunk durations
+        num_frames = max(0, int(math.ceil(self.state.streamed_seconds * fps - 1e-6)) - self.state.frame)
+        file_path = get_export_file_path(os.path.join(export_directory, file_name), format)
+        write_weights_file(file_path, [[0.0] * len(ARKIT_BLENDSHAPES)] * num_frames, fps, format)
+        self.state.exported_files.append(file_path)
+        return _ok([file_path])
+
+    def _export_batch(self, export_directory: str, fps: int, format: str):
+        # like the batch exporter: one file per track of the root path, named after the track
+        if self.state.root_path is None:
+            return _error("Root path is not set")
+        file_paths = []
+        for track in sorted(get_files_in_dir(self.state.root_path, [".wav"])):
+            stem = os.path.splitext(os.path.basename(track))[0]
+            file_path = os.path.join(export_directory, f"{stem}.{format}")
+            write_export_file(file_path, track, fps=fps, format=format)
+            file_paths.append(file_path)
+        self.state.exported_files.extend(file_paths)
+        return _ok(file_paths)
+
+
+ROUTES = {
+    ("GET", "status"): _RestRoutes.status,
+    ("GET", "A2F/GetInstances"): _RestRoutes.get_instances,
+    ("POST", "A2F/USD/Load"): _RestRoutes.usd_load,
+    ("POST", "A2F/Player/SetRootPath"): _RestRoutes.set_root_path,
+    ("POST", "A2F/Player/SetTrack"): _RestRoutes.set_track,
+    ("POST", "A2F/Player/SetFrame"): _RestRoutes.set_frame,
+    ("POST", "A2F/A2E/SetSettings"): _RestRoutes.a2e_set_settings,
+    ("POST", "A2F/A2E/SetEmotion"): _RestRoutes.a2e_set_emotion,
+    ("POST", "A2F/A2E/EnableAutoGenerateOnTrackChange"): _RestRoutes.a2e_enable_auto_generate,
+    ("POST", "A2F/A2E/GenerateKeys"): _RestRoutes.a2e_generate_keys,
+    ("GET", "A2F/A2E/GetEmotionNames"): _RestRoutes.a2e_get_emotion_names,
+    ("POST", "A2F/A2E/GetEmotion"): _RestRoutes.a2e_get_emotion,
+    ("POST", "A2F/Exporter/ExportBlendshapes"): _RestRoutes.export_blendshapes,
+}
+
+
+def make_rest_server(host: str, port: int, state: EmulatorState, latency) -> ThreadingHTTPServer:
+    routes = _RestRoutes(state)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+        disable_nagle_algorithm = True  # headers and body are written separately
+
+        def _handle(self, method: str):
+            api_route = self.path.split("?", 1)[0].strip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+
+            route = ROUTES.get((method, api_route))
+            if route is None:
+                self._send(404, {"detail": "Not Found"})
+                return
+
+            try:
+                payload = json.loads(body) if body else {}
+            except ValueError:
+                self._send(422, {"detail": "Invalid json"})
+                return
+
+            latency.wait(api_route)
+            with state.lock:
+                state.requests[api_route] += 1
+                code, response = route(routes, payload)
+            self._send(code, response)
+
+        def _send(self, code: int, response):
+            data = json.dumps(response).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
@@ -1,7 +1,11 @@
 from __future__ import annotations  # avoid circular import with import py_audio2face 
 import py_audio2face.audio2face as a2f
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import py_audio2face.async_audio2face as async_a2f
 
 from py_audio2face.settings import DEFAULT_A2E_INSTANCE
+from py_audio2face.modules._state import SKIPPED_RESPONSE, is_ok_response
 
 # Default generate settings
 """
@@ -26,6 +30,81 @@ Available settings:
 
 
 
+def _a2e_settings_dict(
+        a2e_emotion_strength: float = 0.5,
+        a2e_smoothing_exp: int = 0,
+        a2e_max_emotions: int = 5,
+        a2e_contrast: float = 1.0,
+        preferred_emotion: list = None,
+        a2e_preferred_emotion_strength: float = 0.5,
+        **kwargs
+) -> dict:
+    settings = {}
+    def add_to_dict(key, value):
+        if value is not None:
+            settings[key] = value
+
+    add_to_dict("a2e_emotion_strength", a2e_emotion_strength)
+    add_to_dict("a2e_smoothing_exp", a2e_smoothing_exp)
+    add_to_dict("a2e_max_emotions", a2e_max_emotions)
+    add_to_dict("a2e_contrast", a2e_contrast)
+    add_to_dict("preferred_emotion", preferred_emotion)
+    add_to_dict("a2e_preferred_emotion_strength", a2e_preferred_emotion_strength)
+    return settings
+
+
+def _emotion_vector(
+        amazement: float | None = 0.0,
+        anger: float | None = 0.0,
+        cheekiness: float | None = 0.0,
+        disgust: float | None = 0.0,
+        fear: float | None = 0.0,
+        grief: float | None = 0.0,
+        joy: float | None = 0.0,
+        outofbreath: float | None = 0.0,
+        pain: float | None = 0.0,
+        sadness: float | None = 0.0
+) -> list:
+    emotion_strength = {}
+    def add_to_dict(emotion, value):
+        emotion_strength[emotion] = value if value is not None else 0.0
+
+    add_to_dict("Amazement", amazement)
+    add_to_dict("Anger", anger)
+    add_to_dict("Cheekiness", cheekiness)
+    add_to_dict("Disgust", disgust)
+    add_to_dict("Fear", fear)
+    add_to_dict("Grief", grief)
+    add_to_dict("Joy", joy)
+    add_to_dict("Outofbreath", outofbreath)
+    add_to_dict("Pain", pain)
+    add_to_dict("Sadness", sadness)
+    return list(emotion_strength.values())
+
+
+def _set_emotion_payload(emotion: list) -> dict:
+    return {
+        "a2f_instance": DEFAULT_A2E_INSTANCE,
+        "emotion": emotion
+    }
+
+
+def _auto_generate_payload(enable: bool) -> dict:
+    return {
+        "a2f_instance": DEFAULT_A2E_INSTANCE,
+        "enable": enable
+    }
+
+
+def _get_emotion_payload(frame: int) -> dict:
+    return {
+        "a2f_instance": DEFAULT_A2E_INSTANCE,
+        "as_vector": True,
+        "frame": frame,
+        "as_timestamp": False
+    }
+
+
 class _A2F_Audio2Emotion:
     # Implement of A2F/A2E/SetSettings
 
@@ -69,20 +148,27 @@ class _A2F_Audio2Emotion:
         if self.loaded_scene is None:
             self.init_a2f()
 
-        settings = {}
-        def add_to_dict(key, value):
-            if value is not None:
-                settings[key] = value
-
-        add_to_dict("a2e_emotion_strength", a2e_emotion_strength)
-        add_to_dict("a2e_smoothing_exp", a2e_smoothing_exp)
-        add_to_dict("a2e_max_emotions", a2e_max_emotions)
-        add_to_dict("a2e_contrast", a2e_contrast)
-        add_to_dict("preferred_emotion", preferred_emotion)
-        add_to_dict("a2e_preferred_emotion_strength", a2e_preferred_emotion_strength)
+        settings = _a2e_settings_dict(
+            a2e_emotion_strength=a2e_emotion_strength,
+            a2e_smoothing_exp=a2e_smoothing_exp,
+            a2e_max_emotions=a2e_max_emotions,
+            a2e_contrast=a2e_contrast,
+            preferred_emotion=preferred_emotion,
+            a2e_preferred_emotion_strength=a2e_preferred_emotion_strength
+        )
 
         self.a2e_settings.update(settings)
-        return self.post("A2F/A2E/SetSettings", payload=settings)
+        return self._post_a2e_settings(settings)
+
+    def _post_a2e_settings(self: a2f.Audio2Face, settings: dict):
+        # skip the request if the server has these settings already
+        if self.server_state.a2e_settings_applied(settings):
+            return dict(SKIPPED_RESPONSE)
+
+        response = self.post("A2F/A2E/SetSettings", payload=settings)
+        if is_ok_response(response):
+            self.server_state.apply_a2e_settings(settings)
+        return response
 
     def a2e_set_settings_from_dict(self: a2f.Audio2Face, settings: dict):
         """
@@ -101,12 +187,7 @@ class _A2F_Audio2Emotion:
             "a2f_instance": "string",
             "enable": true
         """
-
-        payload = {
-            "a2f_instance": DEFAULT_A2E_INSTANCE,
-            "enable": enable
-        }
-        return self.post("A2F/A2E/EnableAutoGenerateOnTrackChange", payload=payload)
+        return self.post("A2F/A2E/EnableAutoGenerateOnTrackChange", payload=_auto_generate_payload(enable))
 
     # Implement of A2F/A2E/SetEmotion
     def set_emotion(
@@ -134,29 +215,22 @@ class _A2F_Audio2Emotion:
         if self.loaded_scene is None:
             self.init_a2f()
 
-        emotion_strength = {}
-        def add_to_dict(emotion, value):
-            emotion_strength[emotion] = value if value is not None else 0.0
-
-        add_to_dict("Amazement", amazement)
-        add_to_dict("Anger", anger)
-        add_to_dict("Cheekiness", cheekiness)
-        add_to_dict("Disgust", disgust)
-        add_to_dict("Fear", fear)
-        add_to_dict("Grief", grief)
-        add_to_dict("Joy", joy)
-        add_to_dict("Outofbreath", outofbreath)
-        add_to_dict("Pain", pain)
-        add_to_dict("Sadness", sadness)
+        emotion = _emotion_vector(
+            amazement=amazement, anger=anger, cheekiness=cheekiness, disgust=disgust, fear=fear,
+            grief=grief, joy=joy, outofbreath=outofbreath, pain=pain, sadness=sadness
+        )
 
         if update_settings:
-            self.a2e_set_settings(preferred_emotion=list(emotion_strength.values()))
+            self.a2e_set_settings(preferred_emotion=emotion)
 
-        payload = {
-            "a2f_instance": DEFAULT_A2E_INSTANCE,
-            "emotion": list(emotion_strength.values())
-        }
-        response = self.post("A2F/A2E/SetEmotion", payload=payload)
+        return self._post_emotion(emotion)
+
+    def _post_emotion(self: a2f.Audio2Face, emotion: list):
+        if self.server_state.emotion == emotion:
+            return dict(SKIPPED_RESPONSE)
+
+        response = self.post("A2F/A2E/SetEmotion", payload=_set_emotion_payload(emotion))
+        self.server_state.emotion = emotion if is_ok_response(response) else None
         return response
 
     def generate_emotion_keys(self: a2f.Audio2Face):
@@ -185,12 +259,93 @@ class _A2F_Audio2Emotion:
             "frame": 0,
             "as_timestamp": false
         """
+        return self.post("A2F/A2E/GetEmotion", payload=_get_emotion_payload(frame))
 
-        payload = {
-            "a2f_instance": DEFAULT_A2E_INSTANCE,
-            "as_vector": True,
-            "frame": frame,
-            "as_timestamp": False
-        }
 
-        return self.post("A2F/A2E/GetEmotion", payload=payload)
+class _A2F_Audio2EmotionAsync:
+    # Awaitable versions of _A2F_Audio2Emotion. See there for the documentation of the settings.
+    get_default_a2e_settings = staticmethod(_A2F_Audio2Emotion.get_default_a2e_settings)
+
+    async def a2e_set_settings(
+            self: async_a2f.AsyncAudio2Face,
+            a2e_emotion_strength: float = 0.5,
+            a2e_smoothing_exp: int = 0,
+            a2e_max_emotions: int = 5,
+            a2e_contrast: float = 1.0,
+            preferred_emotion: list = None,
+            a2e_preferred_emotion_strength: float = 0.5,
+            **kwargs
+    ):
+        if self.loaded_scene is None:
+            await self.init_a2f()
+
+        settings = _a2e_settings_dict(
+            a2e_emotion_strength=a2e_emotion_strength,
+            a2e_smoothing_exp=a2e_smoothing_exp,
+            a2e_max_emotions=a2e_max_emotions,
+            a2e_contrast=a2e_contrast,
+            preferred_emotion=preferred_emotion,
+            a2e_preferred_emotion_strength=a2e_preferred_emotion_strength
+        )
+
+        self.a2e_settings.update(settings)
+        return await self._post_a2e_settings(settings)
+
+    async def _post_a2e_settings(self: async_a2f.AsyncAudio2Face, settings: dict):
+        if self.server_state.a2e_settings_applied(settings):
+            return dict(SKIPPED_RESPONSE)
+
+        response = await self.post("A2F/A2E/SetSettings", payload=settings)
+        if is_ok_response(response):
+            self.server_state.apply_a2e_settings(settings)
+        return response
+
+    async def a2e_set_settings_from_dict(self: async_a2f.AsyncAudio2Face, settings: dict):
+        await self.a2e_set_settings(**settings)
+
+    async def set_enable_auto_generate_on_track_change(self: async_a2f.AsyncAudio2Face, enable: bool = True):
+        return await self.post("A2F/A2E/EnableAutoGenerateOnTrackChange", payload=_auto_generate_payload(enable))
+
+    async def set_emotion(
+            self: async_a2f.AsyncAudio2Face,
+            amazement: float | None = 0.0,
+            anger: float | None = 0.0,
+            cheekiness: float | None = 0.0,
+            disgust: float | None = 0.0,
+            fear: float | None = 0.0,
+            grief: float | None = 0.0,
+            joy: float | None = 0.0,
+            outofbreath: float | None = 0.0,
+            pain: float | None = 0.0,
+            sadness: float | None = 0.0,
+            update_settings: bool = True
+    ):
+        if self.loaded_scene is None:
+            await self.init_a2f()
+
+        emotion = _emotion_vector(
+            amazement=amazement, anger=anger, cheekiness=cheekiness, disgust=disgust, fear=fear,
+            grief=grief, joy=joy, outofbreath=outofbreath, pain=pain, sadness=sadness
+        )
+
+        if update_settings:
+            await self.a2e_set_settings(preferred_emotion=emotion)
+
+        return await self._post_emotion(emotion)
+
+    async def _post_emotion(self: async_a2f.AsyncAudio2Face, emotion: list):
+        if self.server_state.emotion == emotion:
+            return dict(SKIPPED_RESPONSE)
+
+        response = await self.post("A2F/A2E/SetEmotion", payload=_set_emotion_payload(emotion))
+        self.server_state.emotion = emotion if is_ok_response(response) else None
+        return response
+
+    async def generate_emotion_keys(self: async_a2f.AsyncAudio2Face):
+        return await self.post("A2F/A2E/GenerateKeys", payload=self.a2e_settings)
+
+    async def get_emotion_names(self: async_a2f.AsyncAudio2Face):
+        return await self.make_request("A2F/A2E/GetEmotionNames")
+
+    async def get_emotion(self: async_a2f.AsyncAudio2Face, frame: int = 0):
+        return await self.post("A2F/A2E/GetEmotion", payload=_get_emotion_payload(frame))
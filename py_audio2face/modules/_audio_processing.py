@@ -0,0 +1,190 @@
+"""
+Preprocessing stage for streamed audio.
+Audio of TTS engines and microphones comes as int16 / int32 / float64 PCM, often with several channels, other sample
+rates and in chunks of irregular size. The stage converts it to the mono float32 the streaming player expects,
+resamples it and cuts it into chunks of a fixed size. Everything is vectorized with numpy; chunks that already
+conform are passed through without a copy.
+"""
+import numpy as np
+
+# scale of integer PCM to [-1, 1]
+_INT_SCALES = {
+    np.dtype(np.int8): 1 / 2 ** 7,
+    np.dtype(np.int16): 1 / 2 ** 15,
+    np.dtype(np.int32): 1 / 2 ** 31,
+}
+
+
+def to_float32(chunk, channels: int = 1, dtype=np.float32, out: np.ndarray = None) -> np.ndarray:
+    """
+    Mono float32 samples of a chunk.
+    :param chunk: numpy array of shape (frames,) or (frames, channels), or bytes of interleaved samples.
+    :param channels: number of interleaved channels of 1D input. They are averaged to one channel.
+    :param dtype: sample type of bytes input.
+    :param out: float32 array of the number of frames to write the result to, instead of a new array.
+    :return: the chunk itself if it is mono float32 already, otherwise a new array or out.
+    """
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        chunk = np.frombuffer(chunk, dtype=dtype)
+    if chunk.ndim == 1 and channels > 1:
+        chunk = chunk[:len(chunk) - len(chunk) % channels].reshape(-1, channels)
+    if chunk.ndim == 2 and chunk.shape[1] == 1:
+        chunk = chunk[:, 0]
+
+    if chunk.ndim == 1:
+        if chunk.dtype == np.float32:
+            return chunk
+        if out is None:
+            out = chunk.astype(np.float32)
+        else:
+            np.copyto(out, chunk, casting="unsafe")
+        scale = _INT_SCALES.get(chunk.dtype)
+    else:
+        # the sum in float32 is the conversion and the downmix in one pass
+        out = chunk.sum(axis=1, dtype=np.float32, out=out)
+        scale = _INT_SCALES.get(chunk.dtype, 1.0) / chunk.shape[1]
+
+    if chunk.dtype == np.uint8:
+        # 8 bit wav is unsigned with the center at 128
+        out -= 128 * (chunk.shape[1] if chunk.ndim == 2 else 1)
+        scale = (scale or 1.0) / 128
+    if scale is not None and scale != 1.0:
+        out *= scale
+    return out
+
+
+class StreamingResampler:
+    """
+    Linear interpolation resampler that keeps its position across chunks, so that chunk borders don't click.
+    There is no anti aliasing filter. That is fine for speech, which has little energy above 8 kHz.
+    """
+
+    def __init__(self, samplerate: int, target_samplerate: int):
+        self.samplerate = samplerate
+        self.target_samplerate = target_samplerate
+        self.step = samplerate / target_samplerate  # input samples per output sample
+        self._last = np.zeros(0, dtype=np.float32)  # last input sample of the previous chunk
+        self._position = 0.0  # position of the next output sample, relative to _last
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        if self.samplerate == self.target_samplerate or len(chunk) == 0:
+            return chunk
+        samples = np.concatenate((self._last, chunk)) if len(self._last) else chunk
+        last_index = len(samples) - 1
+        if last_index < self._position:
+            self._last = samples[-1:]
+            self._position -= last_index
+            return np.zeros(0, dtype=np.float32)
+
+        count = int((last_index - self._position) // self.step) + 1
+        positions = self._position + self.step * np.arange(count)
+        out = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+        self._last = samples[-1:]
+        self._position = self._position + self.step * count - last_index
+        return out
+
+
+class Rechunker:
+    """
+    Cuts a stream of arrays into chunks of chunk_size samples.
+    Whole chunks inside an input array are returned as views of it. Samples that don't fill a chunk wait in a buffer
+    that is handed out when it is full and then replaced, so a returned chunk is never overwritten.
+    """
+
+    def __init__(self, chunk_size: int):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.chunk_size = chunk_size
+        self._buffer = np.empty(chunk_size, dtype=np.float32)
+        self._fill = 0
+
+    def push(self, samples: np.ndarray):
+        """ :return: generator of the chunks that are complete after adding the samples """
+        size = self.chunk_size
+        start = 0
+        if self._fill:
+            start = min(size - self._fill, len(samples))
+            self._buffer[self._fill:self._fill + start] = samples[:start]
+            self._fill += start
+            if self._fill < size:
+                return
+            yield self._take()
+
+        whole = start + (len(samples) - start) // size * size
+        for i in range(start, whole, size):
+            yield samples[i:i + size]
+
+        rest = len(samples) - whole
+        if rest:
+            self._buffer[:rest] = samples[whole:]
+            self._fill = rest
+
+    def flush(self):
+        """ :return: generator of the last, shorter chunk if samples are left """
+        if self._fill:
+            fill = self._fill
+            yield self._take()[:fill]
+
+    def _take(self) -> np.ndarray:
+        chunk, self._buffer = self._buffer, np.empty(self.chunk_size, dtype=np.float32)
+        self._fill = 0
+        return chunk
+
+
+class A2FAudioPreprocessor:
+    def __init__(
+            self,
+            samplerate: int,
+            target_samplerate: int = None,
+            channels: int = 1,
+            chunk_size: int = None,
+            dtype=np.float32
+    ):
+        """
+        Normalizes streamed audio for the streaming player: mono float32 in [-1, 1], chunks of equal size.
+        :param samplerate: sample rate of the input.
+        :param target_samplerate: resample to this rate. None keeps the input rate, the player resamples itself.
+        :param channels: interleaved channels of 1D arrays and bytes. 2D arrays are (frames, channels).
+        :param chunk_size: samples per output chunk, at the target rate. None forwards chunks in their input size.
+        :param dtype: sample type of bytes input, e.g. np.int16 for raw 16 bit PCM.
+        """
+        self.samplerate = samplerate
+        self.target_samplerate = target_samplerate or samplerate
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.resampler = StreamingResampler(samplerate, self.target_samplerate)
+        self.rechunker = Rechunker(chunk_size) if chunk_size else None
+
+    def process(self, chunk):
+        """ :return: generator of the output chunks that are complete after this input chunk """
+        samples = self.resampler.process(to_float32(chunk, self.channels, self.dtype))
+        if self.rechunker is None:
+            if len(samples):
+                yield samples
+            return
+        yield from self.rechunker.push(samples)
+
+    def flush(self):
+        """ :return: generator of the samples that are left at the end of the stream """
+        if self.rechunker is not None:
+            yield from self.rechunker.flush()
+
+    def stream(self, audio_stream):
+        """ Preprocesses a whole stream. :return: generator of the output chunks """
+        for chunk in audio_stream:
+            yield from self.process(chunk)
+        yield from self.flush()
+
+    async def astream(self, audio_stream):
+        """ stream() for async iterables. Plain iterables are accepted, too. """
+        if hasattr(audio_stream, "__aiter__"):
+            async for chunk in audio_stream:
+                for out in self.process(chunk):
+                    yield out
+        else:
+            for chunk in audio_stream:
+                for out in self.process(chunk):
+                    yield out
+        for out in self.flush():
+            yield out
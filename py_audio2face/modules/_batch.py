@@ -0,0 +1,179 @@
+from __future__ import annotations  # avoid circular import with import py_audio2face
+import py_audio2face.audio2face as a2f
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import py_audio2face.async_audio2face as async_a2f
+
+import os
+import shutil
+import tempfile
+
+from py_audio2face.modules._export import (
+    _prepare_output_path, _check_export_response, _export_blend_shape_payload, _cache_key, _cached_export,
+    _cache_export
+)
+from py_audio2face.modules._manifest import animation_settings
+from py_audio2face.utils import get_animation_output_path, get_export_file_path, link_or_copy
+
+
+def _plan_folder(client, audio_files: list, output_folder: str, fps: int, emotion: bool, manifest, overrides: dict):
+    """
+    Splits the files of a folder run into done and to do.
+    :return: (outputs: audio file -> output path of the files that are up to date,
+              todo: list of (audio file, output path, fps, emotion, settings))
+    """
+    outputs, todo = {}, []
+    for af in audio_files:
+        # outfile name will be base file name of af_a2f_animation
+        outfile_name = get_animation_output_path(af, output_folder)
+        file_overrides = overrides.get(os.path.basename(af), {})
+        file_fps = file_overrides.get("fps", fps)
+        file_emotion = file_overrides.get("emotion", emotion)
+        settings = animation_settings(client, file_fps, file_emotion)
+        if manifest is not None and manifest.is_done(af, settings, outfile_name):
+            outputs[af] = os.path.abspath(outfile_name)
+        else:
+            todo.append((af, outfile_name, file_fps, file_emotion, settings))
+    return outputs, todo
+
+
+def _batch_jobs(todo: list, fps: int) -> list:
+    """ Jobs of the batch export: the folder fps and no emotion keys, which are generated per track. """
+    return [job for job in todo if job[2] == fps and not job[3]]
+
+
+def _stage_batch(staging_dir: str, audio_files: list) -> tuple:
+    """ Links the audio files into a folder of their own, so that the batch exporter sees only those. """
+    audio_dir = os.path.join(staging_dir, "audio")
+    export_dir = os.path.join(staging_dir, "export")
+    os.makedirs(audio_dir)
+    os.makedirs(export_dir)
+    for af in audio_files:
+        link_or_copy(af, os.path.join(audio_dir, os.path.basename(af)), link=True)
+    return audio_dir, export_dir
+
+
+def _collect_batch_outputs(export_dir: str, audio_files: list, output_paths: list, format: str) -> dict:
+    """
+    Moves the files of the batch exporter to the output paths. The exporter names its files after the tracks.
+    :return: audio file -> True if its animation was found
+    """
+    exported = [f for f in os.listdir(export_dir) if f.endswith(f".{format}")]
+    stems = {af: os.path.splitext(os.path.basename(af))[0] for af in audio_files}
+    matches = {}
+    for af, stem in stems.items():
+        if f"{stem}.{format}" in exported:
+            matches[af] = f"{stem}.{format}"
+    # otherwise the file containing the track name. Long names first, so that "a_1" doesn't take "a_10"
+    for af in sorted(set(audio_files) - set(matches), key=lambda af: -len(stems[af])):
+        candidates = [f for f in exported if stems[af] in f and f not in matches.values()]
+        if candidates:
+            matches[af] = min(candidates, key=len)
+
+    results = {}
+    for af, output_path in zip(audio_files, output_paths):
+        if af in matches:
+            os.replace(os.path.join(export_dir, matches[af]), get_export_file_path(output_path, format))
+        results[af] = af in matches
+    return results
+
+
+class _A2FBatchExport:
+    def export_batch(
+            self: a2f.Audio2Face, audio_files: list, output_paths: list, fps: int = 60, format: str = "usd"
+    ) -> dict:
+        """
+        Export many audio files with one call of the batch exporter of the server.
+        The files are linked into a staging folder next to the outputs, which becomes the root path of the player.
+        :param output_paths: output path per audio file, as for export().
+        :return: audio file -> True if its animation was exported
+        """
+        if len(audio_files) == 0:
+            return {}
+        output_paths = [_prepare_output_path(op) for op in output_paths]
+        staging_dir = tempfile.mkdtemp(prefix=".a2f_batch_", dir=os.path.dirname(output_paths[0]))
+        try:
+            audio_dir, export_dir = _stage_batch(staging_dir, audio_files)
+            self.set_root_path(audio_dir)
+            payload = _export_blend_shape_payload(os.path.join(export_dir, "batch"), fps, format, batch=True)
+            response = self.post("A2F/Exporter/ExportBlendshapes", payload=payload)
+            if not _check_export_response(response):
+                return {af: False for af in audio_files}
+            return _collect_batch_outputs(export_dir, audio_files, output_paths, format)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _export_folder_batch(self: a2f.Audio2Face, todo: list, fps: int, manifest) -> dict:
+        """ Runs the batch part of audio2face_folder. :return: audio file -> output path of the exported files """
+        jobs = []
+        outputs = {}
+        for af, outfile_name, file_fps, file_emotion, settings in _batch_jobs(todo, fps):
+            cache_key = _cache_key(self, fps, "usd", False, af)
+            if cache_key is not None and _cached_export(self, cache_key, _prepare_output_path(outfile_name), "usd"):
+                outputs[af] = _prepare_output_path(outfile_name)
+                if manifest is not None:
+                    manifest.record(af, settings, outputs[af], "done")
+            else:
+                jobs.append((af, outfile_name, settings, cache_key))
+        if len(jobs) == 0:
+            return outputs
+
+        print(f"batch export of {len(jobs)} files")
+        results = self.export_batch([j[0] for j in jobs], [j[1] for j in jobs], fps=fps)
+        for af, outfile_name, settings, cache_key in jobs:
+            if not results[af]:
+                # falls back to the export of the single file
+                continue
+            outputs[af] = _prepare_output_path(outfile_name)
+            if cache_key is not None:
+                _cache_export(self, cache_key, outputs[af], "usd")
+            if manifest is not None:
+                manifest.record(af, settings, outputs[af], "done")
+        return outputs
+
+
+class _A2FBatchExportAsync:
+    async def export_batch(
+            self: async_a2f.AsyncAudio2Face, audio_files: list, output_paths: list, fps: int = 60,
+            format: str = "usd"
+    ) -> dict:
+        """ See Audio2Face.export_batch """
+        if len(audio_files) == 0:
+            return {}
+        output_paths = [_prepare_output_path(op) for op in output_paths]
+        staging_dir = tempfile.mkdtemp(prefix=".a2f_batch_", dir=os.path.dirname(output_paths[0]))
+        try:
+            audio_dir, export_dir = _stage_batch(staging_dir, audio_files)
+            await self.set_root_path(audio_dir)
+            payload = _export_blend_shape_payload(os.path.join(export_dir, "batch"), fps, format, batch=True)
+            response = await self.post("A2F/Exporter/ExportBlendshapes", payload=payload)
+            if not _check_export_response(response):
+                return {af: False for af in audio_files}
+            return _collect_batch_outputs(export_dir, audio_files, output_paths, format)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    async def _export_folder_batch(self: async_a2f.AsyncAudio2Face, todo: list, fps: int, manifest) -> dict:
+        jobs = []
+        outputs = {}
+        for af, outfile_name, file_fps, file_emotion, settings in _batch_jobs(todo, fps):
+            cache_key = _cache_key(self, fps, "usd", False, af)
+            if cache_key is not None and _cached_export(self, cache_key, _prepare_output_path(outfile_name), "usd"):
+                outputs[af] = _prepare_output_path(outfile_name)
+                if manifest is not None:
+                    manifest.record(af, settings, outputs[af], "done")
+            else:
+                jobs.append((af, outfile_name, settings, cache_key))
+        if len(jobs) == 0:
+            return outputs
+
+        results = await self.export_batch([j[0] for j in jobs], [j[1] for j in jobs], fps=fps)
+        for af, outfile_name, settings, cache_key in jobs:
+            if not results[af]:
+                continue
+            outputs[af] = _prepare_output_path(outfile_name)
+            if cache_key is not None:
+                _cache_export(self, cache_key, outputs[af], "usd")
+            if manifest is not None:
+                manifest.record(af, settings, outputs[af], "done")
+        return outputs
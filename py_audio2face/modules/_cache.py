@@ -0,0 +1,149 @@
+"""
+Content addressed cache of exported animations, shared by all processes on a machine.
+An animation is identified by the hash of the audio content and everything that changes the export: fps, format,
+emotion flag, A2E settings and emotion vector. A hit is hard linked (or copied) to the output path without any
+request to the server. The store is capped in size; the least recently used animations are evicted first.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+
+from py_audio2face.settings import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES
+from py_audio2face.utils import file_hash, link_or_copy
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextmanager
+def _file_lock(path: str):
+    """ Exclusive lock across processes. Held only for metadata operations, never during an export. """
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class A2FAnimationCache:
+    def __init__(
+            self,
+            cache_dir: str = DEFAULT_CACHE_DIR,
+            max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+            link: bool = True,
+            metrics=None
+    ):
+        """
+        :param cache_dir: directory of the store. Several processes can share it.
+        :param max_bytes: size limit of the store. Least recently used animations are evicted beyond it.
+        :param link: hard link hits to the output path instead of copying. Don't edit linked outputs in place.
+        :param metrics: A2FMetrics that receives the animation_cache_* counters. Set by the client if None.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.link = link
+        self.metrics = metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.puts = 0
+        self._counter_lock = threading.Lock()
+        self._lock_path = os.path.join(cache_dir, ".lock")
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+
+    def _count(self, name: str):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+        if self.metrics is not None:
+            self.metrics.inc(f"animation_cache_{name}")
+
+    @staticmethod
+    def key(audio_file_path: str, settings: dict, audio_hash: str = None) -> str:
+        """
+        :param settings: see _manifest.animation_settings
+        :param audio_hash: hash of the audio content if known, e.g. from a manifest.
+        """
+        audio_hash = audio_hash or file_hash(audio_file_path)
+        data = json.dumps({"audio": audio_hash, "settings": settings}, sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _object_path(self, key: str, format: str) -> str:
+        return os.path.join(self.cache_dir, "objects", key[:2], f"{key}.{format}")
+
+    def get(self, key: str, format: str, export_file_path: str) -> bool:
+        """ Places the cached animation at export_file_path. :return: False on a miss """
+        path = self._object_path(key, format)
+        with _file_lock(self._lock_path):
+            if not os.path.isfile(path):
+                self._count("misses")
+                return False
+            # the modification time is the recency for the LRU eviction
+            os.utime(path)
+            link_or_copy(path, export_file_path, self.link)
+        self._count("hits")
+        return True
+
+    def put(self, key: str, format: str, export_file_path: str):
+        """ Stores an exported animation and evicts old ones if the store is too large. """
+        path = self._object_path(key, format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # copy outside of the lock, the rename into the store is atomic
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(export_file_path, tmp)
+        with _file_lock(self._lock_path):
+            os.replace(tmp, path)
+            self._count("puts")
+            self._evict()
+
+    def _entries(self) -> list:
+        entries = []
+        objects_dir = os.path.join(self.cache_dir, "objects")
+        for sub_dir in os.scandir(objects_dir):
+            if not sub_dir.is_dir():
+                continue
+            for entry in os.scandir(sub_dir.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        """ Caller holds the file lock. """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self._count("evictions")
+
+    def size(self) -> int:
+        """ Bytes in the store. """
+        with _file_lock(self._lock_path):
+            return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        with _file_lock(self._lock_path):
+            for _, _, path in self._entries():
+                os.remove(path)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "puts": self.puts}
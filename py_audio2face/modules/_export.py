@@ -1,8 +1,79 @@
 from __future__ import annotations  # avoid circular import with import py_audio2face
 import py_audio2face.audio2face as a2f
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import py_audio2face.async_audio2face as async_a2f
 
 import os
 from py_audio2face.settings import DEFAULT_SOLVER_INSTANCE, DEFAULT_OUTPUT_DIR
+from py_audio2face.modules._manifest import animation_settings
+from py_audio2face.utils import get_export_file_path
+
+
+def _prepare_output_path(output_path: str) -> str:
+    if output_path is None:
+        print(f"output path is not provided, using default: {DEFAULT_OUTPUT_DIR}")
+        output_path = DEFAULT_OUTPUT_DIR
+
+    # avoid non absolute paths
+    if not os.path.isabs(output_path):
+        output_path = os.path.join(os.getcwd(), output_path)
+
+    if not os.path.isdir(os.path.dirname(output_path)):
+        print(f"creating output dir: {output_path}")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    return output_path
+
+
+def _check_export_response(response) -> bool:
+    if response is None or 'status' not in response or response['status'] == 'ERROR':
+        message = response.get('message') if isinstance(response, dict) else response
+        print(f"BlendShape Export failed: {message}")
+        return False
+    return True
+
+
+def _export_blend_shape_payload(
+        output_path: str, fps: int = 60, format: str = "usd", batch: bool = False, solver_instance: str = None
+) -> dict:
+    return {
+        "solver_node": solver_instance or DEFAULT_SOLVER_INSTANCE,
+        "export_directory": os.path.dirname(output_path),
+        "file_name": os.path.basename(output_path),
+        "format": format,
+        "batch": batch,
+        "fps": fps
+    }
+
+
+def _cache_key(client, fps: int, format: str, emotion_auto_detect: bool, audio_file_path: str = None):
+    """ Key of the animation in the cache of the client. None if there is no cache or no track. """
+    if client.cache is None:
+        return None
+    if audio_file_path is None:
+        if client.server_state.track is None:
+            return None
+        audio_file_path = client.server_state.track[0]
+    settings = animation_settings(client, fps, emotion_auto_detect, format)
+    return client.cache.key(audio_file_path, settings)
+
+
+def _cached_export(client, cache_key: str, output_path: str, format: str) -> bool:
+    """ Places a cached animation at the output path. On a miss the old output is removed. :return: True on a hit """
+    export_file = get_export_file_path(output_path, format)
+    if client.cache.get(cache_key, format, export_file):
+        return True
+    # the old output may be a hard link into the cache, the server must not overwrite that in place
+    if os.path.lexists(export_file):
+        os.remove(export_file)
+    return False
+
+
+def _cache_export(client, cache_key: str, output_path: str, format: str):
+    export_file = get_export_file_path(output_path, format)
+    if os.path.isfile(export_file):
+        client.cache.put(cache_key, format, export_file)
 
 
 class _A2FExport:
@@ -21,36 +92,81 @@ class _A2FExport:
         :param emotion_auto_detect: Whether to generate emotion_auto_detect keys from the audio.
             If a dictionary is provided, it will be used as the emotion_auto_detect settings.
         """
+        output_path, ok = self._export(output_path, fps=fps, format=format, emotion_auto_detect=emotion_auto_detect)
+        return output_path
 
-        if output_path is None:
-            print(f"output path is not provided, using default: {DEFAULT_OUTPUT_DIR}")
-            output_path = DEFAULT_OUTPUT_DIR
-
-        # avoid non absolute paths
-        if not os.path.isabs(output_path):
-            output_path = os.path.join(os.getcwd(), output_path)
-
-        if not os.path.isdir(os.path.dirname(output_path)):
-            print(f"creating output dir: {output_path}")
-            os.makedirs(os.path.dirname(output_path))
+    def _export(self: a2f.Audio2Face, output_path: str, fps: int = 60, format: str = "usd",
+                emotion_auto_detect: bool = False, cache_key: str = None, check_cache: bool = True) -> tuple:
+        """
+        export() that also tells if the server accepted it. Served from the cache of the client if possible.
+        :param cache_key: key of the current track, if it was computed already.
+        :param check_cache: False if the caller looked up cache_key already.
+        :return: (output_path, ok)
+        """
+        output_path = _prepare_output_path(output_path)
+        cache_key = cache_key or _cache_key(self, fps, format, emotion_auto_detect)
+        if cache_key is not None and check_cache and _cached_export(self, cache_key, output_path, format):
+            return output_path, True
 
         if emotion_auto_detect:
             self.generate_emotion_keys()
 
         response = self.export_blend_shape(output_path=output_path, fps=fps, format=format)
-        if 'status' not in response or response['status'] == 'ERROR':
-            print(f"BlendShape Export failed: {response['message']}")
+        ok = _check_export_response(response)
+        if ok and cache_key is not None:
+            _cache_export(self, cache_key, output_path, format)
+        return output_path, ok
+
+    def export_blend_shape(
+            self: a2f.Audio2Face, output_path: str, fps: int = 60, format: str = "usd", solver_instance: str = None
+    ):
+        """
+        :param solver_instance: blend shape solver to export from. Defaults to the solver of the default scene, use
+            self.scene_instance(DEFAULT_SOLVER_INSTANCE, streaming=True) for the streamed audio in the combined scene.
+        """
+        payload = _export_blend_shape_payload(
+            output_path=output_path, fps=fps, format=format, solver_instance=solver_instance
+        )
+        return self.post("A2F/Exporter/ExportBlendshapes", payload=payload)
+
 
+class _A2FExportAsync:
+    async def export(
+            self: async_a2f.AsyncAudio2Face,
+            output_path: str,
+            fps: int = 60,
+            format: str = "usd",
+            emotion_auto_detect: bool = False
+    ):
+        """
+        Export the blend shapes to a file. See Audio2Face.export
+        """
+        output_path, ok = await self._export(
+            output_path, fps=fps, format=format, emotion_auto_detect=emotion_auto_detect
+        )
         return output_path
 
-    def export_blend_shape(self: a2f.Audio2Face, output_path: str, fps: int = 60, format: str = "usd"):
-        payload = {
-            "solver_node": DEFAULT_SOLVER_INSTANCE,
-            "export_directory": os.path.dirname(output_path),
-            "file_name": os.path.basename(output_path),
-            "format": format,
-            "batch": False,
-            "fps": fps
-        }
+    async def _export(self: async_a2f.AsyncAudio2Face, output_path: str, fps: int = 60, format: str = "usd",
+                      emotion_auto_detect: bool = False, cache_key: str = None, check_cache: bool = True) -> tuple:
+        output_path = _prepare_output_path(output_path)
+        cache_key = cache_key or _cache_key(self, fps, format, emotion_auto_detect)
+        if cache_key is not None and check_cache and _cached_export(self, cache_key, output_path, format):
+            return output_path, True
 
-        return self.post("A2F/Exporter/ExportBlendshapes", payload=payload)
+        if emotion_auto_detect:
+            await self.generate_emotion_keys()
+
+        response = await self.export_blend_shape(output_path=output_path, fps=fps, format=format)
+        ok = _check_export_response(response)
+        if ok and cache_key is not None:
+            _cache_export(self, cache_key, output_path, format)
+        return output_path, ok
+
+    async def export_blend_shape(
+            self: async_a2f.AsyncAudio2Face, output_path: str, fps: int = 60, format: str = "usd",
+            solver_instance: str = None
+    ):
+        payload = _export_blend_shape_payload(
+            output_path=output_path, fps=fps, format=format, solver_instance=solver_instance
+        )
+        return await self.post("A2F/Exporter/ExportBlendshapes", payload=payload)
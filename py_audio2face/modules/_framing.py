@@ -0,0 +1,109 @@
+"""
+Serialized PushAudioStream messages without protobuf objects.
+An audio chunk message has a single field: audio_data, a length delimited field with a one byte tag. The framer writes
+the tag and the varint length in front of the float32 samples and hands gRPC the finished bytes, which are sent
+without a serializer (_PooledChannel.push_audio_stream_raw). Mono float32 chunks are copied once, into the message.
+Other chunks are converted into a scratch buffer that is reused for every chunk, and copied from there. On slow links
+small chunks can be merged in the scratch buffer, so that fewer and larger messages are sent.
+"""
+import numpy as np
+
+from py_audio2face.modules._audio_processing import to_float32
+
+# field 2 (audio_data) of PushAudioStreamRequest, wire type 2 (length delimited)
+_AUDIO_DATA_TAG = (2 << 3) | 2
+# the header is at most the tag and a 5 byte varint. It is written right before the samples, which start aligned.
+_HEADER_SPACE = 8
+_FLOAT32_BYTES = 4
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class A2FChunkFramer:
+    """ Encodes the audio chunks of one stream. Not thread safe, use one per stream. """
+
+    def __init__(self, min_bytes: int = 0):
+        """
+        :param min_bytes: chunks are merged in the scratch buffer until a message holds this many bytes of audio.
+            0 frames every chunk on its own.
+        """
+        self.min_bytes = min_bytes
+        self._scratch = bytearray()
+        self._pending = 0  # bytes of merged audio in the scratch buffer
+        self._header = b""
+        self._header_bytes = -1  # audio bytes the cached header is for
+
+    def _header_for(self, num_bytes: int) -> bytes:
+        # the chunks of a stream mostly have the same size
+        if num_bytes != self._header_bytes:
+            self._header = bytes((_AUDIO_DATA_TAG,)) + _varint(num_bytes)
+            self._header_bytes = num_bytes
+        return self._header
+
+    def _reserve(self, num_bytes: int):
+        """ Grows the scratch buffer to hold num_bytes more audio. The pending audio is kept. """
+        size = _HEADER_SPACE + self._pending + num_bytes
+        if len(self._scratch) < size:
+            scratch = bytearray(max(size, 2 * len(self._scratch)))
+            if self._pending:
+                end = _HEADER_SPACE + self._pending
+                scratch[_HEADER_SPACE:end] = self._scratch[_HEADER_SPACE:end]
+            self._scratch = scratch
+
+    def _write(self, chunk) -> int:
+        """ Appends the chunk as float32 to the pending audio in the scratch buffer. :return: its bytes """
+        offset = _HEADER_SPACE + self._pending
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            num_bytes = memoryview(chunk).nbytes
+            self._reserve(num_bytes)
+            self._scratch[offset:offset + num_bytes] = chunk
+            return num_bytes
+
+        frames = chunk.shape[0]
+        self._reserve(frames * _FLOAT32_BYTES)
+        out = np.frombuffer(self._scratch, dtype=np.float32, count=frames, offset=offset)
+        samples = to_float32(chunk, out=out)
+        if samples is not out:
+            # float32 input is returned as is
+            np.copyto(out, samples)
+        return out.nbytes
+
+    def _take(self) -> tuple:
+        """ The pending audio as message """
+        num_bytes, self._pending = self._pending, 0
+        header = self._header_for(num_bytes)
+        start = _HEADER_SPACE - len(header)
+        self._scratch[start:_HEADER_SPACE] = header
+        with memoryview(self._scratch) as view:
+            return bytes(view[start:_HEADER_SPACE + num_bytes]), num_bytes
+
+    def frame(self, chunk) -> tuple:
+        """
+        :param chunk: numpy array, mono or (frames, channels), or float32 bytes.
+        :return: (serialized PushAudioStreamRequest, number of audio bytes in it). (None, 0) while chunks are merged.
+        """
+        if not self.min_bytes:
+            if isinstance(chunk, (bytes, bytearray, memoryview)):
+                num_bytes = memoryview(chunk).nbytes
+                return self._header_for(num_bytes) + chunk, num_bytes
+            if chunk.ndim == 1 and chunk.dtype == np.float32 and chunk.flags.c_contiguous:
+                num_bytes = chunk.nbytes
+                return self._header_for(num_bytes) + memoryview(chunk).cast("B"), num_bytes
+
+        self._pending += self._write(chunk)
+        if self._pending < self.min_bytes:
+            return None, 0
+        return self._take()
+
+    def flush(self) -> tuple:
+        """ The merged audio that did not reach min_bytes yet, at the end of a stream. :return: see frame() """
+        if not self._pending:
+            return None, 0
+        return self._take()
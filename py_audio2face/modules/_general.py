@@ -1,36 +1,126 @@
 from __future__ import annotations  # avoid circular import with import py_audio2face
 import py_audio2face.audio2face as a2f
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import py_audio2face.async_audio2face as async_a2f
+
+import os
 from py_audio2face.settings import DEFAULT_A2E_INSTANCE
 
 
+def _load_scene_payload(usd_file_path: str) -> dict:
+    return {
+        "file_name": usd_file_path
+    }
+
+
+def _set_frame_payload(frame: int, as_timestamp: bool = False, a2f_instance: str = None) -> dict:
+    # get the default instance if not provided. Other instance needed for streaming.
+    a2f_instance = a2f_instance or DEFAULT_A2E_INSTANCE
+
+    return {
+        "a2f_instance": a2f_instance,
+        "frame": frame,
+        "as_timestamp": as_timestamp
+    }
+
+
+def _forget_state(client) -> tuple:
+    last_state = client.server_state.last_known()
+    client.invalidate_state()
+    return tuple(last_state[k] for k in ("scene", "root_path", "track", "a2e_settings", "emotion"))
+
+
+def _forget_scene_state(client):
+    # a new scene comes with its own player and a2e instances
+    state = client.server_state
+    state.root_path = state.track = state.a2e_settings = state.emotion = None
+
+
 class _A2FGeneral:
     def get_scene(self: a2f.Audio2Face):
         return self.make_request("A2F/GetInstances")
 
     def load_scene(self: a2f.Audio2Face, usd_file_path: str = ""):
+        if self.server_state.scene == usd_file_path:
+            return
+
         # check if the scene is already loaded
         scene = self.get_scene()
         if usd_file_path in scene:
+            self.loaded_scene = usd_file_path
             return
 
         # load scene from file
         print(f"load scene {usd_file_path}")
-        payload = {
-            "file_name": usd_file_path
-        }
-
-        resp = self.post("A2F/USD/Load", payload)
+        resp = self.post("A2F/USD/Load", _load_scene_payload(usd_file_path))
+        self.metrics.inc("scene_loads")
         self.loaded_scene = usd_file_path
+        _forget_scene_state(self)
         return resp
 
     def set_frame(self: a2f.Audio2Face, frame: int, as_timestamp: bool = False, a2f_instance: str = None):
-        # get the default instance if not provided. Other instance needed for streaming.
-        a2f_instance = a2f_instance or DEFAULT_A2E_INSTANCE
+        self.post("A2F/Player/SetFrame", _set_frame_payload(frame, as_timestamp, a2f_instance))
+
+    def resync(self: a2f.Audio2Face):
+        """
+        Push the state of the client to the server again, for example after the server was restarted.
+        Reloads the scene and re-applies the root path, track, A2E settings and emotion that were last set.
+        """
+        scene, root_path, track, a2e_settings, emotion = _forget_state(self)
+
+        if scene is not None:
+            self.load_scene(scene)
+        if root_path is not None:
+            self.set_root_path(root_path)
+        if track is not None and os.path.isfile(track[0]):
+            self.set_track(track[0])
+        if a2e_settings is not None:
+            self._post_a2e_settings(a2e_settings)
+        if emotion is not None:
+            self._post_emotion(emotion)
+
+
+class _A2FGeneralAsync:
+    async def get_scene(self: async_a2f.AsyncAudio2Face):
+        return await self.make_request("A2F/GetInstances")
+
+    async def load_scene(self: async_a2f.AsyncAudio2Face, usd_file_path: str = ""):
+        if self.server_state.scene == usd_file_path:
+            return
+
+        # check if the scene is already loaded
+        scene = await self.get_scene()
+        if usd_file_path in scene:
+            self.loaded_scene = usd_file_path
+            return
+
+        # load scene from file
+        print(f"load scene {usd_file_path}")
+        resp = await self.post("A2F/USD/Load", _load_scene_payload(usd_file_path))
+        self.metrics.inc("scene_loads")
+        self.loaded_scene = usd_file_path
+        _forget_scene_state(self)
+        return resp
+
+    async def set_frame(
+            self: async_a2f.AsyncAudio2Face, frame: int, as_timestamp: bool = False, a2f_instance: str = None
+    ):
+        await self.post("A2F/Player/SetFrame", _set_frame_payload(frame, as_timestamp, a2f_instance))
 
-        payload = {
-          "a2f_instance": a2f_instance,
-          "frame": frame,
-          "as_timestamp": as_timestamp
-        }
+    async def resync(self: async_a2f.AsyncAudio2Face):
+        """
+        Push the state of the client to the server again. See Audio2Face.resync
+        """
+        scene, root_path, track, a2e_settings, emotion = _forget_state(self)
 
-        self.post("A2F/Player/SetFrame", payload)
\ No newline at end of file
+        if scene is not None:
+            await self.load_scene(scene)
+        if root_path is not None:
+            await self.set_root_path(root_path)
+        if track is not None and os.path.isfile(track[0]):
+            await self.set_track(track[0])
+        if a2e_settings is not None:
+            await self._post_a2e_settings(a2e_settings)
+        if emotion is not None:
+            await self._post_emotion(emotion)
@@ -0,0 +1,102 @@
+"""
+Progress manifest of audio2face_folder runs.
+Every processed input gets a json line in the output folder with its content hash, the settings, the output path and
+the status. A rerun skips inputs whose output is done and up to date, and processes only new, changed or failed ones.
+"""
+import json
+import os
+import threading
+import time
+
+from py_audio2face.settings import MANIFEST_FILE_NAME
+from py_audio2face.utils import file_hash, get_export_file_path
+
+
+def animation_settings(client, fps: int, emotion: bool, format: str = "usd") -> dict:
+    """ Everything besides the audio that changes the exported animation. """
+    settings = {
+        "fps": fps,
+        "format": format,
+        "emotion": bool(emotion),
+        # the A2E settings only matter if the emotion keys are generated
+        "a2e_settings": client.a2e_settings if emotion else None,
+        "emotion_vector": client.server_state.emotion,
+    }
+    # normalize tuples and number types the same way they come back from the file
+    return json.loads(json.dumps(settings, sort_keys=True))
+
+
+class A2FManifest:
+    def __init__(self, output_folder: str, file_name: str = MANIFEST_FILE_NAME):
+        """
+        :param output_folder: the manifest is kept in this folder, next to the animations.
+        """
+        os.makedirs(output_folder, exist_ok=True)
+        self.path = os.path.join(output_folder, file_name)
+        self.entries = {}  # absolute input path -> last record
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # the last line of a run that crashed while writing
+                    continue
+                self.entries[record["input"]] = record
+
+    def content_hash(self, input_path: str) -> str:
+        """ Hash of the file. Not read again if size and modification time are unchanged since the last record. """
+        input_path = os.path.abspath(input_path)
+        stat = os.stat(input_path)
+        record = self.entries.get(input_path)
+        if record is not None and record.get("size") == stat.st_size and record.get("mtime_ns") == stat.st_mtime_ns:
+            return record["hash"]
+        return file_hash(input_path)
+
+    def is_done(self, input_path: str, settings: dict, output_path: str) -> bool:
+        """ True if the input was processed with the same content and settings and the output file still exists. """
+        input_path = os.path.abspath(input_path)
+        record = self.entries.get(input_path)
+        if record is None or record["status"] != "done":
+            return False
+        if record["settings"] != settings or record["output"] != os.path.abspath(output_path):
+            return False
+        if not os.path.isfile(get_export_file_path(record["output"], settings.get("format", "usd"))):
+            return False
+        return record["hash"] == self.content_hash(input_path)
+
+    def record(self, input_path: str, settings: dict, output_path: str, status: str):
+        """ Append the result of an input. status is "done" or "failed". """
+        input_path = os.path.abspath(input_path)
+        stat = os.stat(input_path)
+        record = {
+            "input": input_path,
+            "hash": self.content_hash(input_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "settings": settings,
+            "output": os.path.abspath(output_path),
+            "status": status,
+            "time": time.time(),
+        }
+        line = json.dumps(record, sort_keys=True) + "\n"
+        with self._lock:
+            self.entries[input_path] = record
+            # a line per input and flushed at once, so that a crash loses at most the current file
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def compact(self):
+        """ Rewrite the manifest with only the last record of every input. """
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in self.entries.values():
+                    f.write(json.dumps(record, sort_keys=True) + "\n")
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,170 @@
+"""
+Built-in instrumentation for the Audio2Face clients.
+Every REST route and gRPC call is recorded with count, error count and a latency histogram.
+Other components add counters and gauges to the same registry. Snapshots can be exported as json or
+in the prometheus text format.
+"""
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from py_audio2face.settings import DEFAULT_LATENCY_BUCKETS, DEFAULT_LATENCY_SAMPLES
+
+
+class _LatencySeries:
+    def __init__(self, buckets: tuple, max_samples: int):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.errors = 0
+        self.sum = 0.0
+        self.max = 0.0
+        # recent samples for the percentiles
+        self.samples = deque(maxlen=max_samples)
+
+    def observe(self, seconds: float, error: bool = False):
+        self.count += 1
+        self.errors += int(error)
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+        for i, upper in enumerate(self.buckets):
+            if seconds <= upper:
+                self.bucket_counts[i] += 1
+                break
+
+    def percentile(self, q: float):
+        if len(self.samples) == 0:
+            return None
+        ordered = sorted(self.samples)
+        index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+def _prometheus_escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class A2FMetrics:
+    def __init__(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS, max_samples: int = DEFAULT_LATENCY_SAMPLES):
+        """
+        :param buckets: Upper bounds in seconds of the latency histogram buckets.
+        :param max_samples: Number of recent samples per route that are kept to compute p50/p95/p99.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe(self, route: str, seconds: float, error: bool = False):
+        """ Record one call of a REST route or gRPC method. """
+        with self._lock:
+            series = self.latencies.get(route)
+            if series is None:
+                series = self.latencies[route] = _LatencySeries(self.buckets, self.max_samples)
+            series.observe(seconds, error)
+
+    @contextmanager
+    def time(self, route: str):
+        """ Record the duration of the with block. Exceptions are counted as errors. """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(route, time.perf_counter() - start, error=True)
+            raise
+        self.observe(route, time.perf_counter() - start)
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def percentile(self, route: str, q: float):
+        with self._lock:
+            series = self.latencies.get(route)
+            return series.percentile(q) if series is not None else None
+
+    def reset(self):
+        with self._lock:
+            self.latencies.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "routes": {route: series.to_dict() for route, series in self.latencies.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "a2f") -> str:
+        """ Snapshot in the prometheus text exposition format. """
+        lines = []
+        with self._lock:
+            latencies = list(self.latencies.items())
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+
+            if latencies:
+                name = f"{prefix}_request_duration_seconds"
+                lines.append(f"# HELP {name} Latency of Audio2Face REST routes and gRPC calls.")
+                lines.append(f"# TYPE {name} histogram")
+                for route, series in latencies:
+                    label = f'route="{_prometheus_escape(route)}"'
+                    cumulative = 0
+                    for upper, count in zip(series.buckets, series.bucket_counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{label},le="{upper}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{label},le="+Inf"}} {series.count}')
+                    lines.append(f"{name}_sum{{{label}}} {series.sum}")
+                    lines.append(f"{name}_count{{{label}}} {series.count}")
+
+                name = f"{prefix}_request_latency_quantile_seconds"
+                lines.append(f"# HELP {name} Latency percentiles over the recent calls.")
+                lines.append(f"# TYPE {name} gauge")
+                for route, series in latencies:
+                    label = f'route="{_prometheus_escape(route)}"'
+                    for q in (50, 95, 99):
+                        value = series.percentile(q)
+                        if value is not None:
+                            lines.append(f'{name}{{{label},quantile="{q / 100}"}} {value}')
+
+                name = f"{prefix}_request_errors_total"
+                lines.append(f"# HELP {name} Failed Audio2Face REST routes and gRPC calls.")
+                lines.append(f"# TYPE {name} counter")
+                for route, series in latencies:
+                    lines.append(f'{name}{{route="{_prometheus_escape(route)}"}} {series.errors}')
+
+        for counter, value in sorted(counters.items()):
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            lines.append(f"{prefix}_{counter}_total {value}")
+        for gauge, value in sorted(gauges.items()):
+            lines.append(f"# TYPE {prefix}_{gauge} gauge")
+            lines.append(f"{prefix}_{gauge} {value}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,270 @@
+"""
+Real time pacing of streamed audio.
+Without pacing the gRPC send path pulls the chunks from the producer itself: a slow TTS engine stalls the stream and
+a fast one pushes minutes of audio at once. The pacer runs the producer on its own thread (or task) and hands the
+chunks over in a buffer that is bounded in seconds of audio. The producer blocks while the buffer is full and the
+sender releases the chunks at a multiple of real time, a fixed lead ahead of the playback.
+"""
+import threading
+import time
+from collections import deque
+
+from py_audio2face.settings import (
+    DEFAULT_STREAM_REALTIME_FACTOR, DEFAULT_STREAM_BUFFER_SECONDS, DEFAULT_STREAM_LEAD_SECONDS
+)
+
+_FLOAT32_BYTES = 4
+
+
+def chunk_seconds(chunk, samplerate: int) -> float:
+    """ Duration of a chunk. Bytes are float32 samples, like they are sent to the player. """
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        return len(chunk) / _FLOAT32_BYTES / samplerate
+    return chunk.shape[0] / samplerate
+
+
+class A2FPacingStats:
+    """ What happened in the buffer during one paced stream. """
+
+    def __init__(self):
+        self.chunks = 0
+        self.audio_seconds = 0.0
+        self.duration = 0.0  # seconds from the start of the stream until the last chunk was sent
+        self.underruns = 0  # times the player ran dry, because the sender had to wait for the producer
+        self.underrun_seconds = 0.0  # estimated time the player was out of audio
+        self.producer_blocked_seconds = 0.0  # time the producer waited for space in the buffer
+        self.max_buffer_seconds = 0.0
+        self._buffer_seconds_sum = 0.0
+
+    @property
+    def mean_buffer_seconds(self) -> float:
+        """ Average audio in the buffer when a chunk was sent. """
+        return self._buffer_seconds_sum / self.chunks if self.chunks else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "chunks": self.chunks,
+            "audio_seconds": self.audio_seconds,
+            "duration": self.duration,
+            "underruns": self.underruns,
+            "underrun_seconds": self.underrun_seconds,
+            "producer_blocked_seconds": self.producer_blocked_seconds,
+            "max_buffer_seconds": self.max_buffer_seconds,
+            "mean_buffer_seconds": self.mean_buffer_seconds,
+        }
+
+
+class _PacingBuffer:
+    """ Chunks between producer and sender. Not synchronized itself, the callers hold a condition. """
+
+    def __init__(self, capacity_seconds: float):
+        self.capacity_seconds = capacity_seconds
+        self.chunks = deque()  # (chunk, seconds)
+        self.seconds = 0.0
+        self.done = False  # the producer is exhausted or failed
+        self.closed = False  # the sender stopped, the producer should stop, too
+
+    def has_space(self, seconds: float) -> bool:
+        # a chunk longer than the capacity is let through when the buffer is empty, otherwise it would block forever
+        return not self.chunks or self.seconds + seconds <= self.capacity_seconds
+
+    def put(self, chunk, seconds: float):
+        self.chunks.append((chunk, seconds))
+        self.seconds += seconds
+
+    def take(self):
+        chunk, seconds = self.chunks.popleft()
+        self.seconds -= seconds
+        return chunk, seconds
+
+
+class A2FStreamPacer:
+    def __init__(
+            self,
+            realtime_factor: float = DEFAULT_STREAM_REALTIME_FACTOR,
+            buffer_seconds: float = DEFAULT_STREAM_BUFFER_SECONDS,
+            lead_seconds: float = DEFAULT_STREAM_LEAD_SECONDS
+    ):
+        """
+        Decouples the audio producer from the gRPC stream and paces the sending.
+        Pass it as pacer to stream_audio. Use one pacer per concurrent stream, it keeps the stats of its last stream.
+        :param realtime_factor: audio seconds sent per second. None or 0 sends as fast as the buffer fills.
+        :param buffer_seconds: audio the producer may run ahead of the sender before it is blocked.
+        :param lead_seconds: audio sent right away, before the pacing starts. The player stays this far ahead.
+        """
+        self.realtime_factor = realtime_factor
+        self.buffer_seconds = buffer_seconds
+        self.lead_seconds = lead_seconds
+        self.stats = A2FPacingStats()
+        self.error = None  # exception of the producer in the last stream
+
+    def _due(self, clock_start: float, sent_seconds: float) -> float:
+        """ perf_counter time at which the audio after sent_seconds may be sent """
+        if not self.realtime_factor:
+            return clock_start
+        return clock_start + max(0.0, sent_seconds - self.lead_seconds) / self.realtime_factor
+
+    def _dry_seconds(self, clock_start: float, sent_seconds: float, now: float) -> float:
+        """
+        How long the player was out of audio, if the next chunk is sent now.
+        It plays what was sent in real time, so it runs dry lead_seconds / realtime_factor after the chunk was due.
+        """
+        if not self.realtime_factor:
+            return 0.0
+        return max(0.0, now - self._due(clock_start, sent_seconds) - self.lead_seconds / self.realtime_factor)
+
+    def _record_wait(self, clock_start: float, sent_seconds: float) -> float:
+        """
+        Records an underrun if the sender waited for the producer so long that the player ran dry.
+        :return: the new clock start. The dry time is taken out of the schedule, so that the sender refills the lead
+            but does not burst further ahead.
+        """
+        dry = self._dry_seconds(clock_start, sent_seconds, time.perf_counter())
+        if dry > 0:
+            self.stats.underruns += 1
+            self.stats.underrun_seconds += dry
+        return clock_start + dry
+
+    def _record_take(self, buffer: _PacingBuffer, seconds: float):
+        stats = self.stats
+        occupancy = buffer.seconds + seconds
+        stats.chunks += 1
+        stats.audio_seconds += seconds
+        stats.max_buffer_seconds = max(stats.max_buffer_seconds, occupancy)
+        stats._buffer_seconds_sum += occupancy
+
+    def stream(self, audio_stream, samplerate: int):
+        """
+        Paces a stream. The audio_stream is consumed on a producer thread.
+        :return: generator of the chunks, released at the pace
+        """
+        self.stats = stats = A2FPacingStats()
+        self.error = None
+        buffer = _PacingBuffer(self.buffer_seconds)
+        condition = threading.Condition()
+
+        def produce():
+            try:
+                for chunk in audio_stream:
+                    seconds = chunk_seconds(chunk, samplerate)
+                    with condition:
+                        if not buffer.has_space(seconds) and not buffer.closed:
+                            blocked = time.perf_counter()
+                            condition.wait_for(lambda: buffer.has_space(seconds) or buffer.closed)
+                            stats.producer_blocked_seconds += time.perf_counter() - blocked
+                        if buffer.closed:
+                            return
+                        buffer.put(chunk, seconds)
+                        condition.notify_all()
+            except Exception as e:
+                self.error = e
+            finally:
+                with condition:
+                    buffer.done = True
+                    condition.notify_all()
+
+        threading.Thread(target=produce, name="a2f-stream-producer", daemon=True).start()
+
+        start = clock_start = time.perf_counter()
+        sent_seconds = 0.0
+        try:
+            while True:
+                delay = self._due(clock_start, sent_seconds) - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                with condition:
+                    waited = not buffer.chunks and not buffer.done
+                    if waited:
+                        condition.wait_for(lambda: buffer.chunks or buffer.done)
+                    if not buffer.chunks:
+                        break
+                    chunk, seconds = buffer.take()
+                    self._record_take(buffer, seconds)
+                    condition.notify_all()
+
+                if not sent_seconds:
+                    # the schedule starts with the first chunk
+                    clock_start = time.perf_counter()
+                elif waited:
+                    clock_start = self._record_wait(clock_start, sent_seconds)
+                yield chunk
+                sent_seconds += seconds
+        finally:
+            stats.duration = time.perf_counter() - start
+            with condition:
+                buffer.closed = True
+                condition.notify_all()
+
+    async def astream(self, audio_stream, samplerate: int):
+        """
+        stream() for asyncio. The audio_stream, async or plain iterable, is consumed in a producer task.
+        :return: async generator of the chunks, released at the pace
+        """
+        import asyncio
+
+        self.stats = stats = A2FPacingStats()
+        self.error = None
+        buffer = _PacingBuffer(self.buffer_seconds)
+        condition = asyncio.Condition()
+
+        async def put(chunk):
+            seconds = chunk_seconds(chunk, samplerate)
+            async with condition:
+                if not buffer.has_space(seconds) and not buffer.closed:
+                    blocked = time.perf_counter()
+                    await condition.wait_for(lambda: buffer.has_space(seconds) or buffer.closed)
+                    stats.producer_blocked_seconds += time.perf_counter() - blocked
+                if buffer.closed:
+                    return False
+                buffer.put(chunk, seconds)
+                condition.notify_all()
+                return True
+
+        async def produce():
+            try:
+                if hasattr(audio_stream, "__aiter__"):
+                    async for chunk in audio_stream:
+                        if not await put(chunk):
+                            return
+                else:
+                    for chunk in audio_stream:
+                        if not await put(chunk):
+                            return
+            except Exception as e:
+                self.error = e
+            finally:
+                async with condition:
+                    buffer.done = True
+                    condition.notify_all()
+
+        producer = asyncio.ensure_future(produce())
+
+        start = clock_start = time.perf_counter()
+        sent_seconds = 0.0
+        try:
+            while True:
+                delay = self._due(clock_start, sent_seconds) - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                async with condition:
+                    waited = not buffer.chunks and not buffer.done
+                    if waited:
+                        await condition.wait_for(lambda: buffer.chunks or buffer.done)
+                    if not buffer.chunks:
+                        break
+                    chunk, seconds = buffer.take()
+                    self._record_take(buffer, seconds)
+                    condition.notify_all()
+
+                if not sent_seconds:
+                    # the schedule starts with the first chunk
+                    clock_start = time.perf_counter()
+                elif waited:
+                    clock_start = self._record_wait(clock_start, sent_seconds)
+                yield chunk
+                sent_seconds += seconds
+        finally:
+            stats.duration = time.perf_counter() - start
+            buffer.closed = True
+            if not producer.done():
+                producer.cancel()
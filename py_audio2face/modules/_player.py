@@ -1,38 +1,78 @@
 from __future__ import annotations  # avoid circular import with import py_audio2face
 import py_audio2face.audio2face as a2f
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import py_audio2face.async_audio2face as async_a2f
 
 import os
 from py_audio2face.settings import DEFAULT_PLAYER_INSTANCE
+from py_audio2face.modules._state import is_ok_response, track_key
 
 
+def _root_path_payload(sounds_folder: str) -> dict:
+    # if is a file, get the folder
+    if os.path.isfile(sounds_folder):
+        sounds_folder = os.path.dirname(sounds_folder)
+
+    # fix relative paths
+    if not os.path.isabs(sounds_folder):
+        sounds_folder = os.path.join(os.getcwd(), sounds_folder)
+
+    return {
+        "a2f_player": DEFAULT_PLAYER_INSTANCE,
+        "dir_path": sounds_folder
+    }
+
+
+def _track_payload(input_sound_path: str) -> dict:
+    if not os.path.isfile(input_sound_path):
+        raise FileNotFoundError(f"File {input_sound_path} doesn't exist")
+
+    return {
+        "a2f_player": DEFAULT_PLAYER_INSTANCE,
+        "file_name": os.path.basename(input_sound_path),
+        "time_range": [0, -1]
+    }
+
 
 class _A2FPlayer:
     def set_root_path(self: a2f.Audio2Face, sounds_folder):
+        payload = _root_path_payload(sounds_folder)
+        if self.server_state.root_path == payload["dir_path"]:
+            return
 
-        # if is a file, get the folder
-        if os.path.isfile(sounds_folder):
-            sounds_folder = os.path.dirname(sounds_folder)
+        response = self.post("A2F/Player/SetRootPath", payload=payload)
+        # the server resolves the track relative to the root path. Changing it invalidates the track.
+        self.server_state.track = None
+        if is_ok_response(response):
+            self.server_state.root_path = payload["dir_path"]
 
-        # fix relative paths
-        if not os.path.isabs(sounds_folder):
-            sounds_folder = os.path.join(os.getcwd(), sounds_folder)
+    def set_track(self: a2f.Audio2Face, input_sound_path: str):
+        payload = _track_payload(input_sound_path)
+        key = track_key(input_sound_path)
+        if self.server_state.track == key:
+            return
 
-        payload = {
-            "a2f_player": DEFAULT_PLAYER_INSTANCE,
-            "dir_path": sounds_folder
-        }
+        response = self.post("A2F/Player/SetTrack", payload=payload)
+        self.server_state.track = key if is_ok_response(response) else None
 
-        self.post("A2F/Player/SetRootPath", payload=payload)
 
-    def set_track(self: a2f.Audio2Face, input_sound_path: str):
-        if not os.path.isfile(input_sound_path):
-            raise FileNotFoundError(f"File {input_sound_path} doesn't exist")
+class _A2FPlayerAsync:
+    async def set_root_path(self: async_a2f.AsyncAudio2Face, sounds_folder):
+        payload = _root_path_payload(sounds_folder)
+        if self.server_state.root_path == payload["dir_path"]:
+            return
 
-        payload = {
-            "a2f_player": DEFAULT_PLAYER_INSTANCE,
-            "file_name": os.path.basename(input_sound_path),
-            "time_range": [0, -1]
-        }
+        response = await self.post("A2F/Player/SetRootPath", payload=payload)
+        self.server_state.track = None
+        if is_ok_response(response):
+            self.server_state.root_path = payload["dir_path"]
 
-        self.post("A2F/Player/SetTrack", payload=payload)
+    async def set_track(self: async_a2f.AsyncAudio2Face, input_sound_path: str):
+        payload = _track_payload(input_sound_path)
+        key = track_key(input_sound_path)
+        if self.server_state.track == key:
+            return
 
+        response = await self.post("A2F/Player/SetTrack", payload=payload)
+        self.server_state.track = key if is_ok_response(response) else None
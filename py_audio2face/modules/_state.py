@@ -0,0 +1,86 @@
+"""
+Client side mirror of the state that was last applied to an Audio2Face server.
+The setters of the client compare against the mirror and skip REST calls that would not change anything on the server.
+When the server is restarted or changed by someone else, call invalidate_state() or resync() on the client.
+"""
+import os
+
+from py_audio2face.settings import COMBINED_SCENE_FILE_NAME
+from py_audio2face.utils import get_scene_instance
+
+# returned by setters that were skipped because the server already has the requested state
+SKIPPED_RESPONSE = {"status": "OK", "result": None, "message": "state unchanged, request skipped by client"}
+
+
+def is_ok_response(response) -> bool:
+    """ True if the server accepted the request. Errors of the http client are returned as strings. """
+    return isinstance(response, dict) and response.get("status", "OK") != "ERROR"
+
+
+def track_key(input_sound_path: str) -> tuple:
+    """ Identifies a track by path and file stats so that a changed file with the same name is set again. """
+    stat = os.stat(input_sound_path)
+    return os.path.abspath(input_sound_path), stat.st_mtime_ns, stat.st_size
+
+
+class A2FServerState:
+    FIELDS = ("scene", "root_path", "track", "a2e_settings", "emotion")
+
+    def __init__(self):
+        self.scene = None  # usd file path of the loaded scene
+        self.root_path = None  # dir_path of the player
+        self.track = None  # track_key of the current track
+        self.a2e_settings = None  # dict of the applied A2E settings
+        self.emotion = None  # list of the applied emotion strengths
+        # the state before the last invalidate(). Used by resync() to restore a restarted server.
+        self.previous = {}
+
+    def invalidate(self):
+        """ Forget everything. The next setter calls are sent to the server again. """
+        previous = self.last_known()
+        self.__init__()
+        self.previous = previous
+
+    def last_known(self) -> dict:
+        """ The mirrored state, completed with the values known before the last invalidate(). """
+        current = self.to_dict()
+        return {k: current[k] if current[k] is not None else self.previous.get(k) for k in self.FIELDS}
+
+    def a2e_settings_applied(self, settings: dict) -> bool:
+        if self.a2e_settings is None:
+            return False
+        return all(k in self.a2e_settings and self.a2e_settings[k] == v for k, v in settings.items())
+
+    def apply_a2e_settings(self, settings: dict):
+        self.a2e_settings = {**(self.a2e_settings or {}), **settings}
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.FIELDS}
+
+
+class _A2FServerStateMixin:
+    # shared by Audio2Face and AsyncAudio2Face. The instance needs a "server_state" attribute.
+
+    @property
+    def loaded_scene(self):
+        return self.server_state.scene
+
+    @loaded_scene.setter
+    def loaded_scene(self, value):
+        self.server_state.scene = value
+
+    def scene_instance(self, instance: str, streaming: bool = False) -> str:
+        """
+        Path of an instance of the default or streaming scene in the loaded scene.
+        Changes only in the combined scene, where the streaming instances are under COMBINED_SCENE_STREAMING_ROOT.
+        """
+        scene = self.server_state.scene
+        combined = scene is not None and os.path.basename(scene) == COMBINED_SCENE_FILE_NAME
+        return get_scene_instance(instance, streaming, combined)
+
+    def invalidate_state(self):
+        """
+        Forget the mirrored server state, for example after the server was restarted or modified by another client.
+        Afterwards every setter is sent to the server again. Use resync() to push the client state back immediately.
+        """
+        self.server_state.invalidate()
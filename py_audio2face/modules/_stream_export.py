@@ -0,0 +1,241 @@
+"""
+Recording of streamed audio as blendshape animation.
+While the chunks are sent, a background worker exports the animation in segments: it sets the frame of the streaming
+instance to the end of the previous segment and exports from the streaming solver. The send loop only signals the
+worker and never waits for an export. After the stream the rest is exported and the segments can be merged into one
+take.
+"""
+import json
+import os
+import re
+
+from py_audio2face.settings import DEFAULT_A2E_INSTANCE, DEFAULT_SOLVER_INSTANCE
+from py_audio2face.utils import get_export_file_path
+from py_audio2face.modules._export import _check_export_response, _prepare_output_path
+
+_USDA_TIME_CODE = re.compile(r"(startTimeCode|endTimeCode)\s*=\s*(-?\d+)")
+
+
+def exported_frames(file_path: str, format: str):
+    """ Frames of an export file. None if the file can't be read, e.g. binary usd. """
+    try:
+        if format == "json":
+            with open(file_path) as f:
+                return int(json.load(f)["numFrames"])
+        with open(file_path, errors="ignore") as f:
+            codes = dict(_USDA_TIME_CODE.findall(f.read(4096)))
+        return int(codes["endTimeCode"]) - int(codes["startTimeCode"]) + 1
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def merge_json_exports(segment_files: list, output_file: str) -> str:
+    """ Concatenates blendshape json exports into one file. :return: output_file """
+    merged = None
+    for file_path in segment_files:
+        with open(file_path) as f:
+            segment = json.load(f)
+        if merged is None:
+            merged = segment
+            continue
+        merged["weightMat"].extend(segment["weightMat"])
+        merged["numFrames"] += segment["numFrames"]
+
+    tmp_path = f"{output_file}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(merged, f)
+    os.replace(tmp_path, output_file)
+    return output_file
+
+
+class A2FStreamExporter:
+    def __init__(
+            self,
+            output_path: str,
+            every_chunks: int = 50,
+            fps: int = 60,
+            format: str = "json",
+            merge: bool = False
+    ):
+        """
+        Records the animation of a stream. Pass it as exporter to stream_audio.
+        :param output_path: segment i is written to <output_path>_<i>.<format>, the merged take to output_path.
+        :param every_chunks: export a segment after this many sent chunks. If an export takes longer, the next
+            segment waits for it and covers more chunks.
+        :param fps: frames per second of the animation.
+        :param format: "json" or "usd". Only json segments can be merged.
+        :param merge: merge the segments into one take after the stream.
+        """
+        if every_chunks <= 0:
+            raise ValueError("every_chunks must be positive")
+        if merge and format != "json":
+            raise ValueError("only json exports can be merged")
+        self.output_path = output_path
+        self.every_chunks = every_chunks
+        self.fps = fps
+        self.format = format
+        self.merge = merge
+
+        self.files = []  # segment files of the last stream
+        self.take = None  # merged file of the last stream
+        self.errors = []  # failed segment exports of the last stream
+        self._sent_chunks = 0
+        self._sent_seconds = 0.0
+        self._next_frame = 0
+
+    def _reset(self):
+        self.output_path = _prepare_output_path(self.output_path)
+        self.files, self.take, self.errors = [], None, []
+        self._sent_chunks = 0
+        self._sent_seconds = 0.0
+        self._next_frame = 0
+
+    def _chunk_sent(self, seconds: float) -> bool:
+        """ :return: True if a segment is due """
+        self._sent_chunks += 1
+        self._sent_seconds += seconds
+        return self._sent_chunks % self.every_chunks == 0
+
+    def _segment(self, client) -> tuple:
+        """ :return: (output_path, A2E instance, solver instance) of the next segment """
+        output_path = f"{self.output_path}_{len(self.files) + len(self.errors):04d}"
+        a2f_instance = client.scene_instance(DEFAULT_A2E_INSTANCE, streaming=True)
+        solver_instance = client.scene_instance(DEFAULT_SOLVER_INSTANCE, streaming=True)
+        return output_path, a2f_instance, solver_instance
+
+    def _record(self, output_path: str, response, sent_seconds: float):
+        if not _check_export_response(response):
+            self.errors.append(output_path)
+            return
+        export_file = get_export_file_path(output_path, self.format)
+        frames = exported_frames(export_file, self.format)
+        if frames is None:
+            # the server did not write a readable file, the end is estimated from the sent audio
+            frames = max(0, round(sent_seconds * self.fps) - self._next_frame)
+        if frames == 0:
+            # nothing new since the last segment
+            if os.path.isfile(export_file):
+                os.remove(export_file)
+            return
+        self.files.append(export_file)
+        self._next_frame += frames
+
+    def _finish(self):
+        if self.merge and self.files:
+            self.take = merge_json_exports(self.files, get_export_file_path(self.output_path, self.format))
+
+    def _export_segment(self, client, sent_seconds: float):
+        output_path, a2f_instance, solver_instance = self._segment(client)
+        try:
+            client.set_frame(self._next_frame, a2f_instance=a2f_instance)
+            response = client.export_blend_shape(
+                output_path, fps=self.fps, format=self.format, solver_instance=solver_instance
+            )
+        except Exception as e:
+            print(f"Exporting stream segment {output_path} failed: {e}")
+            self.errors.append(output_path)
+            return
+        self._record(output_path, response, sent_seconds)
+        client.metrics.inc("stream_export_segments")
+
+    async def _export_segment_async(self, client, sent_seconds: float):
+        output_path, a2f_instance, solver_instance = self._segment(client)
+        try:
+            await client.set_frame(self._next_frame, a2f_instance=a2f_instance)
+            response = await client.export_blend_shape(
+                output_path, fps=self.fps, format=self.format, solver_instance=solver_instance
+            )
+        except Exception as e:
+            print(f"Exporting stream segment {output_path} failed: {e}")
+            self.errors.append(output_path)
+            return
+        self._record(output_path, response, sent_seconds)
+        client.metrics.inc("stream_export_segments")
+
+    def start(self, client):
+        """ Starts the worker thread for a stream of the blocking client. :return: _ExportWorker """
+        self._reset()
+        return _ExportWorker(self, client)
+
+    def start_async(self, client):
+        """ Starts the worker task for a stream of the asyncio client. :return: _AsyncExportWorker """
+        self._reset()
+        return _AsyncExportWorker(self, client)
+
+
+class _ExportWorker:
+    def __init__(self, exporter: A2FStreamExporter, client):
+        import queue
+        import threading
+        self.exporter = exporter
+        self.client = client
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="a2f-stream-export", daemon=True)
+        self.thread.start()
+
+    def chunk_sent(self, seconds: float):
+        if self.exporter._chunk_sent(seconds):
+            self.queue.put(self.exporter._sent_seconds)
+
+    def _run(self):
+        import queue
+        while True:
+            sent_seconds = self.queue.get()
+            done = sent_seconds is None
+            # segments that queued up while an export ran are exported as one, also the one queued before finish()
+            try:
+                while not done:
+                    queued = self.queue.get_nowait()
+                    done = queued is None
+                    sent_seconds = sent_seconds if done else queued
+            except queue.Empty:
+                pass
+            if sent_seconds is not None:
+                self.exporter._export_segment(self.client, sent_seconds)
+            if done:
+                return
+
+    def finish(self, export_rest: bool = True):
+        """ Exports the rest after the stream and merges the segments. Waits for the worker. """
+        self.queue.put(None)
+        self.thread.join()
+        if export_rest:
+            self.exporter._export_segment(self.client, self.exporter._sent_seconds)
+            self.exporter._finish()
+
+
+class _AsyncExportWorker:
+    def __init__(self, exporter: A2FStreamExporter, client):
+        import asyncio
+        self.exporter = exporter
+        self.client = client
+        self.queue = asyncio.Queue()
+        self.task = asyncio.ensure_future(self._run())
+
+    def chunk_sent(self, seconds: float):
+        if self.exporter._chunk_sent(seconds):
+            self.queue.put_nowait(self.exporter._sent_seconds)
+
+    async def _run(self):
+        import asyncio
+        while True:
+            sent_seconds = await self.queue.get()
+            done = sent_seconds is None
+            try:
+                while not done:
+                    queued = self.queue.get_nowait()
+                    done = queued is None
+                    sent_seconds = sent_seconds if done else queued
+            except asyncio.QueueEmpty:
+                pass
+            if sent_seconds is not None:
+                await self.exporter._export_segment_async(self.client, sent_seconds)
+            if done:
+                return
+
+    async def finish(self, export_rest: bool = True):
+        self.queue.put_nowait(None)
+        await self.task
+        if export_rest:
+            await self.exporter._export_segment_async(self.client, self.exporter._sent_seconds)
+            self.exporter._finish()
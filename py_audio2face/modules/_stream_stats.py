@@ -0,0 +1,157 @@
+"""
+Instrumentation of single streaming calls.
+Every call of stream_audio records when the channel was ready, when the start marker and the first chunk were handed
+to gRPC, the intervals between the chunks, how long the send loop waited for the producer and when the player would
+have run out of audio. The stats are kept in client.last_stream_stats and summarized in the client metrics.
+"""
+import time
+from collections import deque
+
+from py_audio2face.settings import DEFAULT_LATENCY_SAMPLES
+
+# a player with less audio than this is not counted as stalled, it absorbs timer noise
+_STALL_TOLERANCE = 0.001
+
+
+class A2FStreamStats:
+    """ Timings of one streaming call. All points in time are seconds since the call started. """
+
+    def __init__(self, instance_name: str = None, samplerate: int = None):
+        self._started = time.perf_counter()
+        self.instance_name = instance_name
+        self.samplerate = samplerate
+        self.success = False
+        self.message = ""  # message of the server response or of the error
+        self.error = None  # exception of the call
+
+        self.channel_ready = None  # the pooled channel was ready
+        self.start_marker = None  # the start marker was handed to gRPC
+        self.first_chunk = None  # the first audio chunk was handed to gRPC
+        self.end_of_audio = None  # the producer was exhausted
+        self.duration = None  # the call returned
+
+        self.chunks = 0
+        self.bytes = 0
+        self.audio_seconds = 0.0
+        self.producer_wait_seconds = 0.0  # the send loop waited for the next chunk of the producer
+        self.stalls = 0  # times the player ran out of audio, assuming it plays from the first chunk on
+        self.stall_seconds = 0.0
+        self.interval_max = 0.0
+        self.intervals = deque(maxlen=DEFAULT_LATENCY_SAMPLES)  # recent send intervals between the chunks
+
+        self._last_chunk = None
+        self._playhead_start = None  # when the player would have started the audio sent so far without stalls
+
+    def __bool__(self):
+        return self.success
+
+    @property
+    def send_seconds(self) -> float:
+        """ From the start marker until the producer was exhausted """
+        if self.start_marker is None or self.end_of_audio is None:
+            return 0.0
+        return self.end_of_audio - self.start_marker
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.send_seconds if self.send_seconds > 0 else None
+
+    @property
+    def realtime_factor(self):
+        """ Audio seconds sent per second. Below 1.0 the producer or the network can't keep up with the playback. """
+        return self.audio_seconds / self.send_seconds if self.send_seconds > 0 else None
+
+    @property
+    def interval_mean(self):
+        return sum(self.intervals) / len(self.intervals) if self.intervals else None
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def _on_channel_ready(self):
+        self.channel_ready = self._elapsed()
+
+    def _on_start_marker(self):
+        self.start_marker = self._elapsed()
+
+    def _on_chunk(self, producer_wait: float, num_bytes: int):
+        """ A chunk of num_bytes float32 samples is handed to gRPC. producer_wait is the time it took to get it. """
+        now = self._elapsed()
+        if self._last_chunk is None:
+            self.first_chunk = self._playhead_start = now
+        else:
+            interval = now - self._last_chunk
+            self.intervals.append(interval)
+            self.interval_max = max(self.interval_max, interval)
+            # the player plays in real time and stops when the audio sent before this chunk is over
+            dry = (now - self._playhead_start) - self.audio_seconds
+            if dry > _STALL_TOLERANCE:
+                self.stalls += 1
+                self.stall_seconds += dry
+                self._playhead_start += dry
+        self._last_chunk = now
+        self.producer_wait_seconds += producer_wait
+        self.chunks += 1
+        self.bytes += num_bytes
+        self.audio_seconds += num_bytes / 4 / self.samplerate
+
+    def _on_end_of_audio(self):
+        self.end_of_audio = self._elapsed()
+
+    def _on_response(self, response):
+        self.duration = self._elapsed()
+        self.success = response.success
+        self.message = response.message
+
+    def _on_error(self, error: Exception, message: str):
+        self.duration = self._elapsed()
+        self.success = False
+        self.message = message
+        self.error = error
+
+    def to_dict(self) -> dict:
+        return {
+            "instance_name": self.instance_name,
+            "samplerate": self.samplerate,
+            "success": self.success,
+            "message": self.message,
+            "channel_ready": self.channel_ready,
+            "start_marker": self.start_marker,
+            "first_chunk": self.first_chunk,
+            "end_of_audio": self.end_of_audio,
+            "duration": self.duration,
+            "chunks": self.chunks,
+            "bytes": self.bytes,
+            "audio_seconds": self.audio_seconds,
+            "bytes_per_second": self.bytes_per_second,
+            "realtime_factor": self.realtime_factor,
+            "producer_wait_seconds": self.producer_wait_seconds,
+            "stalls": self.stalls,
+            "stall_seconds": self.stall_seconds,
+            "interval_mean": self.interval_mean,
+            "interval_max": self.interval_max,
+        }
+
+    def __repr__(self):
+        return (
+            f"A2FStreamStats({self.instance_name!r}, success={self.success}, chunks={self.chunks}, "
+            f"realtime_factor={self.realtime_factor}, stalls={self.stalls})"
+        )
+
+
+def record_stream_stats(metrics, stats: A2FStreamStats, route: str = "PushAudioStream"):
+    """
+    Adds a finished call to the client metrics
+    :param route: the grpc method of the call, the timings are recorded as its sub routes.
+    """
+    if stats.channel_ready is not None:
+        metrics.observe(f"{route}/channel_ready", stats.channel_ready)
+    if stats.first_chunk is not None:
+        metrics.observe(f"{route}/first_chunk", stats.first_chunk, error=not stats.success)
+    if stats.realtime_factor is not None:
+        metrics.set_gauge("stream_realtime_factor", stats.realtime_factor)
+    metrics.inc("stream_audio_seconds", stats.audio_seconds)
+    metrics.inc("stream_bytes", stats.bytes)
+    metrics.inc("stream_stalls", stats.stalls)
+    metrics.inc("stream_stall_seconds", stats.stall_seconds)
+    metrics.inc("stream_producer_wait_seconds", stats.producer_wait_seconds)
@@ -5,17 +5,159 @@
 
 from __future__ import annotations  # avoid circular import with import py_audio2face
 import py_audio2face.audio2face as a2f
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import py_audio2face.async_audio2face as async_a2f
+    from py_audio2face.modules._audio_processing import A2FAudioPreprocessor
+    from py_audio2face.modules._pacing import A2FStreamPacer
+    from py_audio2face.modules._stream_export import A2FStreamExporter
 
-from py_audio2face.settings import DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, DEFAULT_AUDIO_STREAM_GRPC_PORT
-from typing import Generator, Union
+from py_audio2face.settings import (
+    DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, DEFAULT_AUDIO_STREAM_GRPC_PORT, DEFAULT_UNARY_PUSH_MAX_BYTES,
+    DEFAULT_PUSH_AUDIO_CHUNK_SECONDS, DEFAULT_MEASURE_COMPRESSIONS, DEFAULT_MEASURE_CHUNK_SECONDS
+)
+import time
+from importlib.util import find_spec
+from py_audio2face.modules._stream_stats import A2FStreamStats, record_stream_stats
+from typing import AsyncIterable, Generator, Iterable, Union
 
-try:
-    import grpc
-    import numpy as np
-    from py_audio2face.modules.clients.grpc_stub import audio2face_pb2, audio2face_pb2_grpc
-    streaming_installed = True
-except Exception as e:
-    streaming_installed = False
+
+def _module_installed(name: str) -> bool:
+    try:
+        return find_spec(name) is not None
+    except ImportError:
+        # the parent package is missing
+        return False
+
+
+# grpc, numpy and the protobuf stubs take long to import. They are loaded on the first streaming call.
+streaming_installed = all(_module_installed(m) for m in ("grpc", "numpy", "google.protobuf"))
+grpc = np = audio2face_pb2 = audio2face_pb2_grpc = to_float32 = A2FChunkFramer = None
+
+
+def _check_streaming_installed():
+    global grpc, np, audio2face_pb2, audio2face_pb2_grpc, to_float32, A2FChunkFramer
+    if audio2face_pb2_grpc is not None:
+        return
+    try:
+        import grpc
+        import grpc.aio
+        import numpy as np
+        from py_audio2face.modules._audio_processing import to_float32
+        from py_audio2face.modules._framing import A2FChunkFramer
+        from py_audio2face.modules.clients.grpc_stub import audio2face_pb2, audio2face_pb2_grpc
+    except ImportError:
+        raise ImportError(
+            "py_audio2face[streaming] is not installed. "
+            "Please install it via 'pip install py_audio2face[streaming]'"
+        )
+
+
+def _start_marker_request(samplerate: int, instance_name: str, block_until_playback_is_finished: bool):
+    start_marker = audio2face_pb2.PushAudioRequestStart(
+        samplerate=samplerate,
+        instance_name=instance_name,
+        block_until_playback_is_finished=block_until_playback_is_finished
+    )
+    return audio2face_pb2.PushAudioStreamRequest(start_marker=start_marker)
+
+
+def _is_complete_buffer(audio) -> bool:
+    return isinstance(audio, (np.ndarray, bytes, bytearray, memoryview))
+
+
+def _clip_payload(audio, samplerate: int, preprocessor: A2FAudioPreprocessor):
+    """ A complete clip as float32 bytes at the rate it is sent with. :return: (payload, samplerate) """
+    if preprocessor is not None:
+        chunks = list(preprocessor.stream([audio]))
+        audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+        samplerate = preprocessor.target_samplerate
+    if isinstance(audio, np.ndarray):
+        audio = to_float32(audio).tobytes()
+    return bytes(audio), samplerate
+
+
+def _split_payload(payload: bytes, samplerate: int):
+    """ Chunks of a clip for PushAudioStream """
+    chunk_bytes = max(1, int(samplerate * DEFAULT_PUSH_AUDIO_CHUNK_SECONDS)) * 4
+    return (payload[i:i + chunk_bytes] for i in range(0, len(payload), chunk_bytes))
+
+
+def _push_audio_request(payload: bytes, samplerate: int, instance_name: str, block_until_playback_is_finished: bool):
+    return audio2face_pb2.PushAudioRequest(
+        audio_data=payload,
+        samplerate=samplerate,
+        instance_name=instance_name,
+        block_until_playback_is_finished=block_until_playback_is_finished
+    )
+
+
+def _file_chunks(audio_file: str, chunk_seconds: float, pacer: A2FStreamPacer):
+    """ :return: (chunks, samplerate) of a memory mapped wav file """
+    from py_audio2face.modules._wav import A2FWavReader
+    reader = A2FWavReader(audio_file)
+    chunk_size = max(1, int(reader.samplerate * chunk_seconds))
+    # the pacer holds several chunks in its buffer, they can't share one
+    return reader.chunks(chunk_size, reuse_buffer=pacer is None), reader.samplerate
+
+
+def _chunk_framer(channels, samplerate: int):
+    """ Framer with the minimum message size of the channel pool """
+    min_chunk_seconds = channels.min_chunk_seconds or 0
+    return A2FChunkFramer(min_bytes=int(min_chunk_seconds * samplerate) * 4)
+
+
+def _measurement_clip(seconds: float, samplerate: int):
+    """ A tone with noise. Compresses about like speech, unlike silence. """
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    clip = 0.3 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 0.01, t.shape)
+    return clip.astype(np.float32)
+
+
+def _median(values: list):
+    import statistics
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+def _error_message(error: Exception) -> str:
+    message = error.details() if isinstance(error, grpc.RpcError) and hasattr(error, "details") else str(error)
+    return message or ""
+
+
+def _record_pacing(metrics, pacer: A2FStreamPacer):
+    stats = pacer.stats
+    metrics.inc("stream_underruns", stats.underruns)
+    metrics.set_gauge("stream_buffer_seconds_max", stats.max_buffer_seconds)
+    metrics.set_gauge("stream_buffer_seconds_mean", stats.mean_buffer_seconds)
+
+
+def _finish_paced_stream(metrics, pacer: A2FStreamPacer):
+    """ Records the buffer stats of a paced stream. Raises the error of the producer, which ended the stream. """
+    _record_pacing(metrics, pacer)
+    if pacer.error is not None:
+        raise pacer.error
+
+
+def _abort_paced_stream(metrics, pacer: A2FStreamPacer, audio_stream):
+    """ Closes the paced stream of a failed call, which releases the producer, and records its buffer stats. """
+    try:
+        audio_stream.close()
+    except ValueError:
+        # still consumed by the grpc thread. It is closed when the call drops it.
+        pass
+    _record_pacing(metrics, pacer)
+
+
+async def _abort_paced_stream_async(metrics, pacer: A2FStreamPacer, audio_stream):
+    """ _abort_paced_stream for the async generator of A2FStreamPacer.astream """
+    try:
+        await audio_stream.aclose()
+    except RuntimeError:
+        # still consumed by the grpc task
+        pass
+    _record_pacing(metrics, pacer)
 
 
 class _A2F_streaming:
@@ -25,119 +167,527 @@ class _A2F_streaming:
             audio_stream: Generator[Union[np.ndarray, bytes], None, None],
             samplerate: int,
             block_until_playback_is_finished: bool = True,
-            instance_name: str = DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE,
-            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT
+            instance_name: str = None,
+            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT,
+            preprocessor: A2FAudioPreprocessor = None,
+            pacer: A2FStreamPacer = None,
+            exporter: A2FStreamExporter = None
     ) -> (list, bool):
         """
         Stream audio data to Audio2Face Streaming Audio Player.
 
-        :param audio_stream: Generator yielding audio chunks (numpy arrays or bytes)
+        :param audio_stream: Generator yielding audio chunks (numpy arrays or bytes). A complete clip as one numpy
+            array or bytes object is sent with push_audio.
         :param samplerate: Sampling rate of the audio data
         :param block_until_playback_is_finished: If True, blocks until playback is finished
-        :param instance_name: Prim path of the Audio2Face Streaming Audio Player
+        :param instance_name: Prim path of the Audio2Face Streaming Audio Player. Defaults to the player of the
+            loaded streaming or combined scene.
         :param grpc_port: Port of the gRPC server
+        :param preprocessor: Converts the chunks to mono float32, resamples and rechunks them before sending.
+            samplerate is the rate of the input then.
+        :param pacer: Consumes audio_stream on a producer thread and sends the chunks at a multiple of real time,
+            through a buffer bounded in seconds of audio. The buffer stats are in pacer.stats afterwards.
+        :param exporter: Records the animation while streaming. Segments are exported in the background every few
+            chunks and the rest after the stream. The files are in exporter.files afterwards.
         :return: True if streaming was successful, False otherwise
         """
-        if not streaming_installed:
-            raise ImportError(
-                "py_audio2face[streaming] is not installed. "
-                "Please install it via 'pip install py_audio2face[streaming]'"
+        _check_streaming_installed()
+        if _is_complete_buffer(audio_stream):
+            if exporter is None:
+                return self.push_audio(
+                    audio_stream, samplerate, block_until_playback_is_finished, instance_name, grpc_port,
+                    preprocessor, pacer
+                )
+            payload, samplerate = _clip_payload(audio_stream, samplerate, preprocessor)
+            audio_stream, preprocessor = _split_payload(payload, samplerate), None
+        if preprocessor is not None:
+            audio_stream = preprocessor.stream(audio_stream)
+            samplerate = preprocessor.target_samplerate
+        if pacer is not None:
+            # the preprocessing runs on the producer thread, too
+            audio_stream = pacer.stream(audio_stream, samplerate)
+
+        self.init_a2f(streaming=True)
+        instance_name = instance_name or self.scene_instance(DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, streaming=True)
+        self.last_stream_stats = stats = A2FStreamStats(instance_name, samplerate)
+        # the channel stays open for the next stream
+        channel = self.grpc_channels.get(self.grpc_host, grpc_port)
+        stats._on_channel_ready()
+        export_worker = exporter.start(self) if exporter is not None else None
+
+        framer = _chunk_framer(self.grpc_channels, samplerate)
+
+        def request_generator():
+            # Send start marker
+            stats._on_start_marker()
+            yield _start_marker_request(samplerate, instance_name, block_until_playback_is_finished).SerializeToString()
+
+            # Stream audio data, framed without protobuf objects
+            chunks = iter(audio_stream)
+            producer_wait = 0.0
+            while True:
+                waiting = time.perf_counter()
+                chunk = next(chunks, None)
+                producer_wait += time.perf_counter() - waiting
+                message, num_bytes = framer.frame(chunk) if chunk is not None else framer.flush()
+                if message is not None:
+                    stats._on_chunk(producer_wait, num_bytes)
+                    producer_wait = 0.0
+                    yield message
+                    if export_worker is not None:
+                        export_worker.chunk_sent(num_bytes / 4 / samplerate)
+                if chunk is None:
+                    break
+            stats._on_end_of_audio()
+
+        start = time.perf_counter()
+        try:
+            response = channel.push_audio_stream_raw(request_generator())
+        except Exception as e:
+            self.metrics.observe("PushAudioStream", time.perf_counter() - start, error=True)
+            stats._on_error(e, _error_message(e))
+            record_stream_stats(self.metrics, stats)
+            self.grpc_channels.report_error(channel, e)
+            if export_worker is not None:
+                export_worker.finish(export_rest=False)
+            if pacer is not None:
+                _abort_paced_stream(self.metrics, pacer, audio_stream)
+            raise
+        self.metrics.observe("PushAudioStream", time.perf_counter() - start, error=not response.success)
+        stats._on_response(response)
+        record_stream_stats(self.metrics, stats)
+        if export_worker is not None:
+            export_worker.finish(export_rest=response.success)
+        if pacer is not None:
+            _finish_paced_stream(self.metrics, pacer)
+        return response.success
+
+    def push_audio(
+            self: a2f,
+            audio: Union[np.ndarray, bytes],
+            samplerate: int,
+            block_until_playback_is_finished: bool = True,
+            instance_name: str = None,
+            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT,
+            preprocessor: A2FAudioPreprocessor = None,
+            pacer: A2FStreamPacer = None,
+            max_unary_bytes: int = DEFAULT_UNARY_PUSH_MAX_BYTES
+    ) -> bool:
+        """
+        Sends a complete clip to the Audio2Face Streaming Audio Player.
+        Short clips go in one unary PushAudio call, which saves the start marker and the per chunk framing of
+        PushAudioStream. Longer clips are streamed in chunks, so that the playback starts before all audio arrived.
+
+        :param audio: the clip as numpy array or float32 bytes.
+        :param max_unary_bytes: clips up to this size as float32 are sent with PushAudio. 0 always streams.
+        :param pacer: streams the clip paced, regardless of its size.
+        :return: True if the push was successful, False otherwise
+        See stream_audio for the other parameters.
+        """
+        _check_streaming_installed()
+        payload, samplerate = _clip_payload(audio, samplerate, preprocessor)
+        if pacer is not None or len(payload) > max_unary_bytes:
+            return self.stream_audio(
+                _split_payload(payload, samplerate), samplerate, block_until_playback_is_finished, instance_name,
+                grpc_port, pacer=pacer
             )
 
         self.init_a2f(streaming=True)
-        url = f"localhost:{grpc_port}"
+        instance_name = instance_name or self.scene_instance(DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, streaming=True)
+        self.last_stream_stats = stats = A2FStreamStats(instance_name, samplerate)
+        channel = self.grpc_channels.get(self.grpc_host, grpc_port)
+        stats._on_channel_ready()
+        request = _push_audio_request(payload, samplerate, instance_name, block_until_playback_is_finished)
+        stats._on_chunk(0.0, len(payload))
 
-        with grpc.insecure_channel(url) as channel:
-            stub = audio2face_pb2_grpc.Audio2FaceStub(channel)
+        start = time.perf_counter()
+        try:
+            response = channel.stub.PushAudio(request)
+        except Exception as e:
+            self.metrics.observe("PushAudio", time.perf_counter() - start, error=True)
+            stats._on_error(e, _error_message(e))
+            record_stream_stats(self.metrics, stats, "PushAudio")
+            self.grpc_channels.report_error(channel, e)
+            raise
+        self.metrics.observe("PushAudio", time.perf_counter() - start, error=not response.success)
+        stats._on_response(response)
+        record_stream_stats(self.metrics, stats, "PushAudio")
+        return response.success
 
-            def request_generator():
-                # Send start marker
-                start_marker = audio2face_pb2.PushAudioRequestStart(
-                    samplerate=samplerate,
-                    instance_name=instance_name,
-                    block_until_playback_is_finished=block_until_playback_is_finished
-                )
-                yield audio2face_pb2.PushAudioStreamRequest(start_marker=start_marker)
+    def stream_file(
+            self: a2f,
+            audio_file: str,
+            block_until_playback_is_finished: bool = True,
+            instance_name: str = None,
+            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT,
+            chunk_seconds: float = DEFAULT_PUSH_AUDIO_CHUNK_SECONDS,
+            preprocessor: A2FAudioPreprocessor = None,
+            pacer: A2FStreamPacer = None,
+            exporter: A2FStreamExporter = None
+    ) -> bool:
+        """
+        Streams a wav file to the Audio2Face Streaming Audio Player.
+        The file is memory mapped and converted chunk by chunk, so the memory use does not depend on its length.
+        The sample rate is read from the header.
+
+        :param audio_file: PCM or float wav file.
+        :param chunk_seconds: length of the sent chunks.
+        :param preprocessor: e.g. to resample. Its samplerate must be the one of the file, its channels 1.
+        :return: True if streaming was successful, False otherwise
+        See stream_audio for the other parameters.
+        """
+        _check_streaming_installed()
+        chunks, samplerate = _file_chunks(audio_file, chunk_seconds, pacer)
+        return self.stream_audio(
+            chunks, samplerate, block_until_playback_is_finished, instance_name, grpc_port, preprocessor, pacer,
+            exporter
+        )
 
-                # Stream audio data
-                for i, chunk in enumerate(audio_stream):
-                    if isinstance(chunk, np.ndarray):
-                        chunk = chunk.astype(np.float32).tobytes()
-                    res = audio2face_pb2.PushAudioStreamRequest(audio_data=chunk)
-                    yield res
 
-            response = stub.PushAudioStream(request_generator())
+    def measure_streaming(
+            self: a2f,
+            audio: np.ndarray = None,
+            samplerate: int = 16000,
+            compressions: tuple = DEFAULT_MEASURE_COMPRESSIONS,
+            chunk_seconds: tuple = DEFAULT_MEASURE_CHUNK_SECONDS,
+            source_chunk_seconds: float = 0.02,
+            repeats: int = 3,
+            instance_name: str = None,
+            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT
+    ) -> list:
+        """
+        Streams a clip with every combination of compression and message size and reports what the link achieves.
+        Use it to pick the settings of grpc_channels for a remote player. Each setting gets its own channel, opened
+        before the measured streams. The streams don't wait for the playback, so the numbers are about the transport.
+        The streams are recorded in metrics and last_stream_stats like any other.
+
+        :param audio: mono float32 clip to send, ideally real TTS output: its content decides what compression gains.
+            Defaults to 3 s of a tone with noise.
+        :param samplerate: of the clip.
+        :param compressions: values of A2FGrpcChannelPool(compression=...) to try.
+        :param chunk_seconds: values of A2FGrpcChannelPool(min_chunk_seconds=...) to try.
+        :param source_chunk_seconds: the clip is produced in chunks of this length, like from a TTS engine.
+        :param repeats: streams per setting. The results are medians.
+        :return: a dict per setting with compression, chunk_seconds, bytes_per_second (audio bytes per second of the
+            call), realtime_factor (audio seconds per second of the call), first_chunk_seconds, tail_seconds (from the
+            last sent chunk to the response, about a round trip plus the server) and channel_setup_seconds.
+        """
+        _check_streaming_installed()
+        audio = _measurement_clip(3.0, samplerate) if audio is None else to_float32(audio)
+        source_chunk = max(1, int(source_chunk_seconds * samplerate))
+        chunks = [audio[i:i + source_chunk] for i in range(0, len(audio), source_chunk)]
+        channels = self.grpc_channels
+        results = []
+        try:
+            for compression in compressions:
+                for seconds in chunk_seconds:
+                    self.grpc_channels = channels.replace(compression=compression, min_chunk_seconds=seconds)
+                    # opens the channel of the setting
+                    self.stream_audio(chunks[:1], samplerate, False, instance_name, grpc_port)
+                    setup_seconds = self.last_stream_stats.channel_ready
+                    runs = []
+                    for _ in range(repeats):
+                        self.stream_audio(iter(chunks), samplerate, False, instance_name, grpc_port)
+                        runs.append(self.last_stream_stats)
+                    self.grpc_channels.close()
+                    results.append({
+                        "compression": compression,
+                        "chunk_seconds": seconds,
+                        "bytes_per_second": _median([s.bytes / s.duration for s in runs]),
+                        "realtime_factor": _median([s.audio_seconds / s.duration for s in runs]),
+                        "first_chunk_seconds": _median([s.first_chunk for s in runs]),
+                        "tail_seconds": _median([s.duration - s.end_of_audio for s in runs]),
+                        "channel_setup_seconds": setup_seconds,
+                        "success": all(runs),
+                    })
+        finally:
+            if self.grpc_channels is not channels:
+                self.grpc_channels.close()
+                self.grpc_channels = channels
+        return results
+
+
+class A2FStreamResult:
+    """ Outcome of one stream of stream_many. A failed stream does not cancel the others. """
+
+    def __init__(self, instance_name: str, success: bool = False, message: str = "", error: Exception = None,
+                 seconds: float = 0.0, stats: A2FStreamStats = None):
+        """
+        :param instance_name: prim path of the streaming player.
+        :param success: the success flag of the server response. False if the call raised.
+        :param message: the message of the server response, or of the error.
+        :param error: the exception of the call, e.g. a grpc.RpcError if the server is not reachable.
+        :param seconds: duration of the call.
+        :param stats: A2FStreamStats of the call.
+        """
+        self.instance_name = instance_name
+        self.success = success
+        self.message = message
+        self.error = error
+        self.seconds = seconds
+        self.stats = stats
+
+    def __bool__(self):
+        return self.success
+
+    def __repr__(self):
+        return f"A2FStreamResult({self.instance_name!r}, success={self.success}, message={self.message!r})"
+
+
+class _A2F_streamingAsync:
+    async def _push_audio_stream(
+            self: async_a2f.AsyncAudio2Face,
+            audio_stream,
+            samplerate: int,
+            block_until_playback_is_finished: bool,
+            instance_name: str,
+            grpc_port: int,
+            preprocessor: A2FAudioPreprocessor,
+            pacer: A2FStreamPacer,
+            exporter: A2FStreamExporter = None,
+            stats: A2FStreamStats = None
+    ):
+        """
+        One PushAudioStream call on the pooled grpc.aio channel.
+        :param stats: records the call, a new A2FStreamStats if None. It is kept in last_stream_stats.
+        :return: the server response
+        """
+        if preprocessor is not None:
+            audio_stream = preprocessor.astream(audio_stream)
+            samplerate = preprocessor.target_samplerate
+        if pacer is not None:
+            audio_stream = pacer.astream(audio_stream, samplerate)
+
+        instance_name = instance_name or self.scene_instance(DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, streaming=True)
+        # concurrent streams overwrite last_stream_stats, stream_many keeps the stats of each in its result
+        self.last_stream_stats = stats = stats if stats is not None else A2FStreamStats(instance_name, samplerate)
+        stats.instance_name, stats.samplerate = instance_name, samplerate
+        channel = await self.grpc_channels.get_aio(self.grpc_host, grpc_port)
+        stats._on_channel_ready()
+        export_worker = exporter.start_async(self) if exporter is not None else None
+
+        framer = _chunk_framer(self.grpc_channels, samplerate)
+        producer_wait = 0.0
+
+        def chunk_message(framed: tuple, waiting: float):
+            """ Records a framed chunk. :return: the message, None while chunks are merged """
+            nonlocal producer_wait
+            message, num_bytes = framed
+            producer_wait += time.perf_counter() - waiting
+            if message is not None:
+                stats._on_chunk(producer_wait, num_bytes)
+                producer_wait = 0.0
+                if export_worker is not None:
+                    export_worker.chunk_sent(num_bytes / 4 / samplerate)
+            return message
+
+        async def request_generator():
+            stats._on_start_marker()
+            yield _start_marker_request(samplerate, instance_name, block_until_playback_is_finished).SerializeToString()
+
+            waiting = time.perf_counter()
+            if hasattr(audio_stream, "__aiter__"):
+                async for chunk in audio_stream:
+                    message = chunk_message(framer.frame(chunk), waiting)
+                    if message is not None:
+                        yield message
+                    waiting = time.perf_counter()
+            else:
+                for chunk in audio_stream:
+                    message = chunk_message(framer.frame(chunk), waiting)
+                    if message is not None:
+                        yield message
+                    waiting = time.perf_counter()
+            message = chunk_message(framer.flush(), waiting)
+            if message is not None:
+                yield message
+            stats._on_end_of_audio()
+
+        start = time.perf_counter()
+        try:
+            response = await channel.push_audio_stream_raw(request_generator())
+        except Exception as e:
+            self.metrics.observe("PushAudioStream", time.perf_counter() - start, error=True)
+            stats._on_error(e, _error_message(e))
+            record_stream_stats(self.metrics, stats)
+            self.grpc_channels.report_error(channel, e)
+            if export_worker is not None:
+                await export_worker.finish(export_rest=False)
+            if pacer is not None:
+                await _abort_paced_stream_async(self.metrics, pacer, audio_stream)
+            raise
+        self.metrics.observe("PushAudioStream", time.perf_counter() - start, error=not response.success)
+        stats._on_response(response)
+        record_stream_stats(self.metrics, stats)
+        if export_worker is not None:
+            await export_worker.finish(export_rest=response.success)
+        if pacer is not None:
+            _finish_paced_stream(self.metrics, pacer)
+        return response
+
+    async def stream_audio(
+            self: async_a2f.AsyncAudio2Face,
+            audio_stream: Union[AsyncIterable[Union[np.ndarray, bytes]], Iterable[Union[np.ndarray, bytes]]],
+            samplerate: int,
+            block_until_playback_is_finished: bool = True,
+            instance_name: str = None,
+            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT,
+            preprocessor: A2FAudioPreprocessor = None,
+            pacer: A2FStreamPacer = None,
+            exporter: A2FStreamExporter = None
+    ) -> bool:
+        """
+        Stream audio data to Audio2Face Streaming Audio Player with grpc.aio.
+        Many streams can run concurrently on one event loop.
+
+        :param audio_stream: Async generator or plain iterable yielding audio chunks (numpy arrays or bytes).
+            A plain generator is iterated on the event loop, so it should not block. A complete clip is sent with
+            push_audio.
+        :param samplerate: Sampling rate of the audio data
+        :param block_until_playback_is_finished: If True, the call returns when the playback is finished
+        :param instance_name: Prim path of the Audio2Face Streaming Audio Player
+        :param grpc_port: Port of the gRPC server
+        :param preprocessor: See Audio2Face.stream_audio
+        :param pacer: See Audio2Face.stream_audio. The producer runs as a task on the event loop.
+        :param exporter: See Audio2Face.stream_audio. The segments are exported in a task on the event loop.
+        :return: True if streaming was successful, False otherwise
+        """
+        _check_streaming_installed()
+        if _is_complete_buffer(audio_stream):
+            if exporter is None:
+                return await self.push_audio(
+                    audio_stream, samplerate, block_until_playback_is_finished, instance_name, grpc_port,
+                    preprocessor, pacer
+                )
+            payload, samplerate = _clip_payload(audio_stream, samplerate, preprocessor)
+            audio_stream, preprocessor = _split_payload(payload, samplerate), None
+        await self.init_a2f(streaming=True)
+        response = await self._push_audio_stream(
+            audio_stream, samplerate, block_until_playback_is_finished, instance_name, grpc_port, preprocessor, pacer,
+            exporter
+        )
+        return response.success
+
+    async def push_audio(
+            self: async_a2f.AsyncAudio2Face,
+            audio: Union[np.ndarray, bytes],
+            samplerate: int,
+            block_until_playback_is_finished: bool = True,
+            instance_name: str = None,
+            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT,
+            preprocessor: A2FAudioPreprocessor = None,
+            pacer: A2FStreamPacer = None,
+            max_unary_bytes: int = DEFAULT_UNARY_PUSH_MAX_BYTES
+    ) -> bool:
+        """
+        Sends a complete clip with grpc.aio, unary if it is short. See Audio2Face.push_audio
+        :return: True if the push was successful, False otherwise
+        """
+        _check_streaming_installed()
+        payload, samplerate = _clip_payload(audio, samplerate, preprocessor)
+        await self.init_a2f(streaming=True)
+        if pacer is not None or len(payload) > max_unary_bytes:
+            response = await self._push_audio_stream(
+                _split_payload(payload, samplerate), samplerate, block_until_playback_is_finished, instance_name,
+                grpc_port, None, pacer
+            )
             return response.success
 
-    #def stream_audio(
-    #        self: a2f,
-    #        audio_stream: Generator[Union[np.ndarray, bytes], None, None],
-    #        samplerate: int,
-    #        export_blend_shape_interval: int | None = None,
-    #        export_fps: int = 60,
-    #        export_path: str | None = None,
-    #        export_emotion: bool = False,
-    #        export_format: str = "usd",
-    #        block_until_playback_is_finished: bool = True,
-    #        instance_name: str = DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE,
-    #        grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT
-    #) -> (list, bool):
-    #    """
-    #    Stream audio data to Audio2Face Streaming Audio Player.
-#
-    #    :param audio_stream: Generator yielding audio chunks (numpy arrays or bytes)
-    #    :param samplerate: Sampling rate of the audio data
-    #    :param export_blend_shape_interval: Interval to export blend shapes. If None, no blend shapes are exported
-    #    :param export_fps: FPS of the exported animation
-    #    :param export_path: Path to export the animation
-    #    :param export_emotion: Whether to generate emotion_auto_detect keys from the audio
-    #    :param export_format: Format of the exported animation
-    #    :param block_until_playback_is_finished: If True, blocks until playback is finished
-    #    :param instance_name: Prim path of the Audio2Face Streaming Audio Player
-    #    :param grpc_port: Port of the gRPC server
-    #    :return: True if streaming was successful, False otherwise
-    #    """
-    #    self.init_a2f(streaming=True)
-    #    a2f_instance = utils.get_mark_usd_file_path(streaming=True)
-    #    url = f"localhost:{grpc_port}"
-#
-    #    if export_blend_shape_interval is not None and export_path is None:
-    #        print(f"output path is not provided, using default: {DEFAULT_OUTPUT_DIR}")
-    #        export_path = DEFAULT_OUTPUT_DIR
-#
-    #    generated_blendshapes = []
-    #    with grpc.insecure_channel(url) as channel:
-    #        stub = audio2face_pb2_grpc.Audio2FaceStub(channel)
-#
-    #        def request_generator():
-    #            # Send start marker
-    #            start_marker = audio2face_pb2.PushAudioRequestStart(
-    #                samplerate=samplerate,
-    #                instance_name=instance_name,
-    #                block_until_playback_is_finished=block_until_playback_is_finished
-    #            )
-    #            yield audio2face_pb2.PushAudioStreamRequest(start_marker=start_marker)
-#
-    #            # Stream audio data
-    #            last_export_frame = 0
-    #            for i, chunk in enumerate(audio_stream):
-    #                if isinstance(chunk, np.ndarray):
-    #                    chunk = chunk.astype(np.float32).tobytes()
-    #                res = audio2face_pb2.PushAudioStreamRequest(audio_data=chunk)
-#
-    #                # export blendshapes and clear the buffer if interval
-    #                if export_blend_shape_interval is not None and i % export_blend_shape_interval == 0:
-    #                    self.set_frame(frame=last_export_frame, a2f_instance=a2f_instance, as_timestamp=False)
-    #                    f = self.export(
-    #                        output_path=f"{export_path}_{i}.{export_format}",
-    #                        fps=export_fps, format=export_format, emotion_auto_detect=export_emotion
-    #                    )
-    #                    generated_blendshapes.append(f)
-    #                    last_export_frame = i
-#
-    #                yield res
-#
-    #        response = stub.PushAudioStream(request_generator())
-    #        return generated_blendshapes, response.success
-#
+        instance_name = instance_name or self.scene_instance(DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, streaming=True)
+        self.last_stream_stats = stats = A2FStreamStats(instance_name, samplerate)
+        channel = await self.grpc_channels.get_aio(self.grpc_host, grpc_port)
+        stats._on_channel_ready()
+        request = _push_audio_request(payload, samplerate, instance_name, block_until_playback_is_finished)
+        stats._on_chunk(0.0, len(payload))
+
+        start = time.perf_counter()
+        try:
+            response = await channel.stub.PushAudio(request)
+        except Exception as e:
+            self.metrics.observe("PushAudio", time.perf_counter() - start, error=True)
+            stats._on_error(e, _error_message(e))
+            record_stream_stats(self.metrics, stats, "PushAudio")
+            self.grpc_channels.report_error(channel, e)
+            raise
+        self.metrics.observe("PushAudio", time.perf_counter() - start, error=not response.success)
+        stats._on_response(response)
+        record_stream_stats(self.metrics, stats, "PushAudio")
+        return response.success
+
+    async def stream_file(
+            self: async_a2f.AsyncAudio2Face,
+            audio_file: str,
+            block_until_playback_is_finished: bool = True,
+            instance_name: str = None,
+            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT,
+            chunk_seconds: float = DEFAULT_PUSH_AUDIO_CHUNK_SECONDS,
+            preprocessor: A2FAudioPreprocessor = None,
+            pacer: A2FStreamPacer = None,
+            exporter: A2FStreamExporter = None
+    ) -> bool:
+        """
+        Streams a memory mapped wav file with grpc.aio. See Audio2Face.stream_file
+        The chunks are read on the event loop. Reading from the page cache is fast, a cold file on a slow disk can
+        block the loop for a moment per chunk.
+        :return: True if streaming was successful, False otherwise
+        """
+        _check_streaming_installed()
+        chunks, samplerate = _file_chunks(audio_file, chunk_seconds, pacer)
+        return await self.stream_audio(
+            chunks, samplerate, block_until_playback_is_finished, instance_name, grpc_port, preprocessor, pacer,
+            exporter
+        )
+
+    async def stream_many(
+            self: async_a2f.AsyncAudio2Face,
+            streams: dict,
+            samplerate: int,
+            block_until_playback_is_finished: bool = True,
+            grpc_port: int = DEFAULT_AUDIO_STREAM_GRPC_PORT,
+            preprocessors: dict = None,
+            pacers: dict = None,
+            max_concurrent_streams: int = None
+    ) -> dict:
+        """
+        Streams audio to several streaming players at once, e.g. one per avatar of the scene.
+        All streams share the pooled grpc.aio channel and run as tasks on the running event loop.
+
+        :param streams: instance_name -> async generator or iterable of audio chunks, see stream_audio.
+        :param samplerate: Sampling rate of the audio data
+        :param block_until_playback_is_finished: If True, each call returns when its playback is finished
+        :param grpc_port: Port of the gRPC server
+        :param preprocessors: instance_name -> A2FAudioPreprocessor. They keep state, use one per stream.
+        :param pacers: instance_name -> A2FStreamPacer, one per stream as well.
+        :param max_concurrent_streams: limit of the calls in flight. None starts all at once.
+        :return: instance_name -> A2FStreamResult, in the order of streams
+        """
+        import asyncio
+        _check_streaming_installed()
+        await self.init_a2f(streaming=True)
+        preprocessors = preprocessors or {}
+        pacers = pacers or {}
+        semaphore = asyncio.Semaphore(max_concurrent_streams) if max_concurrent_streams else None
+
+        async def run(instance_name, audio_stream):
+            if semaphore is not None:
+                await semaphore.acquire()
+            start = time.perf_counter()
+            stats = A2FStreamStats(instance_name)
+            try:
+                response = await self._push_audio_stream(
+                    audio_stream, samplerate, block_until_playback_is_finished, instance_name, grpc_port,
+                    preprocessors.get(instance_name), pacers.get(instance_name), stats=stats
+                )
+                result = A2FStreamResult(instance_name, response.success, response.message)
+            except Exception as e:
+                result = A2FStreamResult(instance_name, False, _error_message(e), error=e)
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+            result.seconds = time.perf_counter() - start
+            result.stats = stats
+            self.metrics.inc("streams_succeeded" if result.success else "streams_failed")
+            return result
 
+        results = await asyncio.gather(*(run(name, stream) for name, stream in streams.items()))
+        return {result.instance_name: result for result in results}
@@ -0,0 +1,134 @@
+"""
+Memory mapped reading of PCM wav files for streaming.
+The file is mapped instead of decoded into memory, so streaming an hour long recording needs as much memory as a short
+one. Mono float32 files are handed out as views of the mapping. Other formats are converted block by block into a
+buffer that is reused for every chunk.
+"""
+import mmap
+import struct
+
+import numpy as np
+
+from py_audio2face.modules._audio_processing import to_float32
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format, bits per sample) -> numpy sample type. 24 bit is widened to int32.
+_SAMPLE_TYPES = {
+    (_WAVE_FORMAT_PCM, 8): np.dtype(np.uint8),
+    (_WAVE_FORMAT_PCM, 16): np.dtype("<i2"),
+    (_WAVE_FORMAT_PCM, 24): np.dtype("<i4"),
+    (_WAVE_FORMAT_PCM, 32): np.dtype("<i4"),
+    (_WAVE_FORMAT_IEEE_FLOAT, 32): np.dtype("<f4"),
+    (_WAVE_FORMAT_IEEE_FLOAT, 64): np.dtype("<f8"),
+}
+
+
+class A2FWavReader:
+    def __init__(self, path: str):
+        """
+        Reads the header of a wav file. The samples are read with chunks().
+        :param path: PCM (8, 16, 24, 32 bit) or IEEE float (32, 64 bit) wav file, also in WAVE_FORMAT_EXTENSIBLE.
+        """
+        self.path = path
+        self.format = None
+        self.channels = None
+        self.samplerate = None
+        self.bits_per_sample = None
+        self.data_offset = None
+        self.data_size = None
+        self._read_header()
+
+    @property
+    def frames(self) -> int:
+        return self.data_size // self.block_align
+
+    @property
+    def block_align(self) -> int:
+        return self.channels * self.bits_per_sample // 8
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.samplerate
+
+    def _read_header(self):
+        with open(self.path, "rb") as f:
+            riff = f.read(12)
+            if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+                raise ValueError(f"{self.path} is not a RIFF WAVE file")
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    break
+                chunk_id, size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    self._parse_fmt(f.read(size))
+                    f.seek(size % 2, 1)
+                elif chunk_id == b"data":
+                    self.data_offset = f.tell()
+                    # the size of files that were still being written can be 0 or too large
+                    file_size = f.seek(0, 2)
+                    self.data_size = min(size, file_size - self.data_offset) if size else file_size - self.data_offset
+                    break
+                else:
+                    # chunks are padded to an even size
+                    f.seek(size + size % 2, 1)
+
+        if self.format is None or self.data_offset is None:
+            raise ValueError(f"{self.path} has no fmt or data chunk")
+        if (self.format, self.bits_per_sample) not in _SAMPLE_TYPES:
+            raise ValueError(
+                f"{self.path}: unsupported wav format {self.format} with {self.bits_per_sample} bits per sample"
+            )
+        self.data_size -= self.data_size % self.block_align
+
+    def _parse_fmt(self, fmt: bytes):
+        self.format, self.channels, self.samplerate, _, _, self.bits_per_sample = struct.unpack("<HHIIHH", fmt[:16])
+        if self.format == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            # the first two bytes of the sub format guid are the actual format
+            self.format = struct.unpack("<H", fmt[24:26])[0]
+
+    def chunks(self, chunk_size: int, reuse_buffer: bool = True):
+        """
+        Mono float32 chunks of the file. Multi channel audio is downmixed.
+        :param chunk_size: frames per chunk. The last chunk is shorter.
+        :param reuse_buffer: converted chunks are written to the same buffer. A chunk is only valid until the next one
+            is requested then. Set it to False if the chunks are kept, e.g. in the buffer of an A2FStreamPacer.
+        :return: generator of the chunks. Mono float32 files are read without a copy.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        sample_type = _SAMPLE_TYPES[(self.format, self.bits_per_sample)]
+        widen = self.bits_per_sample == 24
+
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mapped, "madvise"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        out = np.empty(chunk_size, dtype=np.float32) if reuse_buffer else None
+        wide = np.zeros((chunk_size * self.channels, 4), dtype=np.uint8) if widen else None
+
+        try:
+            for first in range(0, self.frames, chunk_size):
+                frames = min(chunk_size, self.frames - first)
+                offset = self.data_offset + first * self.block_align
+                if widen:
+                    # 24 bit samples become the upper three bytes of little endian int32
+                    raw = np.frombuffer(mapped, dtype=np.uint8, count=frames * self.block_align, offset=offset)
+                    wide[:frames * self.channels, 1:] = raw.reshape(-1, 3)
+                    samples = wide[:frames * self.channels].view(sample_type)[:, 0]
+                else:
+                    samples = np.frombuffer(mapped, dtype=sample_type, count=frames * self.channels, offset=offset)
+                if self.channels > 1:
+                    samples = samples.reshape(-1, self.channels)
+                if not sample_type.isnative:
+                    samples = samples.astype(sample_type.newbyteorder("="))
+                yield to_float32(samples, out=out[:frames] if out is not None else None)
+        finally:
+            try:
+                mapped.close()
+            except BufferError:
+                # a view of the last chunk is still referenced, the mapping is closed when it is released
+                pass
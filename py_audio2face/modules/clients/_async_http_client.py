@@ -0,0 +1,97 @@
+from __future__ import annotations  # avoid circular import with import py_audio2face
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import py_audio2face.async_audio2face as async_a2f
+
+import time
+
+from py_audio2face.modules._state import is_ok_response
+
+
+class _A2F_ASYNC_HTTP_CLIENT:
+    async def make_request(self: async_a2f.AsyncAudio2Face, api_route):
+        url = f"{self.api_url}/{api_route}"
+        start = time.perf_counter()
+        error = False
+        try:
+            response = await self.transport.request("GET", url, api_route)
+            res = response.json()
+        except Exception as e:
+            res = str(e)
+            error = True
+            print(f"API {url} call error: {str(e)}")
+
+        self.metrics.observe(api_route, time.perf_counter() - start, error=error)
+        return res
+
+    async def post(self: async_a2f.AsyncAudio2Face, api_route: str, payload):
+        url = f"{self.api_url}/{api_route}"
+        res = None
+        start = time.perf_counter()
+        error = False
+        try:
+            response = await self.transport.request("POST", url, api_route, payload=payload)
+            error = response.status_code >= 400
+            try:
+                res = response.json()
+            except ValueError:
+                print(f"Response of API {url} is not JSON format. Intended?")
+            else:
+                error = error or not is_ok_response(res)
+        except Exception as e:
+            res = str(e)
+            error = True
+            print(f"API {url} call error: {str(e)}")
+
+        self.metrics.observe(api_route, time.perf_counter() - start, error=error)
+        return res
+
+    async def is_server_ready(self: async_a2f.AsyncAudio2Face) -> bool:
+        """ Status probe without error output, used while the server is starting. """
+        start = time.perf_counter()
+        try:
+            ready = (await self.transport.request("GET", f"{self.api_url}/status", "status")).json() == "OK"
+        except Exception:
+            ready = False
+        self.metrics.observe("status", time.perf_counter() - start, error=not ready)
+        return ready
+
+    async def start_headless_server(self: async_a2f.AsyncAudio2Face):
+        # check if already running
+        status = await self.make_request("status")
+        if status == "OK":
+            print("audio2face running")
+            return status
+
+        print("starting audio2face headless")
+        start = time.perf_counter()
+        self.process_audio2face = self.launcher.start()
+        # a fresh server has nothing loaded
+        self.invalidate_state()
+
+        print("wait until audio2face is ready")
+        if await self.launcher.wait_until_ready_async(self.is_server_ready):
+            status = "OK"
+            self.metrics.set_gauge("server_cold_start_seconds", time.perf_counter() - start)
+            self.metrics.inc("server_starts")
+        else:
+            status = "timeout"
+
+        print(f"status {status}")
+        return status
+
+    async def close(self: async_a2f.AsyncAudio2Face):
+        """
+        Close the pooled connections of the transport and the gRPC channels. The server keeps running.
+        """
+        await self.transport.close()
+        if self._owns_grpc_channels:
+            await self.grpc_channels.aclose()
+
+    async def shutdown_a2f(self: async_a2f.AsyncAudio2Face):
+        try:
+            self.launcher.stop()
+            self.process_audio2face = None
+            self.invalidate_state()
+        except:
+            print("Can't kill a2f process. Was started separately?")
@@ -0,0 +1,66 @@
+"""
+Non-blocking counterpart of A2FHttpTransport built on aiohttp.
+It shares the pool size, timeout and retry configuration of the blocking transport.
+"""
+from __future__ import annotations
+import asyncio
+import json
+
+from py_audio2face.modules.clients._transport import A2FHttpTransport
+
+try:
+    import aiohttp
+    async_http_installed = True
+except Exception as e:
+    async_http_installed = False
+
+
+class A2FAsyncResponse:
+    """ Status and body of a response, read before the connection is released. Mirrors requests.Response. """
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        """ :raises ValueError: if the body is not json """
+        return json.loads(self.text)
+
+
+class A2FAsyncHttpTransport(A2FHttpTransport):
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # aiohttp sessions are bound to the running event loop, therefore they are created on first use.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def get_timeout(self, api_route: str) -> aiohttp.ClientTimeout:
+        timeout = super().get_timeout(api_route)
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+    async def request(self, method: str, url: str, api_route: str, payload: dict = None) -> A2FAsyncResponse:
+        """
+        Send a request over the pooled session. See A2FHttpTransport.request
+        Connection errors and timeouts of idempotent routes are retried with exponential backoff.
+        """
+        retries = self.max_retries if api_route in self.idempotent_routes else 0
+        timeout = self.get_timeout(api_route)
+
+        attempt = 0
+        while True:
+            try:
+                async with self.session.request(method, url, json=payload, timeout=timeout) as response:
+                    return A2FAsyncResponse(response.status, await response.text())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= retries:
+                    raise
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
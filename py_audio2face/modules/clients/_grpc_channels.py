@@ -0,0 +1,241 @@
+"""
+Long lived gRPC channels to the streaming player.
+Opening a channel costs a TCP and HTTP/2 handshake. The pool keeps one channel and stub per (host, port), so that
+consecutive streams start sending right away. Keepalive pings detect a dead server on idle channels. A channel
+whose call failed with UNAVAILABLE is dropped and opened again on the next call.
+grpc.aio channels are bound to their event loop, therefore they are pooled per loop.
+The pool also holds the settings of the link to a remote player: TLS credentials, message compression and the minimum
+size of the sent audio messages.
+"""
+import threading
+import time
+
+from py_audio2face.settings import (
+    DEFAULT_GRPC_KEEPALIVE_TIME_MS, DEFAULT_GRPC_KEEPALIVE_TIMEOUT_MS, DEFAULT_GRPC_MAX_MESSAGE_BYTES,
+    DEFAULT_GRPC_CONNECT_TIMEOUT
+)
+
+
+PUSH_AUDIO_STREAM_METHOD = "/nvidia.audio2face.Audio2Face/PushAudioStream"
+# compression setting -> name in grpc.Compression
+_COMPRESSIONS = {None: "NoCompression", "gzip": "Gzip", "deflate": "Deflate"}
+
+
+class _PooledChannel:
+    def __init__(self, key: tuple, channel, stub):
+        self.key = key
+        self.channel = channel
+        self.stub = stub
+        self.uses = 0
+        self._push_audio_stream_raw = None
+
+    @property
+    def push_audio_stream_raw(self):
+        """ PushAudioStream that sends serialized requests as they are, e.g. from A2FChunkFramer """
+        if self._push_audio_stream_raw is None:
+            from py_audio2face.modules.clients.grpc_stub import audio2face_pb2
+            self._push_audio_stream_raw = self.channel.stream_unary(
+                PUSH_AUDIO_STREAM_METHOD,
+                request_serializer=None,
+                response_deserializer=audio2face_pb2.PushAudioStreamResponse.FromString
+            )
+        return self._push_audio_stream_raw
+
+
+class A2FGrpcChannelPool:
+    def __init__(
+            self,
+            keepalive_time_ms: int = DEFAULT_GRPC_KEEPALIVE_TIME_MS,
+            keepalive_timeout_ms: int = DEFAULT_GRPC_KEEPALIVE_TIMEOUT_MS,
+            max_message_bytes: int = DEFAULT_GRPC_MAX_MESSAGE_BYTES,
+            connect_timeout: float = DEFAULT_GRPC_CONNECT_TIMEOUT,
+            options: list = None,
+            metrics=None,
+            compression: str = None,
+            credentials=None,
+            min_chunk_seconds: float = None
+    ):
+        """
+        :param keepalive_time_ms: interval of the keepalive pings, also while no stream is running.
+        :param keepalive_timeout_ms: a connection is considered dead if a ping is not answered within this time.
+        :param max_message_bytes: limit of sent and received messages, e.g. for long clips pushed at once.
+        :param connect_timeout: seconds to wait until a new channel is ready. The call is made anyway afterwards and
+            fails as usual if the server is not reachable.
+        :param options: more grpc channel options as (key, value) pairs. They override the ones above.
+        :param metrics: A2FMetrics for the grpc_channel_* counters and the setup latency. Set by the client if None.
+        :param compression: "gzip" or "deflate" compresses the sent messages. Saves bandwidth on slow links and costs
+            CPU on both ends. None sends them uncompressed.
+        :param credentials: grpc.ChannelCredentials, e.g. grpc.ssl_channel_credentials(), for a TLS secured player.
+            None opens insecure channels.
+        :param min_chunk_seconds: streamed chunks are merged until a message holds this much audio. Fewer, larger
+            messages suit links with a high latency, but the first audio arrives this much later. None sends every
+            chunk as it comes.
+        """
+        self._config = {
+            "keepalive_time_ms": keepalive_time_ms, "keepalive_timeout_ms": keepalive_timeout_ms,
+            "max_message_bytes": max_message_bytes, "connect_timeout": connect_timeout, "options": options,
+            "compression": compression, "credentials": credentials, "min_chunk_seconds": min_chunk_seconds,
+        }
+        if compression not in _COMPRESSIONS:
+            raise ValueError(f"compression must be one of {list(_COMPRESSIONS)}, not {compression!r}")
+        self.connect_timeout = connect_timeout
+        self.metrics = metrics
+        self.compression = compression
+        self.credentials = credentials
+        self.min_chunk_seconds = min_chunk_seconds
+        options_dict = {
+            "grpc.keepalive_time_ms": keepalive_time_ms,
+            "grpc.keepalive_timeout_ms": keepalive_timeout_ms,
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.http2.max_pings_without_data": 0,
+            "grpc.max_send_message_length": max_message_bytes,
+            "grpc.max_receive_message_length": max_message_bytes,
+        }
+        options_dict.update(dict(options or []))
+        self.options = list(options_dict.items())
+
+        self._channels = {}  # (host, port, event loop or None) -> _PooledChannel
+        self._dropped = set()  # keys whose channel was dropped after a failure
+        self._lock = threading.Lock()
+
+    def replace(self, **changes) -> "A2FGrpcChannelPool":
+        """ A new, empty pool with the settings of this one and the changes, e.g. replace(compression="gzip") """
+        return A2FGrpcChannelPool(**{**self._config, **changes})
+
+    def _grpc_compression(self):
+        import grpc
+        return getattr(grpc.Compression, _COMPRESSIONS[self.compression])
+
+    def _count(self, name: str):
+        if self.metrics is not None:
+            self.metrics.inc(name)
+
+    def _observe_setup(self, seconds: float, error: bool):
+        if self.metrics is not None:
+            self.metrics.observe("grpc/channel_setup", seconds, error=error)
+
+    def _reuse(self, key: tuple):
+        with self._lock:
+            # channels of event loops that were closed can't be used or closed anymore
+            for k in [k for k in self._channels if k[2] is not None and k[2].is_closed()]:
+                del self._channels[k]
+            entry = self._channels.get(key)
+            if entry is not None:
+                entry.uses += 1
+                self._count("grpc_channel_reuses")
+            return entry
+
+    def _add(self, entry: _PooledChannel) -> _PooledChannel:
+        """ Stores a new channel. :return: the channel of the key, which is another one if a concurrent call won. """
+        with self._lock:
+            existing = self._channels.get(entry.key)
+            if existing is not None:
+                return existing
+            self._channels[entry.key] = entry
+            if entry.key in self._dropped:
+                self._dropped.discard(entry.key)
+                self._count("grpc_channel_reconnects")
+            self._count("grpc_channels_opened")
+            entry.uses = 1
+            return entry
+
+    def get(self, host: str, port: int) -> _PooledChannel:
+        """ The channel and stub to host:port. Opened on the first call. """
+        import grpc
+        from py_audio2face.modules.clients.grpc_stub import audio2face_pb2_grpc
+
+        key = (host, port, None)
+        entry = self._reuse(key)
+        if entry is not None:
+            return entry
+
+        start = time.perf_counter()
+        target, compression = f"{host}:{port}", self._grpc_compression()
+        if self.credentials is not None:
+            channel = grpc.secure_channel(target, self.credentials, options=self.options, compression=compression)
+        else:
+            channel = grpc.insecure_channel(target, options=self.options, compression=compression)
+        try:
+            grpc.channel_ready_future(channel).result(timeout=self.connect_timeout)
+            ready = True
+        except grpc.FutureTimeoutError:
+            ready = False
+        self._observe_setup(time.perf_counter() - start, error=not ready)
+
+        entry = self._add(_PooledChannel(key, channel, audio2face_pb2_grpc.Audio2FaceStub(channel)))
+        if entry.channel is not channel:
+            channel.close()
+        return entry
+
+    async def get_aio(self, host: str, port: int) -> _PooledChannel:
+        """ get() for grpc.aio. The channel belongs to the running event loop. """
+        import asyncio
+        import grpc.aio
+        from py_audio2face.modules.clients.grpc_stub import audio2face_pb2_grpc
+
+        key = (host, port, asyncio.get_running_loop())
+        entry = self._reuse(key)
+        if entry is not None:
+            return entry
+
+        start = time.perf_counter()
+        target, compression = f"{host}:{port}", self._grpc_compression()
+        if self.credentials is not None:
+            channel = grpc.aio.secure_channel(target, self.credentials, options=self.options, compression=compression)
+        else:
+            channel = grpc.aio.insecure_channel(target, options=self.options, compression=compression)
+        try:
+            await asyncio.wait_for(channel.channel_ready(), self.connect_timeout)
+            ready = True
+        except asyncio.TimeoutError:
+            ready = False
+        self._observe_setup(time.perf_counter() - start, error=not ready)
+
+        entry = self._add(_PooledChannel(key, channel, audio2face_pb2_grpc.Audio2FaceStub(channel)))
+        if entry.channel is not channel:
+            await channel.close()
+        return entry
+
+    def report_error(self, entry: _PooledChannel, error: Exception) -> bool:
+        """
+        Drops the channel if the call failed because the connection is gone. The next call opens a new one.
+        :return: True if the channel was dropped.
+        """
+        import grpc
+
+        code = error.code() if isinstance(error, grpc.RpcError) and hasattr(error, "code") else None
+        if code != grpc.StatusCode.UNAVAILABLE:
+            return False
+        with self._lock:
+            if self._channels.get(entry.key) is not entry:
+                return False
+            del self._channels[entry.key]
+            self._dropped.add(entry.key)
+        if entry.key[2] is None:
+            entry.channel.close()
+        # aio channels are left to the garbage collector, close() would have to be awaited on their loop
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {f"{host}:{port}": entry.uses for (host, port, _), entry in self._channels.items()}
+
+    def close(self):
+        """ Closes the channels of blocking calls. """
+        with self._lock:
+            entries = [e for k, e in self._channels.items() if k[2] is None]
+            for entry in entries:
+                del self._channels[entry.key]
+        for entry in entries:
+            entry.channel.close()
+
+    async def aclose(self):
+        """ Closes the grpc.aio channels of the running event loop. """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entries = [e for k, e in self._channels.items() if k[2] is loop]
+            for entry in entries:
+                del self._channels[entry.key]
+        for entry in entries:
+            await entry.channel.close()
@@ -1,41 +1,62 @@
 from __future__ import annotations  # avoid circular import with import py_audio2face
 import py_audio2face.audio2face as a2f
 
-from subprocess import Popen, CREATE_NEW_CONSOLE
 import time
-import requests
-import os
-from requests import JSONDecodeError
+
+from py_audio2face.modules._state import is_ok_response
 
 
 class _A2F_HTTP_CLIENT:
     def make_request(self: a2f.Audio2Face, api_route):
         url = f"{self.api_url}/{api_route}"
+        start = time.perf_counter()
+        error = False
         try:
-            response = requests.get(url)
+            response = self.transport.request("GET", url, api_route)
             res = response.json()
         except Exception as e:
             res = str(e)
+            error = True
             print(f"API {url} call error: {str(e)}")
 
+        self.metrics.observe(api_route, time.perf_counter() - start, error=error)
         return res
 
 
     def post(self: a2f.Audio2Face, api_route: str, payload):
         url = f"{self.api_url}/{api_route}"
         res = None
+        start = time.perf_counter()
+        error = False
         try:
-            response = requests.post(url, json=payload, headers="")
-            res = response.json()
-        except JSONDecodeError as e:
-            print(f"Response of API {url} is not JSON format. Intended?")
+            response = self.transport.request("POST", url, api_route, payload=payload)
+            error = response.status_code >= 400
+            try:
+                res = response.json()
+            except ValueError:
+                # JSONDecodeError of requests, caught by its base class to not import requests here
+                print(f"Response of API {url} is not JSON format. Intended?")
+            else:
+                error = error or not is_ok_response(res)
         except Exception as e:
             res = str(e)
+            error = True
             print(f"API {url} call error: {str(e)}")
 
+        self.metrics.observe(api_route, time.perf_counter() - start, error=error)
         return res
 
 
+    def is_server_ready(self: a2f.Audio2Face) -> bool:
+        """ Status probe without error output, used while the server is starting. """
+        start = time.perf_counter()
+        try:
+            ready = self.transport.request("GET", f"{self.api_url}/status", "status").json() == "OK"
+        except Exception:
+            ready = False
+        self.metrics.observe("status", time.perf_counter() - start, error=not ready)
+        return ready
+
     def start_headless_server(self: a2f.Audio2Face):
         # check if already running
         status = self.make_request("status")
@@ -44,31 +65,34 @@ class _A2F_HTTP_CLIENT:
             return status
 
         print("starting audio2face headless")
-        batch_file = f"{self.a2f_install_path}/audio2face_headless.bat"
-        if not os.path.isfile(batch_file):
-            raise ValueError(f"audio2face_headless.bat not found in {self.a2f_install_path}. Is audio2face installed?")
-
-        self.process_audio2face = Popen(batch_file, universal_newlines=True, creationflags=CREATE_NEW_CONSOLE)
+        start = time.perf_counter()
+        self.process_audio2face = self.launcher.start()
+        # a fresh server has nothing loaded
+        self.invalidate_state()
 
         print("wait until audio2face is ready")
-        start_open = time.time()
-        # not managed to print the console output in pipe don't know why it doesnt work.
-        # TODO: make it with subprocess call..
-        while True:
-            status = self.make_request("status")
-            if str(status).lower() == "ok":
-                break
-            elif int(time.time() - start_open) >= 60:
-                status = "timeout"
-                break
-            else:
-                time.sleep(0.5)
+        if self.launcher.wait_until_ready(self.is_server_ready):
+            status = "OK"
+            self.metrics.set_gauge("server_cold_start_seconds", time.perf_counter() - start)
+            self.metrics.inc("server_starts")
+        else:
+            status = "timeout"
 
         print(f"status {status}")
         return status
 
+    def close(self: a2f.Audio2Face):
+        """
+        Close the pooled connections of the transport and the gRPC channels. The server keeps running.
+        """
+        self.transport.close()
+        if self._owns_grpc_channels:
+            self.grpc_channels.close()
+
     def shutdown_a2f(self: a2f.Audio2Face):
         try:
-            self.process_audio2face.kill()
+            self.launcher.stop()
+            self.process_audio2face = None
+            self.invalidate_state()
         except:
             print("Can't kill a2f process. Was started separately?")
@@ -0,0 +1,222 @@
+import itertools
+import logging
+import os
+import re
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Awaitable, Callable, Union
+
+from py_audio2face.settings import (
+    DEFAULT_HEADLESS_START_TIMEOUT, HEADLESS_READY_LOG_PATTERNS, DEFAULT_HEADLESS_LOG_FILE,
+    DEFAULT_HEADLESS_LOG_MAX_BYTES, DEFAULT_HEADLESS_LOG_BACKUPS,
+    DEFAULT_STATUS_POLL_INTERVAL, DEFAULT_STATUS_POLL_MAX_INTERVAL, DEFAULT_STATUS_POLL_BACKOFF
+)
+from py_audio2face.utils import resolve_audio2face_install_path
+
+# windows only. Gives the server its own console, so that ctrl+c in the calling script doesn't kill it.
+CREATE_NEW_CONSOLE = getattr(subprocess, "CREATE_NEW_CONSOLE", 0)
+# numbers the default log files of the launchers of this process
+_launcher_ids = itertools.count()
+
+
+def get_headless_script(a2f_install_path: str) -> str:
+    """ The headless start script of the installation: audio2face_headless.bat on windows, .sh elsewhere. """
+    script_name = "audio2face_headless.bat" if os.name == "nt" else "audio2face_headless.sh"
+    script = os.path.join(a2f_install_path, script_name)
+    if not os.path.isfile(script):
+        raise ValueError(f"{script_name} not found in {a2f_install_path}. Is audio2face installed?")
+    return script
+
+
+class A2FLauncher:
+    """
+    Starts the audio2face headless server and waits until it is ready.
+    The output of the server is written to a rotating log file. As soon as a log line matches one of the
+    ready_patterns, readiness is confirmed with the status route. Until then the status route is polled
+    with an interval that starts at poll_interval and backs off to max_poll_interval.
+    """
+
+    def __init__(
+            self,
+            a2f_install_path: str = None,
+            command: Union[str, list] = None,
+            log_file: str = DEFAULT_HEADLESS_LOG_FILE,
+            ready_patterns: tuple = HEADLESS_READY_LOG_PATTERNS,
+            timeout: float = DEFAULT_HEADLESS_START_TIMEOUT,
+            poll_interval: float = DEFAULT_STATUS_POLL_INTERVAL,
+            max_poll_interval: float = DEFAULT_STATUS_POLL_MAX_INTERVAL,
+            poll_backoff: float = DEFAULT_STATUS_POLL_BACKOFF,
+            log_max_bytes: int = DEFAULT_HEADLESS_LOG_MAX_BYTES,
+            log_backups: int = DEFAULT_HEADLESS_LOG_BACKUPS
+    ):
+        """
+        :param a2f_install_path: audio2face installation. Its headless script is started if no command is given.
+            If None the newest installation in the default location is used, searched only when the server is started.
+        :param command: command that starts the server instead, e.g. a container or a remote shell.
+        :param log_file: the server output is written here. None to discard it. Defaults to a file per launcher in
+            the temp dir, named after the process id and the number of the launcher.
+        :param ready_patterns: regular expressions of log lines that signal that the server is ready.
+        :param timeout: seconds to wait for the server.
+        """
+        self.a2f_install_path = a2f_install_path
+        self.command = command
+        if log_file == DEFAULT_HEADLESS_LOG_FILE:
+            log_file = log_file.format(pid=os.getpid(), launcher=next(_launcher_ids))
+        self.log_file = log_file
+        self.ready_patterns = [re.compile(p, re.IGNORECASE) for p in ready_patterns]
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self.log_max_bytes = log_max_bytes
+        self.log_backups = log_backups
+
+        self.process = None
+        self.ready_source = None  # "log" or "status": what told us the server is ready
+        self.tail = deque(maxlen=50)  # last lines of the server output for error messages
+        self._log_ready = threading.Event()
+        self._reader = None
+        self._logger = None
+
+    def get_command(self) -> list:
+        if self.command is None:
+            script = get_headless_script(resolve_audio2face_install_path(self.a2f_install_path))
+            if os.name == "nt" or os.access(script, os.X_OK):
+                return [script]
+            return ["bash", script]
+        if isinstance(self.command, str):
+            return shlex.split(self.command, posix=os.name != "nt")
+        return list(self.command)
+
+    def start(self) -> subprocess.Popen:
+        """ Spawns the server. Returns immediately, use wait_until_ready afterwards. """
+        command = self.get_command()
+        self._log_ready.clear()
+        self.ready_source = None
+        self.tail.clear()
+
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            universal_newlines=True,
+            errors="replace",
+            bufsize=1,
+            creationflags=CREATE_NEW_CONSOLE,
+            # own process group on linux, so that stop() also reaches kit started by the shell script
+            start_new_session=os.name != "nt"
+        )
+        self._logger = self._make_logger()
+        self._reader = threading.Thread(
+            target=self._read_output, args=(self.process, self._logger), name="a2f-headless-log", daemon=True
+        )
+        self._reader.start()
+        return self.process
+
+    def _make_logger(self):
+        # one logger and log file per launcher, so that several servers on one machine don't write into each other's log
+        logger = logging.getLogger(f"py_audio2face.headless.{id(self)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        if self.log_file is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_file)), exist_ok=True)
+            handler = RotatingFileHandler(
+                self.log_file, maxBytes=self.log_max_bytes, backupCount=self.log_backups, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def _read_output(self, process: subprocess.Popen, logger: logging.Logger):
+        for line in process.stdout:
+            line = line.rstrip()
+            self.tail.append(line)
+            logger.info(line)
+            if not self._log_ready.is_set() and any(p.search(line) for p in self.ready_patterns):
+                self._log_ready.set()
+        process.stdout.close()
+
+    def _failed(self) -> bool:
+        """ The process exited with an error. A launcher command that exits with 0 may have detached the server. """
+        if self.process is None:
+            return False
+        return_code = self.process.poll()
+        if return_code is None or return_code == 0:
+            return False
+        print(f"audio2face headless exited with code {return_code}. Last output:")
+        print("\n".join(self.tail))
+        return True
+
+    def wait_until_ready(self, is_ready: Callable[[], bool], timeout: float = None) -> bool:
+        """
+        Blocks until is_ready() returns True, the server process failed or the timeout passed.
+        :param is_ready: probe of the server, usually a status request.
+        :return: True if the server is ready.
+        """
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        interval = self.poll_interval
+        log_ready = False
+        while True:
+            if is_ready():
+                self.ready_source = "log" if log_ready else "status"
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._failed():
+                return False
+
+            if log_ready:
+                # the server says it is ready, the status route should follow in a moment
+                time.sleep(min(self.poll_interval, remaining))
+            else:
+                # wakes up as soon as the ready line is logged
+                log_ready = self._log_ready.wait(min(interval, remaining))
+                interval = min(interval * self.poll_backoff, self.max_poll_interval)
+
+    async def wait_until_ready_async(self, is_ready: Callable[[], Awaitable[bool]], timeout: float = None) -> bool:
+        """ Same as wait_until_ready for an awaitable probe. """
+        import asyncio  # not imported at module level, the sync client doesn't need it
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        interval = self.poll_interval
+        log_ready = False
+        while True:
+            if await is_ready():
+                self.ready_source = "log" if log_ready else "status"
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._failed():
+                return False
+
+            if log_ready:
+                await asyncio.sleep(min(self.poll_interval, remaining))
+            else:
+                log_ready = await loop.run_in_executor(None, self._log_ready.wait, min(interval, remaining))
+                interval = min(interval * self.poll_backoff, self.max_poll_interval)
+
+    def stop(self):
+        """ Kills the server process started by this launcher. """
+        if self.process is None:
+            raise RuntimeError("audio2face was not started by this launcher")
+        if os.name == "nt":
+            self.process.kill()
+        else:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.process.wait()
+        if self._reader is not None:
+            self._reader.join(timeout=5)
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+            handler.close()
+        self.process = None
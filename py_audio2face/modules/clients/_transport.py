@@ -0,0 +1,86 @@
+"""
+Pooled keep-alive HTTP transport for the Audio2Face REST api.
+Each Audio2Face instance owns one transport. It keeps a persistent requests.Session so that consecutive calls
+(SetTrack, GenerateKeys, ExportBlendshapes, ...) reuse the same TCP connection instead of opening a new one.
+A custom transport can be passed to Audio2Face(transport=...) as long as it implements request() and close().
+"""
+from __future__ import annotations
+import time
+
+from py_audio2face.settings import (
+    DEFAULT_HTTP_POOL_SIZE, DEFAULT_HTTP_TIMEOUT, DEFAULT_HTTP_MAX_RETRIES, DEFAULT_HTTP_BACKOFF_FACTOR,
+    HTTP_ROUTE_TIMEOUTS, HTTP_IDEMPOTENT_ROUTES
+)
+
+
+class A2FHttpTransport:
+    def __init__(
+            self,
+            pool_size: int = DEFAULT_HTTP_POOL_SIZE,
+            timeout: tuple = DEFAULT_HTTP_TIMEOUT,
+            route_timeouts: dict = None,
+            max_retries: int = DEFAULT_HTTP_MAX_RETRIES,
+            backoff_factor: float = DEFAULT_HTTP_BACKOFF_FACTOR,
+            idempotent_routes: set = None
+    ):
+        """
+        :param pool_size: Number of persistent connections kept open to the server.
+        :param timeout: Default (connect, read) timeout in seconds. None waits forever.
+        :param route_timeouts: Per route (connect, read) timeouts. Merged over HTTP_ROUTE_TIMEOUTS.
+        :param max_retries: How often an idempotent route is retried on connection errors and timeouts.
+        :param backoff_factor: Sleep backoff_factor * 2**attempt seconds between retries.
+        :param idempotent_routes: Routes that are safe to retry. Defaults to HTTP_IDEMPOTENT_ROUTES.
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.route_timeouts = {**HTTP_ROUTE_TIMEOUTS, **(route_timeouts or {})}
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.idempotent_routes = set(HTTP_IDEMPOTENT_ROUTES if idempotent_routes is None else idempotent_routes)
+        self._session = None
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            # requests is imported with the first request, it is slow to import
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def get_timeout(self, api_route: str):
+        return self.route_timeouts.get(api_route, self.timeout)
+
+    def request(self, method: str, url: str, api_route: str, payload: dict = None) -> requests.Response:
+        """
+        Send a request over the pooled session.
+        Connection errors and timeouts of idempotent routes are retried with exponential backoff.
+        :param method: "GET" or "POST"
+        :param url: The full url of the request.
+        :param api_route: The route part of the url, for example "A2F/Player/SetTrack". Used to select timeouts and retries.
+        :param payload: Json payload for POST requests.
+        """
+        retries = self.max_retries if api_route in self.idempotent_routes else 0
+        timeout = self.get_timeout(api_route)
+
+        session = self.session
+        import requests
+
+        attempt = 0
+        while True:
+            try:
+                return session.request(method, url, json=payload, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+                time.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
@@ -0,0 +1,469 @@
+"""
+Drive several Audio2Face headless servers at once.
+Each server gets a worker thread with its own job queue. Idle workers steal jobs from the busiest queue, so a slow
+server never holds back the batch. Servers that fail repeatedly are evicted and re-admitted once they answer again.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, as_completed
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.modules._export import _cache_key, _cached_export, _prepare_output_path
+from py_audio2face.modules._manifest import A2FManifest, animation_settings
+from py_audio2face.modules._metrics import A2FMetrics
+from py_audio2face.modules._state import track_key
+from py_audio2face.supervisor import A2FSupervisor
+from py_audio2face import utils
+
+
+class A2FServerError(RuntimeError):
+    """ The server did not process a job. """
+
+
+def convert_clip(
+        client: Audio2Face,
+        audio_file_path: str,
+        output_path: str,
+        fps: int = 60,
+        emotion_auto_detect: bool = False
+) -> str:
+    """
+    Same as Audio2Face.audio2face_single, but raises A2FServerError if the server rejects a step
+    instead of printing it, so that the pool can retry the clip on another server.
+    """
+    cache_key = _cache_key(client, fps, "usd", emotion_auto_detect, audio_file_path)
+    if cache_key is not None:
+        output_path = _prepare_output_path(output_path)
+        if _cached_export(client, cache_key, output_path, "usd"):
+            return output_path
+
+    if client.init_a2f() != "OK":
+        raise A2FServerError(f"audio2face server {client.api_url} is not reachable")
+
+    client.set_root_path(audio_file_path)
+    client.set_track(audio_file_path)
+    if client.server_state.track != track_key(audio_file_path):
+        raise A2FServerError(f"SetTrack {audio_file_path} failed on {client.api_url}")
+
+    output_path, ok = client._export(
+        output_path=output_path, fps=fps, emotion_auto_detect=emotion_auto_detect,
+        cache_key=cache_key, check_cache=False
+    )
+    if not ok:
+        raise A2FServerError(f"ExportBlendshapes of {audio_file_path} failed on {client.api_url}")
+
+    return output_path
+
+
+class _PoolJob:
+    def __init__(self, future: Future, args: tuple):
+        self.future = future
+        self.args = args  # (audio_file_path, output_path, fps, emotion_auto_detect)
+        self.attempts = 0
+        self.requeues = 0  # queued again because the server was recycled, doesn't count as attempt
+        self.queued_at = time.monotonic()
+
+
+class _PoolWorker:
+    def __init__(self, client: Audio2Face):
+        self.client = client
+        self.queue = deque()
+        self.healthy = True
+        self.recycling = False  # restarted by the supervisor, takes no new jobs meanwhile
+        self.busy = False
+        self.failures = 0  # consecutive failed jobs
+        self.evicted_at = None
+        self.jobs_done = 0
+        self.last_active = time.monotonic()
+        self.retired = False  # removed from the pool, the thread ends
+        self.thread = None
+
+    @property
+    def load(self) -> int:
+        return len(self.queue) + self.busy
+
+
+class Audio2FacePool:
+    def __init__(
+            self,
+            api_urls: list = None,
+            clients: list = None,
+            a2f_install_path: str = None,
+            metrics: A2FMetrics = None,
+            max_failures: int = 3,
+            max_attempts: int = 3,
+            eviction_cooldown: float = 30.0,
+            supervisor: A2FSupervisor = None
+    ):
+        """
+        :param api_urls: one url per headless server, e.g. ["http://localhost:8011", "http://localhost:8012"].
+        :param clients: Audio2Face clients instead of api_urls, e.g. with a launcher per server.
+        :param a2f_install_path: installation used for the clients created from api_urls.
+        :param metrics: registry shared by all clients of the pool. Also receives the pool counters.
+        :param max_failures: consecutive failed jobs after which a server is evicted.
+        :param max_attempts: how often a clip is tried, on different servers if possible, before its future fails.
+        :param eviction_cooldown: seconds until an evicted server is probed again.
+        :param supervisor: restarts servers that degrade, see A2FSupervisor. None to never restart.
+        """
+        self.metrics = metrics if metrics is not None else A2FMetrics()
+        if clients is None:
+            clients = [
+                Audio2Face(api_url=url, a2f_install_path=a2f_install_path, metrics=self.metrics)
+                for url in api_urls or []
+            ]
+        if len(clients) == 0:
+            raise ValueError("Audio2FacePool needs at least one api_url or client")
+
+        self.max_failures = max_failures
+        self.max_attempts = max_attempts
+        self.eviction_cooldown = eviction_cooldown
+        self.supervisor = supervisor
+
+        # one lock for all queues. Jobs take seconds, so contention on it doesn't matter.
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = []
+        for client in clients:
+            self._add_worker(client)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # scheduling
+
+    def _add_worker(self, client: Audio2Face) -> _PoolWorker:
+        worker = _PoolWorker(client)
+        worker.thread = threading.Thread(
+            target=self._run_worker, args=(worker,), name=f"a2f-pool-{client.api_url}", daemon=True
+        )
+        with self._cond:
+            self._workers.append(worker)
+            self._update_gauges()
+        worker.thread.start()
+        return worker
+
+    def _healthy_workers(self) -> list:
+        return [w for w in self._workers if w.healthy]
+
+    def _update_gauges(self):
+        self.metrics.set_gauge("pool_servers", len(self._workers))
+        self.metrics.set_gauge("pool_healthy_servers", len(self._healthy_workers()))
+        self.metrics.set_gauge("pool_queue_depth", self.queue_depth)
+
+    def _enqueue(self, job: _PoolJob, exclude: _PoolWorker = None, first: bool = False):
+        """ Puts the job to the least loaded healthy server. Caller holds the lock. """
+        healthy = self._healthy_workers()
+        available = [w for w in healthy if not w.recycling]
+        # a recycling server takes the job after its restart if there is no other one
+        candidates = [w for w in available if w is not exclude] or available or healthy
+        if len(candidates) == 0:
+            self.metrics.inc("pool_jobs_failed")
+            job.future.set_exception(A2FServerError("No healthy audio2face server left in the pool"))
+            return
+        queue = min(candidates, key=lambda w: w.load).queue
+        if first:
+            queue.appendleft(job)
+        else:
+            queue.append(job)
+        self._update_gauges()
+        self._cond.notify_all()
+
+    def _next_job(self, worker: _PoolWorker):
+        """ Own queue first, otherwise steal from the end of the longest queue. Caller holds the lock. """
+        if worker.queue:
+            return worker.queue.popleft()
+
+        victims = [w for w in self._workers if w is not worker and w.queue]
+        if len(victims) == 0:
+            return None
+        victim = max(victims, key=lambda w: len(w.queue))
+        self.metrics.inc("pool_jobs_stolen")
+        # jobs at the end of the victims queue would wait longest, take those
+        return victim.queue.pop()
+
+    def _run_worker(self, worker: _PoolWorker):
+        while True:
+            with self._cond:
+                job = None
+                while not self._closed and not worker.retired:
+                    if not worker.healthy:
+                        # re-admission is checked outside of the lock
+                        break
+                    job = self._next_job(worker)
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                if (self._closed or worker.retired) and job is None:
+                    return
+                if job is not None:
+                    worker.busy = True
+                    self._update_gauges()
+
+            if job is None:
+                self._wait_for_readmission(worker)
+                continue
+
+            self._run_job(worker, job)
+
+    def _run_job(self, worker: _PoolWorker, job: _PoolJob):
+        # retried jobs are running already
+        if job.attempts == 0 and not job.future.set_running_or_notify_cancel():
+            with self._cond:
+                worker.busy = False
+            return
+
+        job.attempts += 1
+        start = time.perf_counter()
+        try:
+            result = convert_clip(worker.client, *job.args)
+            error = None
+        except Exception as e:
+            result = None
+            error = e
+        seconds = time.perf_counter() - start
+        self.metrics.observe("pool/job", seconds, error=error is not None)
+
+        recycle_reason = None
+        if self.supervisor is not None:
+            recycle_reason = self.supervisor.record(worker.client, seconds, error is not None, job.args[0])
+
+        done = False  # the future is resolved once the lock is released
+        with self._cond:
+            worker.busy = False
+            worker.last_active = time.monotonic()
+            if recycle_reason is not None:
+                self._begin_recycle(worker)
+
+            if error is None:
+                worker.failures = 0
+                worker.jobs_done += 1
+                self.metrics.inc("pool_jobs_completed")
+                done = True
+            elif recycle_reason is not None and job.requeues < self.max_attempts and not self._closed:
+                # the server is to blame, not the clip
+                job.requeues += 1
+                job.attempts -= 1
+                self.metrics.inc("pool_jobs_requeued")
+                self._enqueue(job, exclude=worker, first=True)
+            else:
+                worker.failures += 1
+                print(f"pool: job {job.args[0]} failed on {worker.client.api_url}: {error}")
+                if worker.failures >= self.max_failures:
+                    self._evict(worker)
+
+                if job.attempts < self.max_attempts and not self._closed:
+                    self.metrics.inc("pool_jobs_retried")
+                    # retried jobs go first, they already waited
+                    self._enqueue(job, exclude=worker, first=True)
+                else:
+                    self.metrics.inc("pool_jobs_failed")
+                    done = True
+            self._update_gauges()
+
+        # the done callbacks of the future run in the resolving thread, e.g. the manifest of audio2face_folder.
+        # They must not block the other workers, and may call the pool.
+        if done and error is None:
+            job.future.set_result(result)
+        elif done:
+            job.future.set_exception(error)
+
+        if recycle_reason is not None:
+            self._recycle(worker, recycle_reason)
+
+    def _begin_recycle(self, worker: _PoolWorker):
+        """ Hands the queue of the server to the others while it restarts. Caller holds the lock. """
+        worker.recycling = True
+        pending = list(worker.queue)
+        worker.queue.clear()
+        for job in pending:
+            self._enqueue(job, exclude=worker)
+
+    def _recycle(self, worker: _PoolWorker, reason: str):
+        # runs in the thread of the worker, so it takes no jobs until the server is back
+        try:
+            ok = self.supervisor.recycle(worker.client, reason)
+        except Exception as e:
+            print(f"pool: recycling {worker.client.api_url} failed: {e}")
+            ok = False
+        with self._cond:
+            worker.recycling = False
+            if ok:
+                worker.failures = 0
+            else:
+                self._evict(worker)
+            self._update_gauges()
+            self._cond.notify_all()
+
+    def _evict(self, worker: _PoolWorker):
+        """ Takes the server out of rotation and hands its queue to the others. Caller holds the lock. """
+        print(f"pool: evicting {worker.client.api_url} after {worker.failures} failed jobs")
+        worker.healthy = False
+        worker.evicted_at = time.monotonic()
+        self.metrics.inc("pool_evictions")
+        pending = list(worker.queue)
+        worker.queue.clear()
+        for job in pending:
+            self._enqueue(job)
+        self._update_gauges()
+
+    def _retire_worker(self, worker: _PoolWorker):
+        """ Removes the server from the pool. Its queued jobs go to the others. Caller holds the lock. """
+        self._workers.remove(worker)
+        worker.retired = True
+        pending = list(worker.queue)
+        worker.queue.clear()
+        for job in pending:
+            self._enqueue(job, first=True)
+        self._update_gauges()
+        self._cond.notify_all()
+
+    def _wait_for_readmission(self, worker: _PoolWorker):
+        remaining = self.eviction_cooldown - (time.monotonic() - worker.evicted_at)
+        if remaining > 0:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(remaining)
+            return
+
+        if worker.client.is_server_ready():
+            # the server may have been restarted in the meantime. Its state is unknown.
+            worker.client.invalidate_state()
+            with self._cond:
+                print(f"pool: re-admitting {worker.client.api_url}")
+                worker.healthy = True
+                worker.failures = 0
+                self.metrics.inc("pool_readmissions")
+                self._update_gauges()
+        else:
+            worker.evicted_at = time.monotonic()
+
+    # public api
+
+    @property
+    def clients(self) -> list:
+        return [w.client for w in self._workers]
+
+    @property
+    def healthy_servers(self) -> list:
+        return [w.client.api_url for w in self._healthy_workers()]
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(w.queue) for w in self._workers)
+
+    @property
+    def oldest_wait(self) -> float:
+        """ Seconds the longest waiting queued clip is waiting. """
+        now = time.monotonic()
+        return max((now - job.queued_at for w in self._workers for job in w.queue), default=0.0)
+
+    def submit(
+            self,
+            audio_file_path: str,
+            output_path: str,
+            fps: int = 60,
+            emotion_auto_detect: bool = False
+    ) -> Future:
+        """
+        Queue a clip. Same arguments as Audio2Face.audio2face_single.
+        :return: future with the output path. Raises A2FServerError if the clip failed on max_attempts servers.
+        """
+        if not os.path.isfile(audio_file_path):
+            raise FileNotFoundError(f"File {audio_file_path} doesn't exist")
+
+        future = Future()
+        job = _PoolJob(future, (audio_file_path, output_path, fps, emotion_auto_detect))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Audio2FacePool is closed")
+            self._enqueue(job)
+        return future
+
+    def map(self, audio_files: list, output_paths: list, fps: int = 60, emotion_auto_detect: bool = False) -> list:
+        """ submit() for every pair of audio file and output path. :return: list of futures in input order """
+        return [
+            self.submit(af, op, fps=fps, emotion_auto_detect=emotion_auto_detect)
+            for af, op in zip(audio_files, output_paths)
+        ]
+
+    def audio2face_folder(
+            self,
+            input_folder: str,
+            output_folder: str,
+            fps: int = 60,
+            emotion: bool = False,
+            resume: bool = True
+    ) -> list:
+        """
+        Like Audio2Face.audio2face_folder, with the files spread over all servers of the pool.
+        :param resume: skip files that are done according to the manifest in the output folder.
+        :return: the paths of the output files in the order of the input files. Failed clips are printed and skipped.
+        """
+        audio_files = utils.get_files_in_dir(input_folder, [".wav", ".mp3"])
+        output_paths = [utils.get_animation_output_path(af, output_folder) for af in audio_files]
+        manifest = A2FManifest(output_folder) if resume else None
+        settings = animation_settings(self.clients[0], fps, emotion)
+
+        futures = {}
+        for af, op in zip(audio_files, output_paths):
+            if manifest is not None and manifest.is_done(af, settings, op):
+                continue
+            futures[af] = self.submit(af, op, fps=fps, emotion_auto_detect=emotion)
+            if manifest is not None:
+                # recorded as soon as the clip is done, so that a crash of the run keeps the progress
+                futures[af].add_done_callback(
+                    lambda f, af=af, op=op: manifest.record(af, settings, op, "failed" if f.exception() else "done")
+                )
+
+        import tqdm  # only needed for the progress bar
+        for future in tqdm.tqdm(as_completed(futures.values()), total=len(futures)):
+            pass
+
+        output_files = []
+        for af, op in zip(audio_files, output_paths):
+            future = futures.get(af)
+            if future is None:
+                output_files.append(os.path.abspath(op))
+                continue
+            if future.exception() is not None:
+                print(f"Processing {af} failed: {future.exception()}")
+                continue
+            output_files.append(future.result())
+
+        if manifest is not None:
+            manifest.compact()
+        return output_files
+
+    def close(self, wait: bool = True, cancel_pending: bool = False):
+        """
+        Stops the workers. The servers keep running, use shutdown_a2f on the clients to stop them.
+        :param wait: block until the running and queued jobs are done.
+        :param cancel_pending: cancel the queued jobs instead of processing them.
+        """
+        with self._cond:
+            if cancel_pending:
+                for w in self._workers:
+                    for job in w.queue:
+                        job.future.cancel()
+                    w.queue.clear()
+
+        if wait:
+            with self._cond:
+                while self.queue_depth > 0 and len(self._healthy_workers()) > 0:
+                    self._cond.wait(0.1)
+                    self._cond.notify_all()
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for w in list(self._workers):
+                w.thread.join()
+        for client in self.clients:
+            client.close()
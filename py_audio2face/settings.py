@@ -1,11 +1,15 @@
 import os
+import tempfile
 
 # Easy to use for relative paths a cross the project
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_OUTPUT_DIR = os.path.join(ROOT_DIR, "../output")
 ASSETS_DIR = os.path.join(ROOT_DIR, "assets")
 
-APP_DATA_DIR = os.getenv('LOCALAPPDATA')
+# the omniverse launcher installs to %LOCALAPPDATA%/ov/pkg on windows and to ~/.local/share/ov/pkg on linux
+APP_DATA_DIR = os.getenv('LOCALAPPDATA') or os.path.join(os.path.expanduser("~"), ".local", "share")
+# the discovered installation is remembered, so that new processes don't search APP_DATA_DIR again
+INSTALL_PATH_MEMO_FILE = os.path.join(os.path.expanduser("~"), ".cache", "py_audio2face", "install_path.json")
 
 DEFAULT_PLAYER_INSTANCE = "/World/audio2face/Player"
 DEFAULT_SOLVER_INSTANCE = "/World/audio2face/BlendshapeSolve"
@@ -13,3 +17,83 @@ DEFAULT_A2E_INSTANCE = "/World/audio2face/CoreFullface"
 
 DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE = "/World/audio2face/PlayerStreaming"
 DEFAULT_AUDIO_STREAM_GRPC_PORT = 50051
+
+# gRPC channels of the streaming player. They are kept open between streams.
+DEFAULT_GRPC_KEEPALIVE_TIME_MS = 10000  # ping an idle connection this often, so that a dead server is noticed
+DEFAULT_GRPC_KEEPALIVE_TIMEOUT_MS = 5000
+DEFAULT_GRPC_MAX_MESSAGE_BYTES = 64 * 2 ** 20
+DEFAULT_GRPC_CONNECT_TIMEOUT = 5.0  # seconds to wait for a new channel to become ready
+
+# measure_streaming tries every combination of these on the link to the streaming player
+DEFAULT_MEASURE_COMPRESSIONS = (None, "gzip", "deflate")
+DEFAULT_MEASURE_CHUNK_SECONDS = (0.02, 0.1, 0.25)  # min_chunk_seconds, the size of the sent messages
+
+# paced streaming, see A2FStreamPacer
+DEFAULT_STREAM_REALTIME_FACTOR = 1.0  # audio seconds sent per second
+DEFAULT_STREAM_BUFFER_SECONDS = 2.0  # audio the producer may run ahead of the sender
+DEFAULT_STREAM_LEAD_SECONDS = 0.5  # audio sent ahead of real time, the lip sync lead of the player
+
+# push_audio sends clips up to this size in one unary PushAudio call, longer ones with PushAudioStream
+DEFAULT_UNARY_PUSH_MAX_BYTES = 256 * 1024  # 4 s of float32 at 16 kHz
+DEFAULT_PUSH_AUDIO_CHUNK_SECONDS = 0.1  # chunk length of the streaming fallback
+
+# the combined scene holds the default scene under /World and the streaming scene under this prim, so that one server
+# exports offline and streams without loading a scene in between. See Audio2Face(combined_scene=True)
+COMBINED_SCENE_FILE_NAME = "mark_arkit_solved_combined.usda"
+COMBINED_SCENE_STREAMING_ROOT = "/World_streaming"
+
+# HTTP transport for the REST api
+DEFAULT_HTTP_POOL_SIZE = 4
+DEFAULT_HTTP_TIMEOUT = (3.05, 60)  # (connect, read) in seconds
+DEFAULT_HTTP_MAX_RETRIES = 3
+DEFAULT_HTTP_BACKOFF_FACTOR = 0.25
+# routes that do heavy work on the server get a longer read timeout
+HTTP_ROUTE_TIMEOUTS = {
+    "status": (1.0, 5.0),
+    "A2F/USD/Load": (3.05, 300),
+    "A2F/A2E/GenerateKeys": (3.05, 600),
+    "A2F/Exporter/ExportBlendshapes": (3.05, 600),
+}
+# routes that can be sent twice without changing the result. Only those are retried.
+# "status" is not retried, because it is polled as liveness probe.
+HTTP_IDEMPOTENT_ROUTES = {
+    "A2F/GetInstances",
+    "A2F/A2E/GetEmotionNames",
+    "A2F/A2E/GetEmotion",
+    "A2F/A2E/SetSettings",
+    "A2F/A2E/SetEmotion",
+    "A2F/A2E/EnableAutoGenerateOnTrackChange",
+    "A2F/Player/SetRootPath",
+    "A2F/Player/SetTrack",
+    "A2F/Player/SetFrame",
+}
+
+# Metrics
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+DEFAULT_LATENCY_SAMPLES = 2048  # recent samples per route kept for p50/p95/p99
+
+# Headless server launcher
+DEFAULT_HEADLESS_START_TIMEOUT = 60  # seconds until start_headless_server gives up
+# log lines of the headless server that tell it is ready. Readiness is confirmed with the status route afterwards.
+HEADLESS_READY_LOG_PATTERNS = (
+    r"app ready",
+    r"Uvicorn running on",
+    r"Application startup complete",
+)
+# {pid} and {launcher} are filled in per launcher, several servers on one machine must not share a rotating log
+DEFAULT_HEADLESS_LOG_FILE = os.path.join(
+    tempfile.gettempdir(), "py_audio2face", "audio2face_headless_{pid}_{launcher}.log"
+)
+DEFAULT_HEADLESS_LOG_MAX_BYTES = 10 * 2 ** 20
+DEFAULT_HEADLESS_LOG_BACKUPS = 3
+# status polling while no ready line was logged: starts fast and backs off, because a cold start takes a while
+DEFAULT_STATUS_POLL_INTERVAL = 0.05
+DEFAULT_STATUS_POLL_MAX_INTERVAL = 2.0
+DEFAULT_STATUS_POLL_BACKOFF = 1.5
+
+# Resumable folder runs
+MANIFEST_FILE_NAME = ".a2f_manifest.jsonl"  # written into the output folder
+
+# Animation cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "py_audio2face", "animations")
+DEFAULT_CACHE_MAX_BYTES = 10 * 2 ** 30
@@ -0,0 +1,188 @@
+"""
+Watches the servers of an Audio2FacePool and recycles the ones that degrade.
+Headless Audio2Face gets slower or stops answering after many SetTrack / ExportBlendshapes cycles. The supervisor
+restarts a server after a number of jobs, or when its latency trend, error rate or memory crosses a threshold.
+After the restart the scene, root path and A2E settings are restored with resync(). The job that was running when a
+degraded server failed is queued again, so callers don't notice the restart.
+"""
+
+import os
+import time
+from collections import deque
+from statistics import median
+
+from py_audio2face.audio2face import Audio2Face
+
+try:
+    import psutil
+    psutil_installed = True
+    _MEMORY_ERRORS = (OSError, ValueError, psutil.Error)
+except ImportError:
+    psutil_installed = False
+    _MEMORY_ERRORS = (OSError, ValueError)
+
+
+def _proc_children(pid: int) -> list:
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for tid in os.listdir(task_dir):
+        with open(os.path.join(task_dir, tid, "children")) as f:
+            children.extend(int(c) for c in f.read().split())
+    return children
+
+
+def _proc_rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def process_memory_mb(pid: int):
+    """
+    Resident memory of the process and all its children, e.g. kit started by audio2face_headless.sh.
+    Uses psutil if installed, otherwise /proc on linux. :return: None if it can't be measured
+    """
+    try:
+        if psutil_installed:
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / 2 ** 20
+
+        if not os.path.isdir("/proc"):
+            return None
+        total, pending = 0, [pid]
+        while pending:
+            p = pending.pop()
+            total += _proc_rss_bytes(p)
+            pending.extend(_proc_children(p))
+        return total / 2 ** 20
+    except _MEMORY_ERRORS:
+        return None
+
+
+class _ServerHealth:
+    def __init__(self, window: int):
+        self.jobs = 0  # since the last (re)start
+        self.costs = deque(maxlen=window)  # seconds per MB of audio of the recent jobs
+        self.baseline = []  # costs of the first jobs after the (re)start
+        self.errors = deque(maxlen=window)
+        self.memory_mb = None
+        self.memory_checked_at = 0.0
+        self.recycles = 0
+
+
+class A2FSupervisor:
+    def __init__(
+            self,
+            max_jobs: int = None,
+            max_latency_ratio: float = 2.0,
+            max_error_rate: float = 0.5,
+            max_memory_mb: float = None,
+            window: int = 20,
+            memory_check_interval: float = 10.0
+    ):
+        """
+        :param max_jobs: recycle a server after this many jobs. None for no limit.
+        :param max_latency_ratio: recycle when the median job time of the last window jobs is this many times slower
+            than after the start of the server. Job times are normalized by the size of the audio file.
+        :param max_error_rate: recycle when this share of the last window jobs failed.
+        :param max_memory_mb: recycle when the server process uses more memory. Only for servers started by the
+            client. None for no limit.
+        :param window: number of jobs for the latency and error statistics.
+        :param memory_check_interval: seconds between two memory measurements of a server.
+        """
+        self.max_jobs = max_jobs
+        self.max_latency_ratio = max_latency_ratio
+        self.max_error_rate = max_error_rate
+        self.max_memory_mb = max_memory_mb
+        self.window = window
+        self.memory_check_interval = memory_check_interval
+        self._health = {}
+
+    def _get_health(self, client: Audio2Face) -> _ServerHealth:
+        health = self._health.get(client)
+        if health is None:
+            health = self._health[client] = _ServerHealth(self.window)
+        return health
+
+    def health(self, client: Audio2Face) -> dict:
+        h = self._get_health(client)
+        return {
+            "jobs": h.jobs,
+            "recycles": h.recycles,
+            "error_rate": sum(h.errors) / len(h.errors) if h.errors else 0.0,
+            "latency_ratio": self._latency_ratio(h),
+            "memory_mb": h.memory_mb,
+        }
+
+    def _latency_ratio(self, health: _ServerHealth):
+        if len(health.baseline) < self.window or len(health.costs) < self.window:
+            return None
+        return median(health.costs) / max(median(health.baseline), 1e-9)
+
+    def record(self, client: Audio2Face, seconds: float, error: bool, audio_file_path: str = None):
+        """
+        Record a finished job of the server.
+        :return: the reason to recycle the server, None if it is fine.
+        """
+        health = self._get_health(client)
+        health.jobs += 1
+        health.errors.append(error)
+        if not error:
+            size_mb = os.path.getsize(audio_file_path) / 2 ** 20 if audio_file_path else 1.0
+            cost = seconds / max(size_mb, 0.01)
+            health.costs.append(cost)
+            if len(health.baseline) < self.window:
+                health.baseline.append(cost)
+
+        if self.max_jobs is not None and health.jobs >= self.max_jobs:
+            return f"{health.jobs} jobs"
+
+        if len(health.errors) >= self.window:
+            error_rate = sum(health.errors) / len(health.errors)
+            if error_rate >= self.max_error_rate:
+                return f"error rate {error_rate:.0%}"
+
+        ratio = self._latency_ratio(health)
+        if ratio is not None and ratio >= self.max_latency_ratio:
+            return f"jobs {ratio:.1f}x slower than after start"
+
+        process = client.process_audio2face
+        now = time.monotonic()
+        if self.max_memory_mb is not None and process is not None \
+                and now - health.memory_checked_at >= self.memory_check_interval:
+            health.memory_checked_at = now
+            health.memory_mb = process_memory_mb(process.pid)
+            if health.memory_mb is not None and health.memory_mb >= self.max_memory_mb:
+                return f"memory {health.memory_mb:.0f} MB"
+
+        return None
+
+    def recycle(self, client: Audio2Face, reason: str) -> bool:
+        """
+        Restart the server and restore the scene, root path, track, A2E settings and emotion of the client.
+        A server that was not started by this client can't be restarted; its state is only pushed again.
+        :return: False if the server did not come back.
+        """
+        print(f"supervisor: recycling {client.api_url}: {reason}")
+        start = time.perf_counter()
+        # the statistics start over with the new process
+        recycles = self._get_health(client).recycles + 1
+        health = self._health[client] = _ServerHealth(self.window)
+        health.recycles = recycles
+
+        if client.process_audio2face is not None:
+            client.shutdown_a2f()
+            if client.start_headless_server() != "OK":
+                client.metrics.observe("supervisor/recycle", time.perf_counter() - start, error=True)
+                return False
+        else:
+            print(f"supervisor: {client.api_url} was started separately, can't restart it. Pushing the state again.")
+            client.invalidate_state()
+
+        client.resync()
+        client.metrics.inc("supervisor_recycles")
+        client.metrics.observe("supervisor/recycle", time.perf_counter() - start)
+        return True
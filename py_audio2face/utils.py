@@ -1,7 +1,12 @@
 import os
 import glob
-import importlib_resources
-from py_audio2face.settings import APP_DATA_DIR
+import hashlib
+import json
+import shutil
+import uuid
+from py_audio2face.settings import (
+    APP_DATA_DIR, INSTALL_PATH_MEMO_FILE, COMBINED_SCENE_FILE_NAME, COMBINED_SCENE_STREAMING_ROOT
+)
 
 
 def get_files_in_dir(path: str, extensions: list = None) -> list:
@@ -24,9 +29,77 @@ def get_files_in_dir(path: str, extensions: list = None) -> list:
     return files
 
 
+def get_export_file_path(output_path: str, format: str = "usd") -> str:
+    """ The path of the file written by the exporter. Audio2Face appends the format as extension. """
+    if output_path.endswith(f".{format}"):
+        return output_path
+    return f"{output_path}.{format}"
+
+
+def get_animation_output_path(audio_file_path: str, output_folder: str) -> str:
+    """ Output path of an audio file in audio2face_folder: output_folder/<base file name>_a2f_animation """
+    outfile_name, ext = os.path.basename(audio_file_path).rsplit(".", 1)
+    return f"{output_folder}/{outfile_name}_a2f_animation"
+
+
+def file_hash(path: str, chunk_size: int = 2 ** 20) -> str:
+    """ sha256 of the file content as hex string. Reads in chunks, so large files don't end up in memory. """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def link_or_copy(src: str, dst: str, link: bool):
+    """ Atomically places src at dst, as hard link if possible. """
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        if link:
+            try:
+                os.link(src, tmp)
+            except OSError:
+                # other file system or no hard link support
+                shutil.copyfile(src, tmp)
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _read_install_path_memo(install_dir: str, mtime_ns: int):
+    try:
+        with open(INSTALL_PATH_MEMO_FILE, "r", encoding="utf-8") as f:
+            memo = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # installing or removing a version changes the modification time of the install dir
+    if memo.get("install_dir") != install_dir or memo.get("mtime_ns") != mtime_ns:
+        return None
+    path = memo.get("path")
+    return path if path and os.path.isdir(path) else None
+
+
+def _write_install_path_memo(install_dir: str, mtime_ns: int, path: str):
+    tmp = f"{INSTALL_PATH_MEMO_FILE}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(os.path.dirname(INSTALL_PATH_MEMO_FILE), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"install_dir": install_dir, "mtime_ns": mtime_ns, "path": path}, f)
+        os.replace(tmp, INSTALL_PATH_MEMO_FILE)
+    except OSError:
+        # e.g. a read only home. The installation is searched again next time.
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
 def get_audio2face_install_path():
     """
     Get the newest installed audio2face installation path from the default location (in AppData)
+    The result is remembered in INSTALL_PATH_MEMO_FILE until a version is installed or removed.
     """
 
     # the default dir is usually in C:\\Users\\USERNAME\\AppData\\Local\\ov\\pkg\\audio2face-2023.1.1\\
@@ -35,6 +108,15 @@ def get_audio2face_install_path():
 
     # get installed versions:
     audio2face_install_dir = os.path.join(APP_DATA_DIR, "ov/pkg/")
+    try:
+        mtime_ns = os.stat(audio2face_install_dir).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    if mtime_ns is not None:
+        memo = _read_install_path_memo(audio2face_install_dir, mtime_ns)
+        if memo is not None:
+            return memo
+
     installed_versions = [
         os.path.basename(os.path.normpath(d))
         for d in glob.glob(audio2face_install_dir + "audio2face-*")
@@ -55,13 +137,49 @@ def get_audio2face_install_path():
         print(f"Your audio2face version {newest_year}.{newest_version} is old. "
               f"Please consider that a2emotion features won't work.")
 
-    return os.path.join(audio2face_install_dir, newest_version)
+    path = os.path.join(audio2face_install_dir, newest_version)
+    _write_install_path_memo(audio2face_install_dir, mtime_ns, path)
+    return path
+
 
+def resolve_audio2face_install_path(a2f_install_path: str = None) -> str:
+    """
+    Returns the given installation path or the newest installation in the default location. Always ends with "/".
+    """
+    if a2f_install_path is None:
+        a2f_install_path = get_audio2face_install_path()
+        if a2f_install_path is None:
+            raise FileNotFoundError(
+                "Audio2Face installation path is not provided and not found in the registry. "
+                "Install Audio2Face and provide the installation path manually."
+            )
+    if a2f_install_path[-1] != "/":
+        a2f_install_path += "/"
 
-def get_mark_usd_file_path(streaming = False) -> str:
-    if not streaming:
+    return a2f_install_path
+
+
+def get_mark_usd_file_path(streaming = False, combined: bool = False) -> str:
+    """
+    :param combined: the scene with the default and the streaming instances. streaming is ignored then.
+    """
+    import importlib_resources  # only needed when a scene is loaded
+
+    if combined:
+        usd_file_path = importlib_resources.files('py_audio2face') / 'assets' / COMBINED_SCENE_FILE_NAME
+    elif not streaming:
         usd_file_path = importlib_resources.files('py_audio2face') / 'assets' / 'mark_arkit_solved_default.usd'
     else:
         usd_file_path = importlib_resources.files('py_audio2face') / 'assets' / 'mark_arkit_solved_streaming.usd'
 
     return str(usd_file_path)
+
+
+def get_scene_instance(instance: str, streaming: bool, combined: bool) -> str:
+    """
+    Path of an instance of the default or streaming scene in the loaded scene.
+    In the combined scene the instances of the streaming scene are moved from /World to COMBINED_SCENE_STREAMING_ROOT.
+    """
+    if combined and streaming and instance.startswith("/World/"):
+        return COMBINED_SCENE_STREAMING_ROOT + instance[len("/World"):]
+    return instance
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from py_audio2face.emulator import A2FEmulator, write_test_wav
+from py_audio2face.modules.clients._async_transport import A2FAsyncHttpTransport, async_http_installed
+
+
+@unittest.skipUnless(async_http_installed, "py_audio2face[async] is not installed")
+class TestAsyncAudio2Face(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_folder = os.path.join(self.tmp_dir.name, "audio")
+        os.makedirs(self.input_folder)
+        for i in range(3):
+            write_test_wav(os.path.join(self.input_folder, f"clip_{i}.wav"))
+
+        self.emulator = A2FEmulator().start()
+
+    def tearDown(self):
+        self.emulator.stop()
+        self.tmp_dir.cleanup()
+
+    def _run(self, test, transport: A2FAsyncHttpTransport = None):
+        """ Runs the coroutine function test with a client of the emulator """
+        from py_audio2face import AsyncAudio2Face
+
+        async def run():
+            async with AsyncAudio2Face(
+                    api_url=self.emulator.api_url, a2f_install_path=self.tmp_dir.name, transport=transport
+            ) as a2f:
+                return await test(a2f)
+
+        return asyncio.run(run())
+
+    def test_audio2face_single(self):
+        clip = os.path.join(self.input_folder, "clip_0.wav")
+        output_path = self._run(lambda a2f: a2f.audio2face_single(clip, os.path.join(self.tmp_dir.name, "out", "clip_0")))
+
+        self.assertTrue(os.path.isfile(f"{output_path}.usd"))
+        self.assertEqual(self.emulator.state.track, clip)
+        self.assertEqual(self.emulator.state.requests["A2F/Exporter/ExportBlendshapes"], 1)
+
+    def test_audio2face_folder(self):
+        output_folder = os.path.join(self.tmp_dir.name, "out")
+        output_files = self._run(lambda a2f: a2f.audio2face_folder(self.input_folder, output_folder, fps=30))
+
+        self.assertEqual(len(output_files), 3)
+        for of in output_files:
+            self.assertTrue(os.path.isfile(f"{of}.usd"))
+        self.assertEqual(self.emulator.state.requests["A2F/Player/SetRootPath"], 1)
+        self.assertEqual(self.emulator.state.requests["A2F/Exporter/ExportBlendshapes"], 3)
+
+    def test_json_export(self):
+        clip = os.path.join(self.input_folder, "clip_0.wav")
+
+        async def export(a2f):
+            await a2f.init_a2f()
+            await a2f.set_root_path(clip)
+            await a2f.set_track(clip)
+            return await a2f.export(os.path.join(self.tmp_dir.name, "out", "clip_0"), fps=30, format="json")
+
+        output_path = self._run(export)
+        with open(f"{output_path}.json") as f:
+            self.assertEqual(json.load(f)["numFrames"], 15)
+
+    def test_set_emotion(self):
+        self._run(lambda a2f: a2f.set_emotion(joy=0.8, sadness=0.2))
+        self.assertEqual(self.emulator.state.emotion, [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.8, 0.0, 0.0, 0.2])
+
+    def test_errors_are_reported(self):
+        async def post(a2f):
+            await a2f.init_a2f()
+            await a2f.post("A2F/Player/SetRootPath", {"dir_path": "/does/not/exist"})
+            await a2f.post("A2F/Unknown", {})
+            return a2f.metrics.snapshot()["routes"]
+
+        routes = self._run(post)
+        self.assertEqual(routes["A2F/Player/SetRootPath"]["errors"], 1)
+        # the body of a 404 has no error status, the http status marks the error
+        self.assertEqual(routes["A2F/Unknown"]["errors"], 1)
+
+    def _flaky_session(self, failures: int):
+        """ Patches the aiohttp session to fail the first requests with a connection error. :return: patch, calls """
+        import aiohttp
+        request = aiohttp.ClientSession.request
+        calls = []
+
+        def flaky(session, method, url, **kwargs):
+            calls.append(url)
+            if len(calls) <= failures:
+                raise aiohttp.ClientConnectionError("connection reset")
+            return request(session, method, url, **kwargs)
+
+        return patch.object(aiohttp.ClientSession, "request", flaky), calls
+
+    def test_idempotent_routes_are_retried(self):
+        transport = A2FAsyncHttpTransport(max_retries=2, backoff_factor=0)
+        flaky, calls = self._flaky_session(failures=1)
+        with flaky:
+            response = self._run(lambda a2f: a2f.make_request("A2F/GetInstances"), transport=transport)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(response["status"], "OK")
+
+    def test_export_is_not_retried(self):
+        transport = A2FAsyncHttpTransport(max_retries=2, backoff_factor=0)
+        flaky, calls = self._flaky_session(failures=1)
+
+        async def export(a2f):
+            response = await a2f.post("A2F/Exporter/ExportBlendshapes", {})
+            return response, a2f.metrics.snapshot()["routes"]
+
+        with flaky:
+            response, routes = self._run(export, transport=transport)
+
+        self.assertEqual(len(calls), 1)
+        self.assertIn("connection reset", response)
+        self.assertEqual(routes["A2F/Exporter/ExportBlendshapes"]["errors"], 1)
+        self.assertEqual(self.emulator.state.requests["A2F/Exporter/ExportBlendshapes"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
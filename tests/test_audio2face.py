@@ -15,7 +15,7 @@ class TestAudio2Face(unittest.TestCase):
         # Optional: Clean up after each test
         pass
 
-    @patch('py_audio2face.audio2face.requests.get')
+    @patch('py_audio2face.audio2face.A2FHttpTransport.request')
     def test_start_headless_server_success(self, mock_get):
         # Simulate a successful status response
         mock_get.return_value.json.return_value = "OK"
@@ -25,7 +25,7 @@ class TestAudio2Face(unittest.TestCase):
 
         self.assertEqual(status, "OK")
 
-    @patch('py_audio2face.audio2face.requests.get')
+    @patch('py_audio2face.audio2face.A2FHttpTransport.request')
     def test_start_headless_server_timeout(self, mock_get):
         # Simulate a timeout scenario
         mock_get.return_value.json.return_value = "NOT OK"
@@ -0,0 +1,51 @@
+import unittest
+
+from py_audio2face.modules._streaming import streaming_installed
+
+if streaming_installed:
+    import numpy as np
+    from py_audio2face.modules._audio_processing import A2FAudioPreprocessor, Rechunker, to_float32
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestAudioProcessing(unittest.TestCase):
+
+    def test_mono_float32_is_not_copied(self):
+        chunk = np.zeros(160, dtype=np.float32)
+        self.assertIs(to_float32(chunk), chunk)
+
+    def test_int16_stereo_is_scaled_and_downmixed(self):
+        frames = np.array([[16384, 0], [-32768, -32768]], dtype=np.int16)
+        np.testing.assert_allclose(to_float32(frames), [0.25, -1.0])
+        # interleaved bytes of the same frames
+        np.testing.assert_allclose(to_float32(frames.tobytes(), channels=2, dtype=np.int16), [0.25, -1.0])
+
+    def test_rechunker_returns_views_and_equal_chunks(self):
+        rechunker = Rechunker(100)
+        aligned = np.arange(300, dtype=np.float32)
+        chunks = list(rechunker.push(aligned))
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(all(np.shares_memory(c, aligned) for c in chunks))
+
+        bursts = [np.ones(n, dtype=np.float32) for n in (30, 250, 5, 160)]
+        chunks = [c for burst in bursts for c in rechunker.push(burst)] + list(rechunker.flush())
+        self.assertEqual([len(c) for c in chunks], [100, 100, 100, 100, 45])
+
+    def test_resampling_across_irregular_chunks(self):
+        samplerate = 24000
+        t = np.arange(samplerate) / samplerate
+        signal = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+        preprocessor = A2FAudioPreprocessor(samplerate, target_samplerate=16000, chunk_size=1600)
+
+        bursts = np.split(signal, [240, 5000, 5100, 17000])
+        chunks = list(preprocessor.stream(bursts))
+        out = np.concatenate(chunks)
+
+        self.assertTrue(all(len(c) == 1600 for c in chunks[:-1]))
+        self.assertAlmostEqual(len(out), 16000, delta=1)
+        expected = np.sin(2 * np.pi * 440 * np.arange(len(out)) / 16000)
+        self.assertLess(np.max(np.abs(out - expected)), 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.autoscaling import AutoscalingAudio2FacePool
+from py_audio2face.modules._cache import A2FAnimationCache
+from py_audio2face.emulator import A2FEmulator, LatencyProfile, write_test_wav
+from py_audio2face.modules.clients._launcher import A2FLauncher
+
+
+class TestAutoscalingPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.clip = write_test_wav(os.path.join(self.tmp_dir.name, "audio", "clip.wav"), seconds=0.1)
+        self.emulators = {}
+
+    def tearDown(self):
+        for emulator in self.emulators.values():
+            emulator.stop()
+        self.tmp_dir.cleanup()
+
+    def _client_factory(self, index: int, metrics) -> Audio2Face:
+        # one emulator per index stands in for a headless server on its own port
+        if index not in self.emulators:
+            latency = LatencyProfile(routes={"A2F/Exporter/ExportBlendshapes": 0.02})
+            self.emulators[index] = A2FEmulator(latency=latency).start()
+        launcher = A2FLauncher(command=["false"], log_file=None, timeout=1)
+        cache = A2FAnimationCache(os.path.join(self.tmp_dir.name, "cache"))
+        return Audio2Face(api_url=self.emulators[index].api_url, a2f_install_path=self.tmp_dir.name,
+                          launcher=launcher, metrics=metrics, cache=cache)
+
+    def _wait_for(self, condition, timeout: float = 10):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return condition()
+
+    def test_scale_up_and_down(self):
+        pool = AutoscalingAudio2FacePool(
+            self._client_factory, min_servers=1, max_servers=3, scale_up_queue_depth=2,
+            idle_cooldown=0.2, check_interval=0.02
+        )
+        # the minimum is warm before the first clip
+        self.assertEqual(self.emulators[0].state.requests["A2F/USD/Load"], 1)
+        # one status request checks the server before the scene is loaded
+        self.assertEqual(self.emulators[0].state.requests["status"], 1)
+        # all clients, their grpc channels and caches report to the pool
+        client = pool.clients[0]
+        self.assertIs(client.metrics, pool.metrics)
+        self.assertIs(client.grpc_channels.metrics, pool.metrics)
+        self.assertIs(client.cache.metrics, pool.metrics)
+
+        futures = pool.map([self.clip] * 40, [os.path.join(self.tmp_dir.name, "out", f"clip_{i}") for i in range(40)])
+        for f in futures:
+            f.result(timeout=30)
+
+        counters = pool.metrics.snapshot()["counters"]
+        self.assertGreaterEqual(counters["autoscale_scale_ups"], 1)
+        self.assertLessEqual(len(self.emulators), 3)
+        self.assertTrue(self._wait_for(lambda: len(pool.clients) == 1))
+        self.assertIn("scale down", [d[1] for d in pool.decisions])
+        pool.close()
+
+    def test_min_servers_must_start(self):
+        factory = lambda i, metrics: Audio2Face(api_url="http://127.0.0.1:9", a2f_install_path=self.tmp_dir.name,
+                                       launcher=A2FLauncher(command=["false"], log_file=None, timeout=1))
+        with self.assertRaises(RuntimeError):
+            AutoscalingAudio2FacePool(factory, min_servers=1)
+
+    def test_indices_of_retired_servers_are_reused(self):
+        pool = AutoscalingAudio2FacePool(self._client_factory, min_servers=2, max_servers=2, check_interval=0.02)
+        client = pool.clients[1]
+        with pool._cond:
+            pool._retire_worker(pool._workers[1])
+        pool._stop_client(client)
+        with pool._cond:
+            self.assertEqual(pool._used_indices, {0})
+            self.assertEqual(pool._reserve_index(), 1)
+        pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
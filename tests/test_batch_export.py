@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.modules._cache import A2FAnimationCache
+from py_audio2face.emulator import A2FEmulator, write_test_wav
+
+
+class TestBatchExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_folder = os.path.join(self.tmp_dir.name, "audio")
+        self.output_folder = os.path.join(self.tmp_dir.name, "out")
+        for i in range(4):
+            write_test_wav(os.path.join(self.input_folder, f"clip_{i}.wav"), seconds=0.1)
+
+        self.emulator = A2FEmulator().start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=self.tmp_dir.name)
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+        self.tmp_dir.cleanup()
+
+    def _requests(self, route: str) -> int:
+        return self.emulator.state.requests[route]
+
+    def test_folder_is_exported_with_one_call(self):
+        output_files = self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30, batch=True)
+
+        self.assertEqual(self._requests("A2F/Exporter/ExportBlendshapes"), 1)
+        self.assertEqual(self._requests("A2F/Player/SetTrack"), 0)
+        self.assertEqual(
+            sorted(os.listdir(self.output_folder)),
+            [".a2f_manifest.jsonl"] + [f"clip_{i}_a2f_animation.usd" for i in range(4)]
+        )
+        self.assertTrue(all(os.path.isfile(f"{f}.usd") for f in output_files))
+
+        # the rerun finds everything in the manifest
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30, batch=True)
+        self.assertEqual(self._requests("A2F/Exporter/ExportBlendshapes"), 1)
+
+    def test_cache_hits_are_recorded_in_the_manifest(self):
+        self.a2f.cache = A2FAnimationCache(os.path.join(self.tmp_dir.name, "cache"), metrics=self.a2f.metrics)
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30, batch=True)
+
+        # a new output folder is filled from the cache, without touching the player
+        other_folder = os.path.join(self.tmp_dir.name, "out_2")
+        self.a2f.audio2face_folder(self.input_folder, other_folder, fps=30, batch=True)
+        self.assertEqual(self._requests("A2F/Exporter/ExportBlendshapes"), 1)
+        self.assertEqual(self._requests("A2F/Player/SetRootPath"), 1)
+        with open(os.path.join(other_folder, ".a2f_manifest.jsonl")) as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+    def test_overridden_files_are_exported_one_by_one(self):
+        overrides = {"clip_0.wav": {"fps": 24}, "clip_1.wav": {"emotion": True}}
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30, batch=True, overrides=overrides)
+
+        # one batch call for clip_2 and clip_3, one export for each overridden file
+        self.assertEqual(self._requests("A2F/Exporter/ExportBlendshapes"), 3)
+        self.assertEqual(self._requests("A2F/Player/SetTrack"), 2)
+        self.assertEqual(self._requests("A2F/A2E/GenerateKeys"), 1)
+        self.assertEqual(len([f for f in os.listdir(self.output_folder) if f.endswith(".usd")]), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator, write_test_wav
+from py_audio2face.modules._cache import A2FAnimationCache
+
+
+class TestAnimationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.clip = write_test_wav(os.path.join(self.tmp_dir.name, "audio", "clip.wav"), seconds=0.1)
+        self.cache = A2FAnimationCache(cache_dir=os.path.join(self.tmp_dir.name, "cache"))
+
+        self.emulator = A2FEmulator().start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=self.tmp_dir.name, cache=self.cache)
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+        self.tmp_dir.cleanup()
+
+    def _out(self, name: str) -> str:
+        return os.path.join(self.tmp_dir.name, "out", name)
+
+    def _requests(self) -> int:
+        return sum(self.emulator.state.requests.values())
+
+    def test_hit_skips_the_server(self):
+        first = self.a2f.audio2face_single(self.clip, self._out("a"), fps=30)
+        requests = self._requests()
+        second = self.a2f.audio2face_single(self.clip, self._out("b"), fps=30)
+
+        self.assertEqual(self._requests(), requests)
+        with open(f"{first}.usd", "rb") as f1, open(f"{second}.usd", "rb") as f2:
+            self.assertEqual(f1.read(), f2.read())
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "evictions": 0, "puts": 1})
+        self.assertEqual(self.a2f.metrics.snapshot()["counters"]["animation_cache_hits"], 1)
+
+    def test_settings_are_part_of_the_key(self):
+        self.a2f.audio2face_single(self.clip, self._out("a"), fps=30)
+        self.a2f.audio2face_single(self.clip, self._out("a"), fps=60)
+        self.a2f.audio2face_single(self.clip, self._out("a"), fps=30, emotion_auto_detect=False)
+        self.assertEqual(self.cache.misses, 3)
+        self.assertEqual(self.emulator.state.requests["A2F/Exporter/ExportBlendshapes"], 3)
+
+    def test_lru_eviction(self):
+        self.a2f.audio2face_single(self.clip, self._out("a"), fps=30)
+        object_size = self.cache.size()
+        # room for two animations of about the same size
+        self.cache.max_bytes = int(object_size * 2.5)
+
+        self.a2f.audio2face_single(self.clip, self._out("a"), fps=29)
+        self.a2f.audio2face_single(self.clip, self._out("a"), fps=30)  # hit, fps=30 becomes the most recent
+        self.a2f.audio2face_single(self.clip, self._out("a"), fps=31)
+
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertLessEqual(self.cache.size(), self.cache.max_bytes)
+        misses = self.cache.misses
+        self.a2f.audio2face_single(self.clip, self._out("a"), fps=30)
+        self.assertEqual(self.cache.misses, misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
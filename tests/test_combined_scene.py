@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator, write_test_wav
+from py_audio2face.modules._streaming import streaming_installed
+from py_audio2face.settings import DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE, DEFAULT_PLAYER_INSTANCE
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestCombinedScene(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.clip = write_test_wav(os.path.join(self.tmp_dir.name, "clip.wav"), seconds=0.1)
+        self.emulator = A2FEmulator(grpc_port=0).start()
+
+    def tearDown(self):
+        self.emulator.stop()
+        self.tmp_dir.cleanup()
+
+    def _mixed_workload(self, a2f: Audio2Face):
+        import numpy as np
+        out = os.path.join(self.tmp_dir.name, "out", "clip")
+        for _ in range(2):
+            a2f.audio2face_single(self.clip, out, fps=30, emotion_auto_detect=False)
+            chunks = (np.zeros(1600, dtype=np.float32) for _ in range(2))
+            self.assertTrue(a2f.stream_audio(chunks, samplerate=16000, grpc_port=self.emulator.grpc_port))
+
+    def test_mixed_workload_loads_the_scene_once(self):
+        a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=".", combined_scene=True)
+        self._mixed_workload(a2f)
+        a2f.close()
+
+        self.assertEqual(self.emulator.state.requests["A2F/USD/Load"], 1)
+        self.assertEqual(a2f.metrics.counters["scene_loads"], 1)
+        # offline calls keep the paths of the default scene, the stream goes to the player under /World_streaming
+        self.assertEqual(a2f.scene_instance(DEFAULT_PLAYER_INSTANCE), DEFAULT_PLAYER_INSTANCE)
+        self.assertEqual(
+            self.emulator.state.streams[-1]["instance_name"], "/World_streaming/audio2face/PlayerStreaming"
+        )
+
+    def test_switching_scenes_reloads(self):
+        a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=".")
+        self._mixed_workload(a2f)
+        a2f.close()
+
+        self.assertEqual(a2f.metrics.counters["scene_loads"], 4)
+        self.assertEqual(self.emulator.state.streams[-1]["instance_name"], DEFAULT_AUDIO_STREAM_PLAYER_INSTANCE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator, LatencyProfile, write_test_wav
+from py_audio2face.modules._metrics import A2FMetrics
+from py_audio2face.modules._streaming import streaming_installed
+
+
+class TestEmulator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_folder = os.path.join(self.tmp_dir.name, "audio")
+        os.makedirs(self.input_folder)
+        for i in range(3):
+            write_test_wav(os.path.join(self.input_folder, f"clip_{i}.wav"))
+
+        self.emulator = A2FEmulator().start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=self.tmp_dir.name)
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+        self.tmp_dir.cleanup()
+
+    def test_audio2face_folder_writes_exports(self):
+        output_folder = os.path.join(self.tmp_dir.name, "out")
+        output_files = self.a2f.audio2face_folder(self.input_folder, output_folder, fps=30)
+
+        self.assertEqual(len(output_files), 3)
+        for of in output_files:
+            self.assertTrue(os.path.isfile(f"{of}.usd"))
+        self.assertEqual(self.emulator.state.requests["A2F/Exporter/ExportBlendshapes"], 3)
+
+    def test_json_export_has_one_row_per_frame(self):
+        clip = os.path.join(self.input_folder, "clip_0.wav")
+        self.a2f.init_a2f()
+        self.a2f.set_root_path(clip)
+        self.a2f.set_track(clip)
+        output_path = self.a2f.export(os.path.join(self.tmp_dir.name, "out", "clip_0"), fps=30, format="json")
+
+        with open(f"{output_path}.json") as f:
+            export = json.load(f)
+        self.assertEqual(export["numFrames"], 15)
+        self.assertEqual(len(export["weightMat"]), 15)
+        self.assertEqual(len(export["facsNames"]), export["numPoses"])
+
+    def test_errors_are_reported(self):
+        self.a2f.init_a2f()
+        response = self.a2f.post("A2F/Player/SetRootPath", {"dir_path": "/does/not/exist"})
+        self.assertEqual(response["status"], "ERROR")
+        self.assertEqual(self.a2f.metrics.snapshot()["routes"]["A2F/Player/SetRootPath"]["errors"], 1)
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestEmulatorStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = A2FEmulator(grpc_port=0).start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=".")
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+
+    def test_stream_audio(self):
+        import numpy as np
+        chunks = (np.zeros(1600, dtype=np.float32) for _ in range(10))
+        success = self.a2f.stream_audio(chunks, samplerate=16000, grpc_port=self.emulator.grpc_port)
+
+        self.assertTrue(success)
+        stream = self.emulator.state.streams[-1]
+        self.assertEqual(stream["chunks"], 10)
+        self.assertAlmostEqual(stream["audio_seconds"], 1.0)
+        self.assertEqual(self.a2f.metrics.snapshot()["routes"]["PushAudioStream"]["count"], 1)
+
+
+class TestLatencyProfile(unittest.TestCase):
+
+    def test_replay_recorded_latencies(self):
+        metrics = A2FMetrics()
+        metrics.observe("A2F/Player/SetTrack", 0.25)
+        profile = LatencyProfile.from_metrics(metrics, default=0.01)
+
+        self.assertEqual(profile.sample("A2F/Player/SetTrack"), 0.25)
+        self.assertEqual(profile.sample("status"), 0.01)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile.json")
+            profile.save(path)
+            self.assertEqual(LatencyProfile.load(path).sample("A2F/Player/SetTrack"), 0.25)
+
+    def test_jitter_stays_in_range(self):
+        profile = LatencyProfile(routes={"status": {"mean": 0.1, "jitter": 0.05}}, seed=1)
+        for _ in range(100):
+            self.assertTrue(0.05 <= profile.sample("status") <= 0.15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator
+from py_audio2face.modules._streaming import streaming_installed
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestChunkFramer(unittest.TestCase):
+
+    def test_frames_equal_protobuf_serialization(self):
+        import numpy as np
+        from py_audio2face.modules._audio_processing import to_float32
+        from py_audio2face.modules._framing import A2FChunkFramer
+        from py_audio2face.modules.clients.grpc_stub import audio2face_pb2
+
+        chunks = [
+            np.linspace(-1, 1, 1600, dtype=np.float32),
+            (np.arange(40000) % 300).astype(np.int16),  # two byte varint length
+            np.ones((160, 2), dtype=np.int16),
+            np.ones((7, 1), dtype=np.float32),
+            np.arange(20, dtype=np.float32)[::2],
+            np.zeros(0, dtype=np.float32),
+            bytes(64),
+        ]
+        framer = A2FChunkFramer()
+        for chunk in chunks:
+            audio_data = to_float32(chunk).tobytes() if isinstance(chunk, np.ndarray) else chunk
+            expected = audio2face_pb2.PushAudioStreamRequest(audio_data=audio_data).SerializeToString()
+            message, num_bytes = framer.frame(chunk)
+            self.assertEqual(message, expected)
+            self.assertEqual(num_bytes, len(audio_data))
+
+    def test_messages_outlive_the_scratch_buffer(self):
+        import numpy as np
+        from py_audio2face.modules._framing import A2FChunkFramer
+
+        framer = A2FChunkFramer()
+        # 400 bytes of audio behind a 3 byte header
+        first, _ = framer.frame(np.full(100, 1000, dtype=np.int16))
+        framer.frame(np.full(100, -1000, dtype=np.int16))
+        self.assertTrue((np.frombuffer(first[3:], dtype=np.float32) > 0).all())
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestFramedStream(unittest.TestCase):
+
+    def test_int16_stream_reaches_the_player_as_float32(self):
+        import numpy as np
+
+        with A2FEmulator(grpc_port=0) as emulator:
+            a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+            chunks = (np.zeros(320, dtype=np.int16) for _ in range(50))
+            self.assertTrue(a2f.stream_audio(chunks, 16000, grpc_port=emulator.grpc_port))
+            a2f.close()
+            stream = emulator.state.streams[-1]
+        self.assertEqual(stream["chunks"], 50)
+        self.assertEqual(stream["bytes"], 50 * 320 * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import asyncio
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator
+from py_audio2face.modules._streaming import streaming_installed
+
+
+def _chunks(count: int = 2):
+    import numpy as np
+    return (np.zeros(1600, dtype=np.float32) for _ in range(count))
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestGrpcChannelPool(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = A2FEmulator(grpc_port=0).start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=".")
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+
+    def test_streams_reuse_the_channel(self):
+        for _ in range(3):
+            self.assertTrue(self.a2f.stream_audio(_chunks(), samplerate=16000, grpc_port=self.emulator.grpc_port))
+
+        counters = self.a2f.metrics.counters
+        self.assertEqual(counters["grpc_channels_opened"], 1)
+        self.assertEqual(counters["grpc_channel_reuses"], 2)
+        self.assertEqual(self.a2f.metrics.snapshot()["routes"]["grpc/channel_setup"]["count"], 1)
+
+    def test_reconnect_after_server_restart(self):
+        import grpc
+        grpc_port = self.emulator.grpc_port
+        self.assertTrue(self.a2f.stream_audio(_chunks(), samplerate=16000, grpc_port=grpc_port))
+
+        self.emulator.stop()
+        with self.assertRaises(grpc.RpcError):
+            self.a2f.stream_audio(_chunks(), samplerate=16000, grpc_port=grpc_port)
+
+        self.emulator = A2FEmulator(grpc_port=grpc_port).start()
+        self.assertTrue(self.a2f.stream_audio(_chunks(), samplerate=16000, grpc_port=grpc_port))
+        self.assertEqual(self.a2f.metrics.counters["grpc_channel_reconnects"], 1)
+
+    def test_aio_channels_are_reused_per_event_loop(self):
+        from py_audio2face import AsyncAudio2Face
+
+        async def run():
+            async with AsyncAudio2Face(api_url=self.emulator.api_url, a2f_install_path=".") as a2f:
+                for _ in range(2):
+                    self.assertTrue(
+                        await a2f.stream_audio(_chunks(), samplerate=16000, grpc_port=self.emulator.grpc_port)
+                    )
+                return a2f.metrics.counters
+
+        counters = asyncio.run(run())
+        self.assertEqual(counters["grpc_channels_opened"], 1)
+        self.assertEqual(counters["grpc_channel_reuses"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import socket
+import sys
+import tempfile
+import time
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.modules.clients._launcher import A2FLauncher
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestLauncher(unittest.TestCase):
+    """ Starts the emulator as "headless server" through the launcher. """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.port = _free_port()
+        self.command = [sys.executable, "-m", "py_audio2face.emulator", "--port", str(self.port), "--no-grpc"]
+        self.log_file = os.path.join(self.tmp_dir.name, "logs", "headless.log")
+        self.python_path = os.environ.get("PYTHONPATH")
+        os.environ["PYTHONPATH"] = REPO_ROOT + os.pathsep + (self.python_path or "")
+
+    def tearDown(self):
+        if self.python_path is None:
+            del os.environ["PYTHONPATH"]
+        else:
+            os.environ["PYTHONPATH"] = self.python_path
+        self.tmp_dir.cleanup()
+
+    def _client(self, launcher: A2FLauncher) -> Audio2Face:
+        return Audio2Face(api_url=f"http://127.0.0.1:{self.port}", a2f_install_path=self.tmp_dir.name,
+                          launcher=launcher)
+
+    def test_ready_from_log(self):
+        a2f = self._client(A2FLauncher(command=self.command, log_file=self.log_file, timeout=30))
+        status = a2f.start_headless_server()
+        a2f.shutdown_a2f()
+        a2f.close()
+
+        self.assertEqual(status, "OK")
+        self.assertEqual(a2f.launcher.ready_source, "log")
+        self.assertIn("server_cold_start_seconds", a2f.metrics.snapshot()["gauges"])
+        with open(self.log_file) as f:
+            self.assertIn("app ready", f.read())
+
+    def test_fallback_to_status_polling(self):
+        launcher = A2FLauncher(command=self.command, log_file=None, ready_patterns=("never logged",), timeout=30)
+        a2f = self._client(launcher)
+        status = a2f.start_headless_server()
+        a2f.shutdown_a2f()
+        a2f.close()
+
+        self.assertEqual(status, "OK")
+        self.assertEqual(launcher.ready_source, "status")
+
+    def test_failing_command_returns_early(self):
+        command = [sys.executable, "-c", "import sys; print('license error'); sys.exit(3)"]
+        a2f = self._client(A2FLauncher(command=command, log_file=self.log_file, timeout=30))
+        start = time.perf_counter()
+        status = a2f.start_headless_server()
+        a2f.close()
+
+        self.assertEqual(status, "timeout")
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertIn("license error", a2f.launcher.tail)
+
+    def test_missing_headless_script(self):
+        with self.assertRaises(ValueError):
+            A2FLauncher(a2f_install_path=self.tmp_dir.name).get_command()
+
+    def test_launchers_have_their_own_default_log(self):
+        first, second = A2FLauncher(command=self.command), A2FLauncher(command=self.command)
+        self.assertNotEqual(first.log_file, second.log_file)
+        self.assertIn(str(os.getpid()), os.path.basename(first.log_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
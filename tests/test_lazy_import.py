@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from py_audio2face import utils
+from py_audio2face.audio2face import Audio2Face
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_import_and_construction_load_no_optional_dependencies(self):
+        heavy = ["grpc", "numpy", "google.protobuf", "requests", "aiohttp", "tqdm", "importlib_resources"]
+        snippet = (
+            "import sys, json; from py_audio2face import Audio2Face; Audio2Face(); "
+            f"print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+        )
+        env = {**os.environ, "PYTHONPATH": REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+        out = subprocess.run([sys.executable, "-c", snippet], env=env, capture_output=True, text=True, check=True)
+        self.assertEqual(json.loads(out.stdout.strip().splitlines()[-1]), [])
+
+    def test_install_path_is_resolved_on_first_use(self):
+        with patch("py_audio2face.utils.get_audio2face_install_path", return_value=None):
+            a2f = Audio2Face()
+            with self.assertRaises(FileNotFoundError):
+                a2f.a2f_install_path
+
+    def test_install_path_is_memoized_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            install_path = os.path.join(tmp_dir, "ov", "pkg", "audio2face-2023.2.0")
+            os.makedirs(install_path)
+            memo_file = os.path.join(tmp_dir, "memo", "install_path.json")
+            with patch("py_audio2face.utils.APP_DATA_DIR", tmp_dir), \
+                    patch("py_audio2face.utils.INSTALL_PATH_MEMO_FILE", memo_file):
+                self.assertEqual(os.path.normpath(utils.get_audio2face_install_path()), install_path)
+                self.assertTrue(os.path.isfile(memo_file))
+
+                with patch("py_audio2face.utils.glob.glob") as mock_glob:
+                    utils.get_audio2face_install_path()
+                    mock_glob.assert_not_called()
+
+                # a new version changes the install dir and invalidates the memo
+                newer = os.path.join(tmp_dir, "ov", "pkg", "audio2face-2023.3.0")
+                os.makedirs(newer)
+                os.utime(os.path.dirname(newer), ns=(0, 1))
+                self.assertEqual(os.path.normpath(utils.get_audio2face_install_path()), newer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator, write_test_wav
+from py_audio2face.modules._manifest import A2FManifest
+
+
+class TestResumableFolder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_folder = os.path.join(self.tmp_dir.name, "audio")
+        self.output_folder = os.path.join(self.tmp_dir.name, "out")
+        for i in range(3):
+            write_test_wav(os.path.join(self.input_folder, f"clip_{i}.wav"), seconds=0.1)
+
+        self.emulator = A2FEmulator().start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=self.tmp_dir.name)
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+        self.tmp_dir.cleanup()
+
+    def _exports(self) -> int:
+        return self.emulator.state.requests["A2F/Exporter/ExportBlendshapes"]
+
+    def test_rerun_processes_only_new_and_changed_files(self):
+        first = self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30)
+        self.assertEqual(self._exports(), 3)
+
+        second = self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30)
+        self.assertEqual(self._exports(), 3)
+        self.assertEqual(sorted(first), sorted(second))
+
+        write_test_wav(os.path.join(self.input_folder, "clip_1.wav"), seconds=0.2)
+        write_test_wav(os.path.join(self.input_folder, "clip_3.wav"), seconds=0.1)
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30)
+        self.assertEqual(self._exports(), 5)
+
+    def test_changed_settings_and_missing_outputs_are_redone(self):
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30)
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=60)
+        self.assertEqual(self._exports(), 6)
+
+        os.remove(os.path.join(self.output_folder, "clip_0_a2f_animation.usd"))
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=60)
+        self.assertEqual(self._exports(), 7)
+
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=60, resume=False)
+        self.assertEqual(self._exports(), 10)
+
+    def test_truncated_manifest_line_is_ignored(self):
+        self.a2f.audio2face_folder(self.input_folder, self.output_folder, fps=30)
+        manifest_path = A2FManifest(self.output_folder).path
+        with open(manifest_path, "a") as f:
+            f.write('{"input": "/crashed/while/writ')
+
+        manifest = A2FManifest(self.output_folder)
+        self.assertEqual(len(manifest.entries), 3)
+        self.assertTrue(all(r["status"] == "done" for r in manifest.entries.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import json
+import unittest
+
+from py_audio2face.modules._metrics import A2FMetrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_percentiles_and_errors(self):
+        metrics = A2FMetrics()
+        for i in range(1, 101):
+            metrics.observe("A2F/Player/SetTrack", i / 1000, error=(i % 10 == 0))
+
+        snapshot = metrics.snapshot()["routes"]["A2F/Player/SetTrack"]
+        self.assertEqual(snapshot["count"], 100)
+        self.assertEqual(snapshot["errors"], 10)
+        self.assertAlmostEqual(snapshot["p50"], 0.05)
+        self.assertAlmostEqual(snapshot["p95"], 0.095)
+        self.assertAlmostEqual(snapshot["p99"], 0.099)
+
+    def test_time_counts_exceptions_as_errors(self):
+        metrics = A2FMetrics()
+        with self.assertRaises(RuntimeError):
+            with metrics.time("PushAudioStream"):
+                raise RuntimeError("stream broken")
+
+        self.assertEqual(metrics.snapshot()["routes"]["PushAudioStream"]["errors"], 1)
+
+    def test_exports(self):
+        metrics = A2FMetrics(buckets=(0.1, 1))
+        metrics.observe("A2F/Exporter/ExportBlendshapes", 0.5)
+        metrics.inc("scene_loads")
+        metrics.set_gauge("servers", 2)
+
+        text = metrics.to_prometheus()
+        self.assertIn('a2f_request_duration_seconds_bucket{route="A2F/Exporter/ExportBlendshapes",le="0.1"} 0', text)
+        self.assertIn('a2f_request_duration_seconds_bucket{route="A2F/Exporter/ExportBlendshapes",le="1"} 1', text)
+        self.assertIn('a2f_request_duration_seconds_count{route="A2F/Exporter/ExportBlendshapes"} 1', text)
+        self.assertIn("a2f_scene_loads_total 1", text)
+        self.assertIn("a2f_servers 2", text)
+
+        data = json.loads(metrics.to_json())
+        self.assertEqual(data["routes"]["A2F/Exporter/ExportBlendshapes"]["count"], 1)
+        self.assertEqual(data["counters"]["scene_loads"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
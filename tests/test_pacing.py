@@ -0,0 +1,166 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import PropertyMock, patch
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator
+from py_audio2face.modules._pacing import A2FStreamPacer
+from py_audio2face.modules._streaming import streaming_installed
+from py_audio2face.modules.clients._grpc_channels import _PooledChannel
+
+SAMPLERATE = 16000
+CHUNK = bytes(1600 * 4)  # 0.1 s of float32
+
+
+def _tts(chunks: int = 20, delay: float = 0.0, stall_at: int = None, stall: float = 0.0):
+    for i in range(chunks):
+        if i == stall_at:
+            time.sleep(stall)
+        time.sleep(delay)
+        yield CHUNK
+
+
+class TestStreamPacer(unittest.TestCase):
+
+    def test_paced_sending_and_backpressure(self):
+        pacer = A2FStreamPacer(realtime_factor=4, buffer_seconds=0.5, lead_seconds=0.5)
+        start = time.perf_counter()
+        self.assertEqual(len(list(pacer.stream(_tts(), SAMPLERATE))), 20)
+        seconds = time.perf_counter() - start
+
+        stats = pacer.stats
+        # 2 s of audio, 0.5 s lead sent at once, the rest at 4x real time
+        self.assertGreater(seconds, 0.3)
+        self.assertLess(seconds, 1.0)
+        self.assertAlmostEqual(stats.audio_seconds, 2.0)
+        self.assertLessEqual(stats.max_buffer_seconds, 0.5 + 1e-9)
+        self.assertGreater(stats.producer_blocked_seconds, 0.1)
+        self.assertEqual(stats.underruns, 0)
+
+    def test_slow_producer_underruns(self):
+        pacer = A2FStreamPacer(realtime_factor=10, lead_seconds=0.1)
+        list(pacer.stream(_tts(chunks=10, stall_at=5, stall=0.2), SAMPLERATE))
+        self.assertEqual(pacer.stats.underruns, 1)
+        self.assertGreater(pacer.stats.underrun_seconds, 0.1)
+
+    def test_unpaced_stream_is_only_decoupled(self):
+        pacer = A2FStreamPacer(realtime_factor=None)
+        start = time.perf_counter()
+        list(pacer.stream(_tts(chunks=50), SAMPLERATE))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_astream(self):
+        async def tts():
+            for _ in range(10):
+                await asyncio.sleep(0)
+                yield CHUNK
+
+        async def run():
+            pacer = A2FStreamPacer(realtime_factor=10, buffer_seconds=0.3, lead_seconds=0.2)
+            chunks = [chunk async for chunk in pacer.astream(tts(), SAMPLERATE)]
+            return chunks, pacer.stats
+
+        chunks, stats = asyncio.run(run())
+        self.assertEqual(len(chunks), 10)
+        self.assertLessEqual(stats.max_buffer_seconds, 0.3 + 1e-9)
+        self.assertGreater(stats.duration, 0.07)
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestPacedStreamAudio(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = A2FEmulator(grpc_port=0).start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=".")
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+
+    def test_paced_stream_reaches_the_player(self):
+        pacer = A2FStreamPacer(realtime_factor=20)
+        self.assertTrue(self.a2f.stream_audio(_tts(), SAMPLERATE, grpc_port=self.emulator.grpc_port, pacer=pacer))
+        self.assertEqual(self.emulator.state.streams[-1]["chunks"], 20)
+        self.assertIn("stream_buffer_seconds_max", self.a2f.metrics.snapshot()["gauges"])
+
+    def test_producer_error_is_raised(self):
+        def failing_tts():
+            yield CHUNK
+            raise RuntimeError("tts failed")
+
+        with self.assertRaisesRegex(RuntimeError, "tts failed"):
+            self.a2f.stream_audio(failing_tts(), SAMPLERATE, grpc_port=self.emulator.grpc_port, pacer=A2FStreamPacer())
+
+    def _failing_call(self, sent: list):
+        """ Patches the grpc call to fail after the start marker and 2 chunks """
+        def push_audio_stream_raw(requests):
+            for message in requests:
+                sent.append(message)
+                if len(sent) == 3:
+                    raise RuntimeError("connection lost")
+
+        return patch.object(_PooledChannel, "push_audio_stream_raw", new_callable=PropertyMock,
+                            return_value=push_audio_stream_raw)
+
+    def test_failed_call_releases_the_producer(self):
+        produced = []
+
+        def tts():
+            try:
+                for _ in range(50):
+                    yield CHUNK
+            finally:
+                produced.append("closed")
+
+        sent = []
+        pacer = A2FStreamPacer(realtime_factor=None, buffer_seconds=0.3)
+        with self._failing_call(sent), self.assertRaisesRegex(RuntimeError, "connection lost"):
+            self.a2f.stream_audio(tts(), SAMPLERATE, grpc_port=self.emulator.grpc_port, pacer=pacer)
+
+        # the producer was blocked on the full buffer. It stops once the paced stream is closed.
+        for _ in range(100):
+            if produced:
+                break
+            time.sleep(0.01)
+        self.assertEqual(produced, ["closed"])
+        self.assertEqual(len(sent), 3)
+        self.assertGreater(pacer.stats.duration, 0)
+        self.assertIn("stream_buffer_seconds_max", self.a2f.metrics.snapshot()["gauges"])
+
+    def test_failed_async_call_releases_the_producer(self):
+        from py_audio2face import AsyncAudio2Face
+        produced = []
+
+        async def tts():
+            try:
+                for _ in range(50):
+                    yield CHUNK
+            finally:
+                produced.append("closed")
+
+        async def failing_call(requests):
+            async for message in requests:
+                sent.append(message)
+                if len(sent) == 3:
+                    raise RuntimeError("connection lost")
+
+        async def run():
+            async with AsyncAudio2Face(api_url=self.emulator.api_url, a2f_install_path=".") as a2f:
+                with patch.object(_PooledChannel, "push_audio_stream_raw", new_callable=PropertyMock,
+                                  return_value=failing_call):
+                    with self.assertRaisesRegex(RuntimeError, "connection lost"):
+                        await a2f.stream_audio(tts(), SAMPLERATE, grpc_port=self.emulator.grpc_port, pacer=pacer)
+                # the cancelled producer task closes the generator
+                await asyncio.sleep(0.05)
+                return a2f.metrics.snapshot()["gauges"]
+
+        sent = []
+        pacer = A2FStreamPacer(realtime_factor=None, buffer_seconds=0.3)
+        gauges = asyncio.run(run())
+        self.assertEqual(produced, ["closed"])
+        self.assertIn("stream_buffer_seconds_max", gauges)
+
+
+if __name__ == '__main__':
+    unittest.main()
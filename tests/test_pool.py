@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.modules._cache import A2FAnimationCache
+from py_audio2face.emulator import A2FEmulator, LatencyProfile, write_test_wav
+from py_audio2face.modules.clients._launcher import A2FLauncher
+from py_audio2face.pool import A2FServerError, Audio2FacePool, convert_clip
+
+
+class TestAudio2FacePool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_folder = os.path.join(self.tmp_dir.name, "audio")
+        os.makedirs(self.input_folder)
+        for i in range(12):
+            write_test_wav(os.path.join(self.input_folder, f"clip_{i}.wav"), seconds=0.1)
+
+        # a slow export, so that the second server gets work
+        latency = LatencyProfile(routes={"A2F/Exporter/ExportBlendshapes": 0.02})
+        self.emulators = [A2FEmulator(latency=latency).start() for _ in range(2)]
+
+    def tearDown(self):
+        for emulator in self.emulators:
+            emulator.stop()
+        self.tmp_dir.cleanup()
+
+    def _client(self, api_url: str, cache: A2FAnimationCache = None) -> Audio2Face:
+        # a launcher that fails at once, instead of searching for a headless script
+        launcher = A2FLauncher(command=["false"], log_file=None, timeout=1)
+        return Audio2Face(api_url=api_url, a2f_install_path=self.tmp_dir.name, launcher=launcher, cache=cache)
+
+    def test_folder_is_spread_over_servers(self):
+        with Audio2FacePool(clients=[self._client(e.api_url) for e in self.emulators]) as pool:
+            output_files = pool.audio2face_folder(self.input_folder, os.path.join(self.tmp_dir.name, "out"), fps=30)
+
+        self.assertEqual(len(output_files), 12)
+        for of in output_files:
+            self.assertTrue(os.path.isfile(f"{of}.usd"))
+        exports = [e.state.requests["A2F/Exporter/ExportBlendshapes"] for e in self.emulators]
+        self.assertEqual(sum(exports), 12)
+        self.assertTrue(all(n > 0 for n in exports))
+        self.assertEqual(pool.metrics.snapshot()["counters"]["pool_jobs_completed"], 12)
+
+    def test_failing_server_is_evicted(self):
+        clients = [self._client(self.emulators[0].api_url), self._client("http://127.0.0.1:9")]
+        with Audio2FacePool(clients=clients, max_failures=1, eviction_cooldown=60) as pool:
+            futures = pool.map(
+                [os.path.join(self.input_folder, f"clip_{i}.wav") for i in range(6)],
+                [os.path.join(self.tmp_dir.name, "out", f"clip_{i}") for i in range(6)]
+            )
+            results = [f.result(timeout=30) for f in futures]
+
+            self.assertEqual(len(results), 6)
+            self.assertEqual(pool.healthy_servers, [self.emulators[0].api_url])
+            self.assertEqual(pool.metrics.snapshot()["counters"]["pool_evictions"], 1)
+
+    def test_futures_are_resolved_without_the_pool_lock(self):
+        owned = []
+        with Audio2FacePool(clients=[self._client(self.emulators[0].api_url)]) as pool:
+            clip = os.path.join(self.input_folder, "clip_0.wav")
+            future = pool.submit(clip, os.path.join(self.tmp_dir.name, "out", "clip_0"))
+            future.add_done_callback(lambda f: owned.append(pool._cond._is_owned()))
+            future.result(timeout=30)
+        self.assertEqual(owned, [False])
+
+    def test_no_requeue_after_close(self):
+        class ClosingSupervisor:
+            """ Closes the pool while a job of the recycled server fails """
+            def record(self, client, seconds, error, audio_file_path=None):
+                pool.close(wait=False)
+                return "test"
+
+            def recycle(self, client, reason):
+                return True
+
+        pool = Audio2FacePool(clients=[self._client("http://127.0.0.1:9")], supervisor=ClosingSupervisor())
+        future = pool.submit(os.path.join(self.input_folder, "clip_0.wav"), os.path.join(self.tmp_dir.name, "out"))
+        self.assertIsInstance(future.exception(timeout=10), A2FServerError)
+
+    def test_convert_clip_uses_the_cache(self):
+        emulator = self.emulators[0]
+        client = self._client(emulator.api_url, cache=A2FAnimationCache(os.path.join(self.tmp_dir.name, "cache")))
+        clip = os.path.join(self.input_folder, "clip_0.wav")
+        first = convert_clip(client, clip, os.path.join(self.tmp_dir.name, "out", "first"), fps=30)
+        second = convert_clip(client, clip, os.path.join(self.tmp_dir.name, "out", "second"), fps=30)
+
+        self.assertTrue(os.path.isfile(f"{first}.usd"))
+        self.assertTrue(os.path.isfile(f"{second}.usd"))
+        self.assertEqual(emulator.state.requests["A2F/Exporter/ExportBlendshapes"], 1)
+        # the server is checked once, when the scene is loaded
+        self.assertEqual(emulator.state.requests["status"], 1)
+        client.close()
+
+    def test_convert_clip_raises_if_the_server_is_not_reachable(self):
+        client = self._client("http://127.0.0.1:9")
+        with self.assertRaisesRegex(A2FServerError, "not reachable"):
+            convert_clip(client, os.path.join(self.input_folder, "clip_0.wav"), os.path.join(self.tmp_dir.name, "out"))
+        # the scene of a server that didn't start is not marked as loaded
+        self.assertIsNone(client.loaded_scene)
+
+
+if __name__ == '__main__':
+    unittest.main()
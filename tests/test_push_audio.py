@@ -0,0 +1,75 @@
+import asyncio
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator
+from py_audio2face.modules._streaming import streaming_installed
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestPushAudio(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = A2FEmulator(grpc_port=0).start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=".")
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+
+    def test_short_clip_uses_unary_push(self):
+        import numpy as np
+        clip = np.zeros(4800, dtype=np.int16)  # 300 ms
+        self.assertTrue(self.a2f.push_audio(clip, 16000, grpc_port=self.emulator.grpc_port))
+
+        stream = self.emulator.state.streams[-1]
+        self.assertEqual(stream["route"], "PushAudio")
+        self.assertEqual(stream["bytes"], 4800 * 4)
+        snapshot = self.a2f.metrics.snapshot()
+        self.assertEqual(snapshot["routes"]["PushAudio/first_chunk"]["count"], 1)
+        self.assertEqual(snapshot["counters"]["stream_bytes"], 4800 * 4)
+
+    def test_failed_unary_push_is_recorded(self):
+        import grpc
+        grpc_port = self.emulator.grpc_port
+        self.assertTrue(self.a2f.push_audio(bytes(1600 * 4), 16000, grpc_port=grpc_port))
+
+        self.emulator.stop()
+        with self.assertRaises(grpc.RpcError):
+            self.a2f.push_audio(bytes(1600 * 4), 16000, grpc_port=grpc_port)
+
+        self.assertFalse(self.a2f.last_stream_stats.success)
+        self.assertEqual(self.a2f.metrics.snapshot()["routes"]["PushAudio/first_chunk"]["errors"], 1)
+        self.assertEqual(self.a2f.metrics.snapshot()["routes"]["PushAudio/first_chunk"]["count"], 2)
+
+    def test_long_clip_falls_back_to_streaming(self):
+        import numpy as np
+        clip = np.zeros(16000, dtype=np.float32)
+        self.assertTrue(self.a2f.push_audio(clip, 16000, grpc_port=self.emulator.grpc_port, max_unary_bytes=1024))
+
+        stream = self.emulator.state.streams[-1]
+        self.assertEqual(stream["route"], "PushAudioStream")
+        self.assertEqual(stream["chunks"], 10)
+        self.assertAlmostEqual(stream["audio_seconds"], 1.0)
+
+    def test_stream_audio_sends_complete_buffers_with_push_audio(self):
+        self.assertTrue(self.a2f.stream_audio(bytes(1600 * 4), 16000, grpc_port=self.emulator.grpc_port))
+        self.assertEqual(self.emulator.state.streams[-1]["route"], "PushAudio")
+
+    def test_async_push_audio(self):
+        from py_audio2face import AsyncAudio2Face
+
+        async def run():
+            async with AsyncAudio2Face(api_url=self.emulator.api_url, a2f_install_path=".") as a2f:
+                short = await a2f.push_audio(bytes(1600 * 4), 16000, grpc_port=self.emulator.grpc_port)
+                long = await a2f.push_audio(
+                    bytes(16000 * 4), 16000, grpc_port=self.emulator.grpc_port, max_unary_bytes=0
+                )
+                return short and long
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual([s["route"] for s in self.emulator.state.streams], ["PushAudio", "PushAudioStream"])
+
+
+if __name__ == '__main__':
+    unittest.main()
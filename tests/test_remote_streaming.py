@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator
+from py_audio2face.modules.clients._grpc_channels import A2FGrpcChannelPool
+from py_audio2face.modules._streaming import streaming_installed
+
+
+def _chunks(count: int = 20, size: int = 320):
+    import numpy as np
+    return (np.full(size, 0.1, dtype=np.float32) for _ in range(count))
+
+
+class TestRemoteSettings(unittest.TestCase):
+
+    def test_grpc_host_defaults_to_the_api_host(self):
+        self.assertEqual(Audio2Face(api_url="http://gpu-node-3:8011", a2f_install_path=".").grpc_host, "gpu-node-3")
+        a2f = Audio2Face(api_url="http://gpu-node-3:8011", a2f_install_path=".", grpc_host="10.0.0.7")
+        self.assertEqual(a2f.grpc_host, "10.0.0.7")
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            A2FGrpcChannelPool(compression="brotli")
+
+    def test_replace_keeps_the_other_settings(self):
+        pool = A2FGrpcChannelPool(keepalive_time_ms=1234, compression="gzip").replace(min_chunk_seconds=0.2)
+        self.assertEqual(pool.compression, "gzip")
+        self.assertEqual(pool.min_chunk_seconds, 0.2)
+        self.assertIn(("grpc.keepalive_time_ms", 1234), pool.options)
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestRemoteStreaming(unittest.TestCase):
+
+    def _stream(self, emulator, pool: A2FGrpcChannelPool, chunks=None) -> bool:
+        a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".", grpc_channels=pool)
+        try:
+            return a2f.stream_audio(chunks or _chunks(), 16000, grpc_port=emulator.grpc_port)
+        finally:
+            a2f.close()
+            pool.close()
+
+    def test_compressed_streams(self):
+        with A2FEmulator(grpc_port=0) as emulator:
+            for compression in ("gzip", "deflate"):
+                self.assertTrue(self._stream(emulator, A2FGrpcChannelPool(compression=compression)))
+                self.assertEqual(emulator.state.streams[-1]["bytes"], 20 * 320 * 4)
+
+    def test_small_chunks_are_merged(self):
+        with A2FEmulator(grpc_port=0) as emulator:
+            # 20 chunks of 20 ms in messages of at least 100 ms
+            self.assertTrue(self._stream(emulator, A2FGrpcChannelPool(min_chunk_seconds=0.1)))
+            stream = emulator.state.streams[-1]
+        self.assertEqual(stream["chunks"], 4)
+        self.assertEqual(stream["bytes"], 20 * 320 * 4)
+
+    def test_merged_chunks_with_asyncio(self):
+        from py_audio2face import AsyncAudio2Face
+
+        async def tts():
+            for chunk in _chunks(count=21):
+                yield chunk
+
+        async def run(emulator):
+            pool = A2FGrpcChannelPool(min_chunk_seconds=0.1)
+            async with AsyncAudio2Face(api_url=emulator.api_url, a2f_install_path=".", grpc_channels=pool) as a2f:
+                success = await a2f.stream_audio(tts(), 16000, grpc_port=emulator.grpc_port)
+            await pool.aclose()
+            return success
+
+        with A2FEmulator(grpc_port=0) as emulator:
+            self.assertTrue(asyncio.run(run(emulator)))
+            stream = emulator.state.streams[-1]
+        # the last chunk is flushed on its own
+        self.assertEqual(stream["chunks"], 5)
+        self.assertEqual(stream["bytes"], 21 * 320 * 4)
+
+    def test_tls_credentials(self):
+        import grpc
+        server_credentials = grpc.local_server_credentials(grpc.LocalConnectionType.LOCAL_TCP)
+        channel_credentials = grpc.local_channel_credentials(grpc.LocalConnectionType.LOCAL_TCP)
+        with A2FEmulator(grpc_port=0, grpc_credentials=server_credentials) as emulator:
+            self.assertTrue(self._stream(emulator, A2FGrpcChannelPool(credentials=channel_credentials)))
+
+    def test_measure_streaming(self):
+        with A2FEmulator(grpc_port=0) as emulator:
+            a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+            channels = a2f.grpc_channels
+            results = a2f.measure_streaming(
+                compressions=(None, "gzip"), chunk_seconds=(0.02, 0.2), repeats=1, grpc_port=emulator.grpc_port
+            )
+            self.assertIs(a2f.grpc_channels, channels)
+            a2f.close()
+
+        self.assertEqual([(r["compression"], r["chunk_seconds"]) for r in results],
+                         [(None, 0.02), (None, 0.2), ("gzip", 0.02), ("gzip", 0.2)])
+        for result in results:
+            self.assertTrue(result["success"])
+            self.assertGreater(result["bytes_per_second"], 0)
+            self.assertGreater(result["realtime_factor"], 1.0)
+            self.assertGreaterEqual(result["tail_seconds"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from py_audio2face.audio2face import Audio2Face
+
+
+class _RecordingTransport:
+    """ Fake transport that answers every request with OK and records the routes. """
+
+    def __init__(self):
+        self.routes = []
+
+    def request(self, method, url, api_route, payload=None):
+        self.routes.append(api_route)
+        response = MagicMock(status_code=200)
+        response.json.return_value = "OK" if api_route == "status" else {"status": "OK", "result": []}
+        return response
+
+    def close(self):
+        pass
+
+
+class TestServerState(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.audio_files = []
+        for i in range(3):
+            path = os.path.join(self.tmp_dir.name, f"clip_{i}.wav")
+            with open(path, "wb") as f:
+                f.write(b"RIFF")
+            self.audio_files.append(path)
+
+        self.transport = _RecordingTransport()
+        self.a2f = Audio2Face(a2f_install_path=self.tmp_dir.name, transport=self.transport)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_root_path_and_scene_are_set_once(self):
+        for af in self.audio_files:
+            self.a2f.audio2face_single(af, os.path.join(self.tmp_dir.name, "out", "anim"), emotion_auto_detect=False)
+
+        self.assertEqual(self.transport.routes.count("A2F/USD/Load"), 1)
+        self.assertEqual(self.transport.routes.count("A2F/Player/SetRootPath"), 1)
+        self.assertEqual(self.transport.routes.count("A2F/Player/SetTrack"), 3)
+
+    def test_same_track_is_not_set_again(self):
+        self.a2f.set_track(self.audio_files[0])
+        self.a2f.set_track(self.audio_files[0])
+        self.assertEqual(self.transport.routes.count("A2F/Player/SetTrack"), 1)
+
+    def test_unchanged_emotion_is_skipped(self):
+        self.a2f.set_emotion(anger=0.5, update_settings=True)
+        self.a2f.set_emotion(anger=0.5, update_settings=True)
+        self.assertEqual(self.transport.routes.count("A2F/A2E/SetSettings"), 1)
+        self.assertEqual(self.transport.routes.count("A2F/A2E/SetEmotion"), 1)
+
+        self.a2f.set_emotion(anger=0.7, update_settings=True)
+        self.assertEqual(self.transport.routes.count("A2F/A2E/SetEmotion"), 2)
+
+    def test_invalidate_and_resync(self):
+        self.a2f.set_emotion(joy=1.0)
+        self.a2f.set_root_path(self.audio_files[0])
+        self.a2f.invalidate_state()
+        self.transport.routes.clear()
+
+        self.a2f.set_root_path(self.audio_files[0])
+        self.assertEqual(self.transport.routes, ["A2F/Player/SetRootPath"])
+
+        self.transport.routes.clear()
+        self.a2f.resync()
+        self.assertIn("A2F/USD/Load", self.transport.routes)
+        self.assertIn("A2F/Player/SetRootPath", self.transport.routes)
+        self.assertIn("A2F/A2E/SetSettings", self.transport.routes)
+        self.assertIn("A2F/A2E/SetEmotion", self.transport.routes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator, LatencyProfile
+from py_audio2face.modules._stream_export import A2FStreamExporter
+from py_audio2face.modules._streaming import streaming_installed
+
+CHUNK = bytes(1600 * 4)  # 0.1 s at 16 kHz
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestStreamExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmp_dir.name, "take")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_segments_cover_the_stream_and_merge_into_one_take(self):
+        exporter = A2FStreamExporter(self.output_path, every_chunks=10, fps=30, format="json", merge=True)
+        with A2FEmulator(grpc_port=0) as emulator:
+            a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+            self.assertTrue(a2f.stream_audio((CHUNK for _ in range(50)), 16000, grpc_port=emulator.grpc_port,
+                                             exporter=exporter))
+            a2f.close()
+
+        self.assertGreaterEqual(len(exporter.files), 1)
+        self.assertEqual(exporter.errors, [])
+        self.assertTrue(exporter.files[0].endswith("take_0000.json"))
+        with open(exporter.take) as f:
+            take = json.load(f)
+        # 5 s at 30 fps, without gaps or overlaps between the segments
+        self.assertEqual(take["numFrames"], 150)
+        self.assertEqual(len(take["weightMat"]), 150)
+
+    def test_exports_do_not_stall_the_stream(self):
+        latency = LatencyProfile({"A2F/Exporter/ExportBlendshapes": 0.2})
+        exporter = A2FStreamExporter(self.output_path, every_chunks=5, format="usd")
+        with A2FEmulator(grpc_port=0, latency=latency) as emulator:
+            a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+            self.assertTrue(a2f.stream_audio((CHUNK for _ in range(30)), 16000, grpc_port=emulator.grpc_port,
+                                             exporter=exporter))
+            a2f.close()
+
+        # six segments were due, each export takes 0.2 s. The stream itself did not wait for them.
+        self.assertLess(a2f.metrics.snapshot()["routes"]["PushAudioStream"]["max"], 0.2)
+        self.assertTrue(all(f.endswith(".usd") for f in exporter.files))
+        self.assertIsNone(exporter.take)
+
+    def test_segment_queued_before_finish_is_exported(self):
+        exported = []
+        started, busy = threading.Event(), threading.Event()
+
+        class SlowExporter(A2FStreamExporter):
+            def _export_segment(self, client, sent_seconds):
+                exported.append(sent_seconds)
+                if len(exported) == 1:
+                    started.set()
+                    busy.wait(5)
+
+        exporter = SlowExporter(self.output_path, every_chunks=1)
+        worker = exporter.start(client=None)
+        worker.chunk_sent(0.1)
+        started.wait(5)
+        # queued while the first segment is exported, right before the stream ends
+        worker.chunk_sent(0.1)
+        worker.chunk_sent(0.1)
+        worker.queue.put(None)
+        busy.set()
+        worker.thread.join(5)
+
+        self.assertEqual(len(exported), 2)
+        self.assertAlmostEqual(exported[-1], 0.3)
+
+    def test_only_json_can_be_merged(self):
+        with self.assertRaises(ValueError):
+            A2FStreamExporter(self.output_path, format="usd", merge=True)
+
+    def test_async_stream_export(self):
+        from py_audio2face import AsyncAudio2Face
+        exporter = A2FStreamExporter(self.output_path, every_chunks=4, fps=10, format="json", merge=True)
+
+        async def run(emulator):
+            async with AsyncAudio2Face(api_url=emulator.api_url, a2f_install_path=".") as a2f:
+                return await a2f.stream_audio(
+                    (CHUNK for _ in range(20)), 16000, grpc_port=emulator.grpc_port, exporter=exporter
+                )
+
+        with A2FEmulator(grpc_port=0) as emulator:
+            self.assertTrue(asyncio.run(run(emulator)))
+        with open(exporter.take) as f:
+            self.assertEqual(json.load(f)["numFrames"], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
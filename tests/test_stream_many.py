@@ -0,0 +1,65 @@
+import asyncio
+import time
+import unittest
+
+from py_audio2face.emulator import A2FEmulator
+from py_audio2face.modules._streaming import streaming_installed
+
+AVATARS = [f"/World/avatar_{i}/audio2face/PlayerStreaming" for i in range(4)]
+
+
+async def _clip(seconds: float = 0.5, chunk_size: int = 1600):
+    import numpy as np
+    for _ in range(int(seconds * 16000 / chunk_size)):
+        yield np.zeros(chunk_size, dtype=np.float32)
+        await asyncio.sleep(0)
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestStreamMany(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = A2FEmulator(grpc_port=0, realtime_streaming=True, extra_players=AVATARS).start()
+
+    def tearDown(self):
+        self.emulator.stop()
+
+    def _stream_many(self, streams: dict, **kwargs):
+        from py_audio2face import AsyncAudio2Face
+
+        async def run():
+            async with AsyncAudio2Face(api_url=self.emulator.api_url, a2f_install_path=".") as a2f:
+                results = await a2f.stream_many(streams, samplerate=16000, grpc_port=self.emulator.grpc_port, **kwargs)
+                return results, a2f.metrics.counters
+
+        return asyncio.run(run())
+
+    def test_streams_run_concurrently_on_one_channel(self):
+        start = time.perf_counter()
+        results, counters = self._stream_many({name: _clip() for name in AVATARS})
+        seconds = time.perf_counter() - start
+
+        self.assertEqual(list(results), AVATARS)
+        self.assertTrue(all(results.values()))
+        # four clips of 0.5 s played back in real time take about as long as one
+        self.assertLess(seconds, 1.5)
+        self.assertEqual(counters["grpc_channels_opened"], 1)
+        self.assertEqual(counters["streams_succeeded"], 4)
+        self.assertEqual(
+            sorted(s["instance_name"] for s in self.emulator.state.streams), sorted(AVATARS)
+        )
+
+    def test_a_failed_stream_does_not_affect_the_others(self):
+        streams = {AVATARS[0]: _clip(), "/World/unknown/PlayerStreaming": _clip(), AVATARS[1]: _clip()}
+        results, counters = self._stream_many(streams, max_concurrent_streams=2)
+
+        self.assertTrue(results[AVATARS[0]].success)
+        self.assertTrue(results[AVATARS[1]].success)
+        failed = results["/World/unknown/PlayerStreaming"]
+        self.assertFalse(failed)
+        self.assertIn("is not a player of the scene", failed.message)
+        self.assertEqual(counters["streams_failed"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
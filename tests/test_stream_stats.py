@@ -0,0 +1,120 @@
+import asyncio
+import time
+import unittest
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator
+from py_audio2face.modules._pacing import A2FStreamPacer
+from py_audio2face.modules._stream_stats import A2FStreamStats
+from py_audio2face.modules._streaming import streaming_installed
+
+SAMPLERATE = 16000
+CHUNK = bytes(1600 * 4)  # 0.1 s of float32
+
+
+def _tts(chunks: int = 10, stall_at: int = None, stall: float = 0.0):
+    for i in range(chunks):
+        if i == stall_at:
+            time.sleep(stall)
+        yield CHUNK
+
+
+class TestStreamStats(unittest.TestCase):
+
+    def test_burst_has_no_stalls(self):
+        stats = A2FStreamStats("player", SAMPLERATE)
+        stats._on_start_marker()
+        for _ in range(10):
+            stats._on_chunk(0.0, len(CHUNK))
+        stats._on_end_of_audio()
+
+        self.assertEqual(stats.chunks, 10)
+        self.assertAlmostEqual(stats.audio_seconds, 1.0)
+        self.assertEqual(stats.stalls, 0)
+        self.assertEqual(len(stats.intervals), 9)
+        self.assertGreater(stats.realtime_factor, 1.0)
+
+    def test_gap_longer_than_the_sent_audio_is_a_stall(self):
+        stats = A2FStreamStats("player", SAMPLERATE)
+        stats._on_start_marker()
+        stats._on_chunk(0.0, len(CHUNK))
+        time.sleep(0.2)
+        stats._on_chunk(0.2, len(CHUNK))
+        stats._on_end_of_audio()
+
+        self.assertEqual(stats.stalls, 1)
+        # the player had 0.1 s of audio and waited 0.2 s for the next chunk
+        self.assertGreater(stats.stall_seconds, 0.08)
+        self.assertGreater(stats.interval_max, 0.19)
+        self.assertLess(stats.realtime_factor, 1.0)
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestStreamAudioStats(unittest.TestCase):
+
+    def setUp(self):
+        self.emulator = A2FEmulator(grpc_port=0).start()
+        self.a2f = Audio2Face(api_url=self.emulator.api_url, a2f_install_path=".")
+
+    def tearDown(self):
+        self.a2f.close()
+        self.emulator.stop()
+
+    def test_stream_records_stats_and_metrics(self):
+        self.assertTrue(self.a2f.stream_audio(_tts(), SAMPLERATE, grpc_port=self.emulator.grpc_port))
+        stats = self.a2f.last_stream_stats
+        self.assertTrue(stats.success)
+        self.assertEqual(stats.chunks, 10)
+        self.assertEqual(stats.bytes, 10 * len(CHUNK))
+        self.assertLessEqual(stats.channel_ready, stats.start_marker)
+        self.assertLessEqual(stats.start_marker, stats.first_chunk)
+        self.assertLessEqual(stats.end_of_audio, stats.duration)
+        self.assertGreater(stats.bytes_per_second, 0)
+
+        snapshot = self.a2f.metrics.snapshot()
+        self.assertEqual(snapshot["routes"]["PushAudioStream/first_chunk"]["count"], 1)
+        self.assertGreater(snapshot["gauges"]["stream_realtime_factor"], 1.0)
+        self.assertAlmostEqual(snapshot["counters"]["stream_audio_seconds"], 1.0)
+
+    def test_slow_producer_is_a_stall(self):
+        # 0.3 s of audio are sent at once, then the producer needs 0.5 s
+        self.a2f.stream_audio(_tts(stall_at=3, stall=0.5), SAMPLERATE, grpc_port=self.emulator.grpc_port)
+        stats = self.a2f.last_stream_stats
+        self.assertEqual(stats.stalls, 1)
+        self.assertGreater(stats.stall_seconds, 0.15)
+        self.assertGreater(stats.producer_wait_seconds, 0.45)
+        self.assertGreaterEqual(self.a2f.metrics.counters["stream_stalls"], 1)
+
+    def test_failed_stream_keeps_the_server_message(self):
+        self.assertFalse(self.a2f.stream_audio(
+            _tts(), SAMPLERATE, grpc_port=self.emulator.grpc_port, instance_name="/World/unknown"
+        ))
+        stats = self.a2f.last_stream_stats
+        self.assertFalse(stats.success)
+        self.assertIn("/World/unknown", stats.message)
+
+    def test_paced_stream_runs_in_real_time(self):
+        pacer = A2FStreamPacer(realtime_factor=1.0, lead_seconds=0.2)
+        self.a2f.stream_audio(_tts(chunks=5), SAMPLERATE, grpc_port=self.emulator.grpc_port, pacer=pacer)
+        stats = self.a2f.last_stream_stats
+        # waiting for the pace is no stall, the player always has the lead
+        self.assertEqual(stats.stalls, 0)
+        self.assertGreater(stats.realtime_factor, 1.0)
+        self.assertLess(stats.realtime_factor, 2.0)
+
+    def test_stream_many_results_have_stats(self):
+        from py_audio2face import AsyncAudio2Face
+
+        async def run():
+            async with AsyncAudio2Face(api_url=self.emulator.api_url, a2f_install_path=".") as a2f:
+                return await a2f.stream_many(
+                    {"/World/audio2face/PlayerStreaming": _tts()}, SAMPLERATE, grpc_port=self.emulator.grpc_port
+                )
+
+        result = asyncio.run(run())["/World/audio2face/PlayerStreaming"]
+        self.assertEqual(result.stats.chunks, 10)
+        self.assertEqual(result.stats.samplerate, SAMPLERATE)
+
+
+if __name__ == '__main__':
+    unittest.main()
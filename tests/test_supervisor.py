@@ -0,0 +1,80 @@
+import os
+import socket
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import write_test_wav
+from py_audio2face.modules.clients._launcher import A2FLauncher
+from py_audio2face.pool import Audio2FacePool
+from py_audio2face.supervisor import A2FSupervisor, process_memory_mb
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestSupervisorThresholds(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock(process_audio2face=None)
+        self.supervisor = A2FSupervisor(max_latency_ratio=2.0, max_error_rate=0.5, window=5)
+
+    def test_latency_trend(self):
+        for _ in range(5):
+            self.assertIsNone(self.supervisor.record(self.client, 1.0, error=False))
+        reasons = [self.supervisor.record(self.client, 3.0, error=False) for _ in range(5)]
+        self.assertIsNone(reasons[0])
+        self.assertIn("slower", reasons[-1])
+
+    def test_error_rate(self):
+        for error in (False, True, False, True):
+            self.assertIsNone(self.supervisor.record(self.client, 1.0, error=error))
+        self.assertIn("error rate", self.supervisor.record(self.client, 1.0, error=True))
+
+    def test_process_memory(self):
+        self.assertGreater(process_memory_mb(os.getpid()), 0)
+
+
+class TestSupervisedPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.python_path = os.environ.get("PYTHONPATH")
+        os.environ["PYTHONPATH"] = REPO_ROOT + os.pathsep + (self.python_path or "")
+
+    def tearDown(self):
+        if self.python_path is None:
+            del os.environ["PYTHONPATH"]
+        else:
+            os.environ["PYTHONPATH"] = self.python_path
+        self.tmp_dir.cleanup()
+
+    def test_recycle_after_max_jobs(self):
+        port = _free_port()
+        command = [sys.executable, "-m", "py_audio2face.emulator", "--port", str(port), "--no-grpc"]
+        client = Audio2Face(api_url=f"http://127.0.0.1:{port}", a2f_install_path=self.tmp_dir.name,
+                            launcher=A2FLauncher(command=command, log_file=None, timeout=30))
+        clips = [write_test_wav(os.path.join(self.tmp_dir.name, "audio", f"clip_{i}.wav"), seconds=0.1)
+                 for i in range(7)]
+
+        with Audio2FacePool(clients=[client], supervisor=A2FSupervisor(max_jobs=3)) as pool:
+            futures = pool.map(clips, [os.path.join(self.tmp_dir.name, "out", f"clip_{i}") for i in range(7)])
+            results = [f.result(timeout=60) for f in futures]
+        client.shutdown_a2f()
+
+        self.assertEqual(len(results), 7)
+        counters = client.metrics.snapshot()["counters"]
+        self.assertEqual(counters["supervisor_recycles"], 2)
+        self.assertEqual(counters["server_starts"], 3)
+        self.assertEqual(pool.metrics.snapshot()["counters"]["pool_jobs_completed"], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from py_audio2face.modules.clients._transport import A2FHttpTransport
+
+
+class TestHttpTransport(unittest.TestCase):
+
+    def _transport(self, failures: int, **kwargs) -> A2FHttpTransport:
+        """ A transport whose session fails the first requests with a connection error """
+        transport = A2FHttpTransport(max_retries=2, backoff_factor=0, **kwargs)
+        ok = MagicMock(status_code=200)
+        transport._session = MagicMock()
+        transport._session.request.side_effect = [requests.ConnectionError("connection reset")] * failures + [ok]
+        return transport
+
+    def test_idempotent_routes_are_retried(self):
+        transport = self._transport(failures=2)
+        response = transport.request("POST", "http://a2f/A2F/Player/SetTrack", "A2F/Player/SetTrack", {"file_name": "a"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(transport.session.request.call_count, 3)
+
+    def test_retries_are_limited(self):
+        transport = self._transport(failures=3)
+        with self.assertRaises(requests.ConnectionError):
+            transport.request("POST", "http://a2f/A2F/Player/SetTrack", "A2F/Player/SetTrack", {"file_name": "a"})
+        self.assertEqual(transport.session.request.call_count, 3)
+
+    def test_export_is_not_retried(self):
+        transport = self._transport(failures=1)
+        with self.assertRaises(requests.ConnectionError):
+            transport.request(
+                "POST", "http://a2f/A2F/Exporter/ExportBlendshapes", "A2F/Exporter/ExportBlendshapes", {}
+            )
+        self.assertEqual(transport.session.request.call_count, 1)
+
+    def test_route_timeouts(self):
+        transport = self._transport(failures=0, timeout=(1, 10), route_timeouts={"A2F/Player/SetTrack": (2, 20)})
+        self.assertEqual(transport.get_timeout("A2F/Player/SetTrack"), (2, 20))
+        self.assertEqual(transport.get_timeout("A2F/Exporter/ExportBlendshapes"), (3.05, 600))
+        self.assertEqual(transport.get_timeout("A2F/Player/SetFrame"), (1, 10))
+
+        transport.request("POST", "http://a2f/A2F/Player/SetTrack", "A2F/Player/SetTrack", {})
+        self.assertEqual(transport.session.request.call_args.kwargs["timeout"], (2, 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import struct
+import tempfile
+import tracemalloc
+import unittest
+import wave
+
+from py_audio2face.audio2face import Audio2Face
+from py_audio2face.emulator import A2FEmulator, write_test_wav
+from py_audio2face.modules._streaming import streaming_installed
+
+
+def _write_wav(path: str, data: bytes, samplerate: int, channels: int, bits: int, format_tag: int,
+               extensible: bool = False):
+    """ wav with a LIST chunk of odd size before the data, like many encoders write it """
+    block_align = channels * bits // 8
+    fmt = struct.pack("<HHIIHH", 0xFFFE if extensible else format_tag, channels, samplerate,
+                      samplerate * block_align, block_align, bits)
+    if extensible:
+        fmt += struct.pack("<HHI", 22, bits, 0) + struct.pack("<H", format_tag) + bytes(14)
+    chunks = b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    chunks += b"LIST" + struct.pack("<I", 3) + b"abc\x00"
+    chunks += b"data" + struct.pack("<I", len(data)) + data
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks)
+    return path
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestWavReader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_int16_is_converted_into_a_reused_buffer(self):
+        import numpy as np
+        from py_audio2face import A2FWavReader
+        path = write_test_wav(self._path("int16.wav"), seconds=0.25)
+        with wave.open(path) as w:
+            expected = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16) / 2 ** 15
+
+        reader = A2FWavReader(path)
+        self.assertEqual(reader.samplerate, 16000)
+        chunks = []
+        first = None
+        for chunk in reader.chunks(1000):
+            self.assertEqual(chunk.dtype, np.float32)
+            first = chunk if first is None else first
+            self.assertTrue(np.shares_memory(chunk, first))
+            chunks.append(chunk.copy())
+        self.assertEqual([len(c) for c in chunks], [1000, 1000, 1000, 1000])
+        np.testing.assert_allclose(np.concatenate(chunks), expected, atol=1e-7)
+
+    def test_float32_mono_is_read_without_a_copy(self):
+        import numpy as np
+        from py_audio2face import A2FWavReader
+        samples = np.linspace(-1, 1, 3000, dtype=np.float32)
+        path = _write_wav(self._path("float.wav"), samples.tobytes(), 24000, 1, 32, 3, extensible=True)
+
+        reader = A2FWavReader(path)
+        self.assertEqual((reader.samplerate, reader.frames), (24000, 3000))
+        chunks = list(reader.chunks(1024))
+        self.assertFalse(chunks[0].flags.owndata)
+        np.testing.assert_array_equal(np.concatenate(chunks), samples)
+
+    def test_24_bit_stereo_is_downmixed(self):
+        import numpy as np
+        from py_audio2face import A2FWavReader
+        left = np.array([0, 2 ** 22, -2 ** 23, 2 ** 23 - 1], dtype=np.int32)
+        right = np.array([0, 2 ** 22, 0, 2 ** 23 - 1], dtype=np.int32)
+        frames = np.stack([left, right], axis=1).reshape(-1)
+        data = b"".join(int(v).to_bytes(3, "little", signed=True) for v in frames)
+        path = _write_wav(self._path("pcm24.wav"), data, 16000, 2, 24, 1)
+
+        chunk = np.concatenate(list(A2FWavReader(path).chunks(3, reuse_buffer=False)))
+        np.testing.assert_allclose(chunk, (left + right) / 2 / 2 ** 23, atol=1e-6)
+
+    def test_memory_does_not_grow_with_the_duration(self):
+        from py_audio2face import A2FWavReader
+        path = write_test_wav(self._path("long.wav"), seconds=60)
+
+        tracemalloc.start()
+        for _ in A2FWavReader(path).chunks(1600):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        # 60 s of int16 are 1.9 MB, as float32 3.8 MB
+        self.assertLess(peak, 100 * 1024)
+
+    def test_not_a_wav_file(self):
+        from py_audio2face import A2FWavReader
+        with open(self._path("clip.mp3"), "wb") as f:
+            f.write(b"ID3" + bytes(100))
+        with self.assertRaises(ValueError):
+            A2FWavReader(self._path("clip.mp3"))
+
+
+@unittest.skipUnless(streaming_installed, "py_audio2face[streaming] is not installed")
+class TestStreamFile(unittest.TestCase):
+
+    def test_samplerate_is_read_from_the_header(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, A2FEmulator(grpc_port=0) as emulator:
+            path = write_test_wav(os.path.join(tmp_dir, "clip.wav"), seconds=1.0, samplerate=22050)
+            a2f = Audio2Face(api_url=emulator.api_url, a2f_install_path=".")
+            self.assertTrue(a2f.stream_file(path, grpc_port=emulator.grpc_port))
+            a2f.close()
+
+            stream = emulator.state.streams[-1]
+            self.assertEqual(stream["samplerate"], 22050)
+            self.assertEqual(stream["chunks"], 10)
+            self.assertAlmostEqual(stream["audio_seconds"], 1.0, places=3)
+
+
+if __name__ == '__main__':
+    unittest.main()